@@ -16,12 +16,15 @@ try:
     import pyautogui
     import pygetwindow
     import requests
-    import zxing
-    from PIL import Image
     from reprint import output
+
+    from ddp_validator.barcode import decode_ean13
+    from ddp_validator.detector import find_boxes as detect_boxes
+    from ddp_validator.detector import wait_for_template
+    from ddp_validator.postscript import verify_postscript_batch
 except ImportError:
     print("Cannot import dependencies. Install them with:")
-    print("  pip install pyautogui requests zxing Pillow reprint opencv-python")
+    print("  pip install pyautogui requests numpy Pillow reprint opencv-python")
     exit(1)
 
 if sys.platform.startswith("win"):
@@ -55,9 +58,13 @@ SM_CYFRAME = 32
 SM_CYCAPTION = 4
 SM_CXPADDEDBORDER = 92
 
-reader = zxing.BarCodeReader()
+# Seconds to wait for the error dialog when it should, or should not, appear
+ERR_APPEAR_TIMEOUT = 2.0
+ERR_ABSENT_TIMEOUT = 0.3
+
 cwd = Path(".").resolve()
 box_absolute_path = str(cwd.resolve() / ERR_PATH)
+err_image = None
 
 
 class FailedCheck(Exception):
@@ -110,21 +117,30 @@ def check_gui(
     expected: str,
     window_region: Rect,
 ) -> Tuple[bool, str]:
-    pyautogui.screenshot(fpath + ".png", region=window_region)
-    result_gui = reader.decode(fpath + ".png")
-    return (
-        not result_gui or result_gui.format != "EAN_13" or result_gui.parsed != expected
-    ), result_gui.parsed
+    im = pyautogui.screenshot(region=window_region)
+    result_gui = decode_ean13(np.array(im))
+    return result_gui != expected, str(result_gui)
 
 
-def check_postscript(fpath: str, expected: str) -> Tuple[bool, str]:
-    Image.open(fpath + ".eps").save(fpath + "-convert.png")
-    result_postscript = reader.decode(fpath + "-convert.png")
-    return (
-        not result_postscript
-        or result_postscript.format != "EAN_13"
-        or result_postscript.parsed != expected
-    ), result_postscript.parsed
+def check_postscript_batch(items: List[Tuple[str, str]], output_dict):
+    # Rendering and decoding are independent per file, so do them all at once
+    start = time.perf_counter()
+    results = verify_postscript_batch(items)
+    elapsed = time.perf_counter() - start
+
+    failures = [r for r in results if not r["passed"]]
+    output_dict["Output (Postscript)"] = (
+        f"{len(results) - len(failures)}/{len(results)} passed in {elapsed:.2f}s"
+    )
+    if not failures:
+        output_dict["Status"] = "SUCCESS"
+        return
+
+    output_dict["Status"] = "FAILED"
+    for r in failures:
+        output_dict.append(
+            f"{r['path']}: expected {r['expected']}, got {r['decoded']} {r['message']}"
+        )
 
 
 def normalize_square(rect: Rect, window_region: Rect) -> Rect:
@@ -138,26 +154,18 @@ def normalize_square(rect: Rect, window_region: Rect) -> Rect:
 
 def find_boxes(window_region: Rect) -> List[Rect]:
     im = pyautogui.screenshot(region=window_region)
-
-    im_cv2 = cv2.cvtColor(np.array(im), cv2.COLOR_RGB2GRAY)
-    _, thrash = cv2.threshold(im_cv2, 240, 255, cv2.CHAIN_APPROX_NONE)
-    contours, _ = cv2.findContours(thrash, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
-
-    rects = []
-    for contour in contours:
-        # Approximate number of sides in contours
-        sides = cv2.approxPolyDP(contour, 0.01 * cv2.arcLength(contour, True), True)
-        # Not a rectangle, so whatever
-        if len(sides) != 4:
-            continue
-        rect = normalize_square(cv2.boundingRect(sides), window_region)
-        rects.append(rect)
-    rects.sort(key=lambda x: x[1])
+    rects = [normalize_square(r, window_region) for r in detect_boxes(np.array(im))]
 
     used_rects = rects[-3:]
     return used_rects
 
 
+def grab_screen() -> np.ndarray:
+    # Error dialogs are windows of their own, they may be drawn anywhere
+    # and not necessarily over the TP window
+    return np.array(pyautogui.screenshot())
+
+
 def check_failed(
     file_input: str,
     code_input: Union[int, str],
@@ -166,8 +174,7 @@ def check_failed(
     code_point: Point,
 ):
     write_inputs(file_input, code_input, saveas_point, code_point)
-    time.sleep(0.25)
-    err_location = pyautogui.locateOnScreen(box_absolute_path)
+    err_location = wait_for_template(grab_screen, err_image, ERR_APPEAR_TIMEOUT)
     if not err_location:
         raise FailedCheck(message)
     pyautogui.press("enter")
@@ -180,8 +187,7 @@ def check_passing(
     code_point: Point,
 ):
     write_inputs(file_input, code_input, saveas_point, code_point)
-    time.sleep(0.25)
-    err_location = pyautogui.locateOnScreen(box_absolute_path)
+    err_location = wait_for_template(grab_screen, err_image, ERR_ABSENT_TIMEOUT)
     if err_location:
         raise FailedCheck("Unexpected error is detected. Output should be correct.")
 
@@ -279,6 +285,9 @@ def main():
     if not os.path.exists(ERR_PATH):
         download_image(ERR_URL, ERR_PATH)
 
+    global err_image
+    err_image = cv2.cvtColor(cv2.imread(box_absolute_path), cv2.COLOR_BGR2RGB)
+
     print("!!!!!!!!!!!!!!!!!!! WARNING !!!!!!!!!!!!!!!!!!!!!!!")
     print("DO NOT touch your cursor during the process.")
     print("If something goes wrong, put your cursor to the")
@@ -348,6 +357,7 @@ def main():
                 output_dict["Status"] = "In progress"
                 do_error_check(saveas_point, code_point)
 
+            postscript_items: List[Tuple[str, str]] = []
             for i in range(MAX_TESTS):
                 fname = random_str(8)
                 fpath = fname
@@ -358,8 +368,6 @@ def main():
 
                 output_dict["Progress"] = f"{i+1}/{MAX_TESTS}"
                 output_dict["Output (GUI)"] = "..."
-                if has_ghostscript:
-                    output_dict["Output (Postscript)"] = "..."
                 output_dict["Expected"] = result_code
 
                 write_inputs(fpath + ".eps", code, saveas_point, code_point)
@@ -370,14 +378,13 @@ def main():
                     output_dict["Status"] = "FAILED"
                     break
 
-                if has_ghostscript:
-                    result_postscript = check_postscript(fpath, result_code)
-                    output_dict["Output (Postscript)"] = result_postscript[1]
-                    if result_postscript[0]:
-                        output_dict["Status"] = "FAILED"
-                        break
+                postscript_items.append((fpath + ".eps", result_code))
             else:
-                output_dict["Status"] = "SUCCESS"
+                if has_ghostscript:
+                    output_dict["Progress"] = "Verifying postscript outputs..."
+                    check_postscript_batch(postscript_items, output_dict)
+                else:
+                    output_dict["Status"] = "SUCCESS"
         except FailedCheck as e:
             output_dict["Status"] = "FAILED"
             output_dict.append(str(e))
@@ -0,0 +1,243 @@
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ddp_validator.types import AdmissionDecision, LoadSample
+from ddp_validator.utils import console, logger, read_rss
+
+# Value of --jobs that lets the controller pick the number of jobs
+AUTO_JOBS = 0
+
+# Programs allowed to run at once when the controller starts
+START_JOBS = 2
+# Runnable tasks per CPU above which fewer programs are admitted...
+LOAD_HIGH = 1.25
+# ...and below which one more may be admitted
+LOAD_LOW = 0.9
+# KiB of memory always left to the rest of the machine
+MEMORY_RESERVE = 256 * 1024
+# Seconds between samples of the machine
+SAMPLE_INTERVAL = 0.25
+# Weight of the newest sample in the smoothed load
+LOAD_SMOOTHING = 0.3
+# Seconds between two changes of the limit, so one shows up in the samples
+# before the next is made...
+ADJUST_INTERVAL = 1.0
+# ...and before growing again after a decrease
+DECREASE_HOLD = 5.0
+# Decisions listed in the report, the most recent ones
+REPORTED_DECISIONS = 20
+
+
+def parse_jobs(value: str) -> int:
+    if value == "auto":
+        return AUTO_JOBS
+    jobs = int(value)
+    if jobs < 1:
+        raise ValueError("Expected a positive number of jobs or 'auto'.")
+    return jobs
+
+
+def cpu_count() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def read_runnable() -> Optional[int]:
+    """Tasks running or waiting for a CPU right now, other than us."""
+    try:
+        with open("/proc/loadavg") as f:
+            runnable = int(f.read().split()[3].split("/")[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0, runnable - 1)
+
+
+def read_available() -> Optional[int]:
+    """MemAvailable of the machine in KiB, None if it cannot be read."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def descendants(pid: int) -> List[int]:
+    """Processes started by pid and their children, on Linux."""
+    found: List[int] = []
+    stack = [pid]
+    while stack:
+        parent = stack.pop()
+        try:
+            tasks = list(Path(f"/proc/{parent}/task").iterdir())
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                children = (task / "children").read_text().split()
+            except OSError:
+                continue
+            found += map(int, children)
+            stack += map(int, children)
+    return found
+
+
+def children_rss() -> Tuple[int, int]:
+    """Number of running descendants and their mean resident memory in KiB."""
+    sizes = [rss for rss in map(read_rss, descendants(os.getpid())) if rss]
+    if not sizes:
+        return 0, 0
+    return len(sizes), sum(sizes) // len(sizes)
+
+
+class AdmissionController:
+    """Decides how many programs may run at once on a shared machine.
+
+    Starts with a few jobs and adjusts the limit AIMD-style from samples of
+    the machine: one more job while CPUs are idle and memory can hold
+    another program of the size seen so far, half as many as soon as tasks
+    queue up for CPUs or memory runs short. Timing-sensitive checks, like
+    waiting for an interactive program to go quiet, misfire on a saturated
+    machine, so backing off quickly matters more than using every core.
+
+    Load is the number of runnable tasks, smoothed over recent samples. The
+    kernel's one-minute load average would trail every decision by a minute.
+    """
+
+    def __init__(self, max_jobs: int, adaptive: bool = True):
+        self._max_jobs = max_jobs
+        self._adaptive = adaptive
+        self._limit = min(START_JOBS, max_jobs) if adaptive else max_jobs
+        self._initial = self._limit
+        self._cpus = cpu_count()
+        self._load: Optional[float] = None
+        # Largest mean resident memory of our programs, a new one may need it
+        self._child_rss = 0
+        self._start = time.monotonic()
+        self._sampled = float("-inf")
+        self._changed = float("-inf")
+        self._hold_until = 0.0
+        self._decisions: List[AdmissionDecision] = []
+
+    @classmethod
+    def for_jobs(cls, jobs: int) -> "AdmissionController":
+        """Controller of a --jobs value, fixed unless it is AUTO_JOBS."""
+        if jobs == AUTO_JOBS:
+            return cls(cpu_count())
+        return cls(jobs, adaptive=False)
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def max_jobs(self) -> int:
+        return self._max_jobs
+
+    @property
+    def adaptive(self) -> bool:
+        return self._adaptive
+
+    @property
+    def decisions(self) -> List[AdmissionDecision]:
+        return self._decisions
+
+    def sample(self) -> LoadSample:
+        runnable = read_runnable()
+        if runnable is None and hasattr(os, "getloadavg"):
+            load = os.getloadavg()[0] / self._cpus
+        else:
+            load = (runnable or 0) / self._cpus
+
+        if self._load is not None:
+            load = LOAD_SMOOTHING * load + (1 - LOAD_SMOOTHING) * self._load
+        self._load = load
+
+        children, rss = children_rss()
+        return LoadSample(load, read_available(), children, rss)
+
+    def update(self, running: int) -> int:
+        """Sample the machine if it is time to and adjust the limit.
+
+        Args:
+            running (int): Programs currently admitted.
+
+        Returns:
+            int: Programs that may run at once from now on.
+        """
+        now = time.monotonic()
+        if not self._adaptive or now - self._sampled < SAMPLE_INTERVAL:
+            return self._limit
+
+        self._sampled = now
+        self.decide(self.sample(), running, now)
+        return self._limit
+
+    def decide(self, sample: LoadSample, running: int, now: float):
+        """Apply one AIMD step for a sample taken at now."""
+        self._child_rss = max(self._child_rss, sample.child_rss)
+        if now - self._changed < ADJUST_INTERVAL:
+            return
+
+        needed = MEMORY_RESERVE + self._child_rss
+        overload = None
+        if sample.available is not None and sample.available < needed:
+            overload = f"{sample.available // 1024} MiB available"
+        elif sample.load > LOAD_HIGH:
+            overload = f"load {sample.load:.2f} per CPU"
+
+        if overload:
+            self._hold_until = now + DECREASE_HOLD
+            self._change(max(1, self._limit // 2), overload, now)
+            return
+
+        roomy = sample.available is None or sample.available > needed + self._child_rss
+        if (
+            running >= self._limit
+            and self._limit < self._max_jobs
+            and now >= self._hold_until
+            and sample.load < LOAD_LOW
+            and roomy
+        ):
+            self._change(self._limit + 1, f"load {sample.load:.2f} per CPU", now)
+
+    def _change(self, limit: int, reason: str, now: float):
+        if limit == self._limit:
+            return
+
+        decision: AdmissionDecision = {
+            "elapsed": now - self._start,
+            "previous": self._limit,
+            "limit": limit,
+            "reason": reason,
+        }
+        console.debug("Admitting", limit, "jobs,", reason)
+        logger.info("Concurrency changed", **decision)
+        self._decisions.append(decision)
+        self._limit = limit
+        self._changed = now
+
+    def report(self):
+        """Print how the limit moved during the run."""
+        if not self._adaptive:
+            return
+
+        limits = [self._initial] + [d["limit"] for d in self._decisions]
+        console.print(
+            f"Concurrency: {len(self._decisions)} adjustments between"
+            f" {min(limits)} and {max(limits)} jobs, ended at {self._limit}"
+            f" (at most {self._max_jobs})."
+        )
+        shown = self._decisions[-REPORTED_DECISIONS:]
+        if len(shown) < len(self._decisions):
+            console.print(f"  ... {len(self._decisions) - len(shown)} earlier")
+        for d in shown:
+            console.print(
+                f"  {d['elapsed']:>7.1f}s  {d['previous']:>3} -> {d['limit']:<3}"
+                f" {d['reason']}"
+            )
@@ -0,0 +1,225 @@
+from typing import List, Optional, Sequence, Tuple
+
+from ddp_validator.constants import TP04_INSTALL_HINT
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(TP04_INSTALL_HINT)
+
+# Bar/space widths of the L (odd parity) code of each digit, starting with a space.
+# R codes have the same widths starting with a bar, G codes are the reverse.
+L_WIDTHS = [
+    (3, 2, 1, 1),
+    (2, 2, 2, 1),
+    (2, 1, 2, 2),
+    (1, 4, 1, 1),
+    (1, 1, 3, 2),
+    (1, 2, 3, 1),
+    (1, 1, 1, 4),
+    (1, 3, 1, 2),
+    (1, 2, 1, 3),
+    (3, 1, 1, 2),
+]
+G_WIDTHS = [tuple(reversed(w)) for w in L_WIDTHS]
+
+# Parity of the left half ("L" or "G" per digit) encodes the first digit
+FIRST_DIGIT_PARITY = [
+    "LLLLLL",
+    "LLGLGG",
+    "LLGGLG",
+    "LLGGGL",
+    "LGLLGG",
+    "LGGLLG",
+    "LGGGLG",
+    "LGLGLG",
+    "LGLGGL",
+    "LGGLGL",
+]
+
+# start guard + 6 digits + middle guard + 6 digits + end guard
+EAN13_RUNS = 3 + 6 * 4 + 5 + 6 * 4 + 3
+EAN13_MODULES = 95
+
+# Maximum average deviation, in modules, for a digit to be accepted
+MAX_DIGIT_ERROR = 0.45
+
+
+def check_digit(number: str) -> str:
+    """Calculate the EAN check digit of a number without its check digit."""
+    total = sum((3, 1)[i % 2] * int(n) for i, n in enumerate(reversed(number)))
+    return str((10 - total) % 10)
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return image.astype(np.float32)
+
+    # Drop alpha channel, then use luminance of RGB
+    rgb = image[..., :3].astype(np.float32)
+    return rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def threshold(row: np.ndarray) -> Optional[np.ndarray]:
+    """Binarize a scanline, True being a bar. None if there is no contrast."""
+    low, high = float(row.min()), float(row.max())
+    if high - low < 32:
+        return None
+
+    return row < (low + high) / 2
+
+
+def run_lengths(bars: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Run-length encode a binary scanline.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Value and length of each run.
+    """
+    change = np.flatnonzero(bars[1:] != bars[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [len(bars)]))
+    return bars[starts], ends - starts
+
+
+def match_digit(
+    widths: np.ndarray, patterns: Sequence[Tuple[int, ...]]
+) -> Tuple[int, float]:
+    """Find the digit whose pattern is closest to the given four run widths."""
+    modules = widths * (7 / widths.sum())
+    errors = [float(np.abs(modules - np.array(p)).sum()) for p in patterns]
+    digit = int(np.argmin(errors))
+    return digit, errors[digit] / 4
+
+
+def is_guard(widths: np.ndarray, module: float) -> bool:
+    return bool(np.all(np.abs(widths / module - 1) < 0.5))
+
+
+def decode_runs(widths: np.ndarray) -> Optional[str]:
+    """Decode EAN-13 from exactly EAN13_RUNS run widths starting with a bar."""
+    module = widths.sum() / EAN13_MODULES
+    if not (is_guard(widths[:3], module) and is_guard(widths[-3:], module)):
+        return None
+    if not is_guard(widths[27:32], module):
+        return None
+
+    parity = ""
+    digits: List[int] = []
+    for i in range(6):
+        start = 3 + i * 4
+        end = start + 4
+        digit_widths = widths[start:end]
+        l_digit, l_error = match_digit(digit_widths, L_WIDTHS)
+        g_digit, g_error = match_digit(digit_widths, G_WIDTHS)
+        if min(l_error, g_error) > MAX_DIGIT_ERROR:
+            return None
+
+        if l_error <= g_error:
+            parity += "L"
+            digits.append(l_digit)
+        else:
+            parity += "G"
+            digits.append(g_digit)
+
+    for i in range(6):
+        start = 32 + i * 4
+        end = start + 4
+        digit_widths = widths[start:end]
+        digit, error = match_digit(digit_widths, L_WIDTHS)
+        if error > MAX_DIGIT_ERROR:
+            return None
+        digits.append(digit)
+
+    if parity not in FIRST_DIGIT_PARITY:
+        return None
+
+    code = str(FIRST_DIGIT_PARITY.index(parity)) + "".join(map(str, digits))
+    if check_digit(code[:-1]) != code[-1]:
+        return None
+
+    return code
+
+
+def decode_scanline(bars: np.ndarray) -> Optional[str]:
+    values, lengths = run_lengths(bars)
+    for start in range(len(values) - EAN13_RUNS + 1):
+        # Barcode starts with a bar following the quiet zone
+        if not values[start] or (start > 0 and lengths[start - 1] < lengths[start]):
+            continue
+
+        end = start + EAN13_RUNS
+        code = decode_runs(lengths[start:end].astype(np.float64))
+        if code:
+            return code
+
+    return None
+
+
+def decode_ean13(image: np.ndarray, scanlines: int = 15) -> Optional[str]:
+    """Decode an EAN-13 barcode from an in-memory image.
+
+    Scans several rows across the image, binarizes each around its
+    mid-gray level and decodes the bar widths, in both directions.
+
+    Args:
+        image (np.ndarray): Grayscale (H, W) or RGB(A) (H, W, C) image.
+        scanlines (int): Number of rows to try.
+
+    Returns:
+        Optional[str]: 13-digit code with valid check digit, or None.
+    """
+    gray = to_grayscale(np.asarray(image))
+    height = gray.shape[0]
+
+    rows = np.linspace(0, height - 1, num=min(scanlines, height)).astype(int)
+    # Try rows from the middle outwards, that's where the bars usually are
+    for y in sorted(set(rows.tolist()), key=lambda r: abs(r - height // 2)):
+        bars = threshold(gray[y])
+        if bars is None:
+            continue
+
+        code = decode_scanline(bars) or decode_scanline(bars[::-1])
+        if code:
+            return code
+
+    return None
+
+
+def encode_ean13(
+    code: str, module_width: int = 2, height: int = 50, quiet_zone: int = 9
+) -> np.ndarray:
+    """Render an EAN-13 barcode as a grayscale image, black bars on white.
+
+    Args:
+        code (str): 12 or 13 digits, check digit is computed if missing.
+        module_width (int): Width of a single module in pixels.
+        height (int): Height of the image in pixels.
+        quiet_zone (int): Blank modules on each side.
+
+    Returns:
+        np.ndarray: Image of shape (height, width) with dtype uint8.
+    """
+    if len(code) == 12:
+        code += check_digit(code)
+    if len(code) != 13 or not code.isdigit():
+        raise ValueError("EAN-13 code must consist of 12 or 13 digits.")
+
+    widths: List[int] = [1, 1, 1]
+    parity = FIRST_DIGIT_PARITY[int(code[0])]
+    for digit, p in zip(code[1:7], parity):
+        widths.extend((L_WIDTHS if p == "L" else G_WIDTHS)[int(digit)])
+    widths.extend([1, 1, 1, 1, 1])
+    for digit in code[7:]:
+        widths.extend(L_WIDTHS[int(digit)])
+    widths.extend([1, 1, 1])
+
+    # Start guard begins with a bar; left digits start with a space
+    modules = [0] * quiet_zone
+    bar = True
+    for w in widths:
+        modules.extend([1 if bar else 0] * w)
+        bar = not bar
+    modules.extend([0] * quiet_zone)
+
+    row = np.where(np.repeat(modules, module_width) == 1, 0, 255).astype(np.uint8)
+    return np.tile(row, (height, 1))
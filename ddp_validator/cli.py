@@ -1,13 +1,55 @@
 import argparse
 import os
+from functools import partial
 from pathlib import Path
 import traceback
-import requests
+from typing import Callable, Dict, List, Optional
 
-from ddp_validator.constants import BASE_RESOURCES_URL, IS_FROZEN
-from ddp_validator.online import fetch_update, load_classifiers
-from ddp_validator.tester import InputTester
-from ddp_validator.utils import console, get_classifier, get_program
+from ddp_validator.admission import AdmissionController, parse_jobs
+from ddp_validator.constants import IS_FROZEN
+from ddp_validator.compileserver import set_enabled
+from ddp_validator.complexity import run_complexity_tests
+from ddp_validator.online import (
+    data_dir,
+    download_data_files,
+    fetch_update,
+    load_classifiers,
+    load_suite,
+)
+from ddp_validator.ordering import (
+    history_key,
+    load_history,
+    order_tests,
+    update_history,
+)
+from ddp_validator.sharding import (
+    defer_timings,
+    load_timings,
+    parse_shard,
+    shard_tests,
+    suite_key,
+    update_timings,
+)
+from ddp_validator.stress import run_stress_tests
+from ddp_validator.journal import (
+    JOURNAL_DIR,
+    Journal,
+    case_hash,
+    journal_key,
+    program_hash,
+    settings_hash,
+)
+from ddp_validator.launch import LAUNCH_PROFILES, parse_profile
+from ddp_validator.profiling import DEFAULT_TOP
+from ddp_validator.tester import InputTester, parse_suite
+from ddp_validator.timeouts import (
+    calibrate_reference,
+    load_calibration,
+    save_calibration,
+    update_calibration,
+)
+from ddp_validator.types import Test, TestResult
+from ddp_validator.utils import console, get_classifier, get_program, logger
 from rich.panel import Panel
 from rich.text import Text
 
@@ -33,11 +75,79 @@ def cli():
     parser = argparse.ArgumentParser(description="Lab Tester.")
     parser.add_argument("code", help="Lab codename")
     parser.add_argument("--debug", action=argparse.BooleanOptionalAction)
+    parser.add_argument("--log-file", help="Append debug events as JSON lines")
     parser.add_argument("--ignore-error", "-i", action=argparse.BooleanOptionalAction)
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="Only run shard i out of N (i/N), balanced by previous durations",
+    )
+    parser.add_argument(
+        "--declared-order",
+        action=argparse.BooleanOptionalAction,
+        help="Run tests in declared order instead of previously failing first",
+    )
+    parser.add_argument(
+        "--max-failures", type=int, help="Stop after this many failed tests"
+    )
+    parser.add_argument(
+        "--stress",
+        type=int,
+        nargs="?",
+        const=0,
+        metavar="COUNT",
+        help="Stress generator test cases with COUNT generated inputs each",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=parse_jobs,
+        help="Programs to run at once, or 'auto' to adapt to the load of the machine",
+    )
+    parser.add_argument(
+        "--calibrate",
+        action=argparse.BooleanOptionalAction,
+        help="Time the reference solution to derive time limits of tests",
+    )
+    parser.add_argument(
+        "--compile-server",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Compile Java programs in a long-lived JVM instead of javac",
+    )
+    parser.add_argument(
+        "--resume",
+        action=argparse.BooleanOptionalAction,
+        help="Reuse results journaled by the previous run of unchanged tests",
+    )
+    parser.add_argument(
+        "--complexity",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Measure growth of running time in complexity test cases",
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        nargs="?",
+        const=DEFAULT_TOP,
+        metavar="TOP",
+        help="Profile each test and show its TOP hot functions",
+    )
+    parser.add_argument(
+        "--launch",
+        type=parse_profile,
+        help=f"Launch profile overriding the suite, one of {', '.join(LAUNCH_PROFILES)}."
+        " The fast profile starts programs quicker but skips Python user"
+        " site-packages and only uses the quick Java JIT, which slows down"
+        " long computations",
+    )
     args = parser.parse_args()
 
     console.set_debug(args.debug)
-    orig_cwd = os.getcwd()
+    if args.log_file:
+        logger.open(args.log_file)
+    set_enabled(args.compile_server)
     test_dir = Path(args.code)
     program_path = get_program(test_dir).absolute()
 
@@ -46,51 +156,197 @@ def cli():
     if not test_classification:
         raise Exception("Cannot decide which task.")
 
-    inputs_path = Path("data") / test_classification["path"]
-
     if IS_FROZEN:
-        try:
-            console.print(
-                "[white on blue]NOTICE:[/white on blue]", "Fetching test data..."
-            )
-            r = requests.get(BASE_RESOURCES_URL + "/" + test_classification["path"])
-            if r.status_code != 200:
-                console.print(
-                    "[white on red]ERROR:[/white on red]",
-                    "GitHub returns non-200 status code.",
-                )
-                return
-        except Exception:
-            console.print(
-                "[white on red]ERROR:[/white on red]",
-                "Cannot fetch test data from GitHub!",
-            )
-            return
-
-        console.rule("Test Start")
-        console.print("Task:", test_classification["name"])
-        tests = InputTester.from_str(
-            str(program_path.resolve()),
-            r.text,
-            args.ignore_error,
-        )
+        console.print("[white on blue]NOTICE:[/white on blue]", "Fetching test data...")
     else:
         console.print(
             "[white on blue]NOTICE:[/white on blue]",
             "Develepment mode, using local test data.",
         )
 
-        console.rule("Test Start")
-        console.print("Task:", test_classification["name"])
-        tests = InputTester.from_file(
-            str(program_path.resolve()),
-            str(inputs_path.resolve()),
-            args.ignore_error,
+    suite = load_suite(test_classification["path"])
+    if suite is None:
+        return
+
+    console.rule("Test Start")
+    console.print("Task:", test_classification["name"])
+    tests = load_tester(args, program_path, test_classification["path"], suite)
+    if tests is None:
+        return
+
+    calibrate(tests, test_classification["path"], args.calibrate)
+    jobs = args.jobs
+    controller = None if jobs is None else AdmissionController.for_jobs(jobs)
+
+    if args.stress is not None:
+        try:
+            run_stress_tests(tests, args.stress, controller)
+            console.rule("Test End")
+        except KeyboardInterrupt:
+            pass
+    else:
+        run(
+            tests,
+            args,
+            test_dir,
+            test_classification["path"],
+            str(program_path),
+            controller,
         )
 
+    input("Press enter to exit.")
+
+
+def load_tester(
+    args: argparse.Namespace, program_path: Path, suite_path: str, suite: str
+) -> Optional[InputTester]:
+    """Tester of a program with its suite, None if data files are missing."""
+    suite_dir = None
+    if not IS_FROZEN:
+        suite_dir = str((Path("data") / suite_path).parent.resolve())
+
+    parsed = parse_suite(suite, suite_dir, str(data_dir(suite_path)))
+    if args.launch:
+        parsed = parsed._replace(launch=args.launch)
+
+    tests = InputTester.from_suite(
+        str(program_path.resolve()),
+        parsed,
+        args.ignore_error,
+        suite_dir=suite_dir,
+    )
+    if not download_data_files(tests.tests, suite_path, tests.complexity_cases):
+        return None
+    if args.profile is not None:
+        tests.enable_profiling(args.profile)
+    return tests
+
+
+def calibrate(tests: InputTester, suite_path: str, measure: bool):
+    """Apply calibrated time limits, timing the reference first if measure."""
+    key = suite_key(suite_path)
+    calibration = load_calibration(key)
+    if measure and tests.reference is None:
+        console.print(
+            "[on yellow]WARN:[/on yellow]",
+            "Suite has no reference, time limits are calibrated from passing runs.",
+        )
+    elif measure:
+        console.print("Calibrating time limits with reference...")
+        calibration.update(calibrate_reference(tests))
+        save_calibration(key, calibration)
+        console.print("Calibrated.")
+
+    tests.calibrate(calibration)
+
+
+def select_tests(
+    tests: InputTester, args: argparse.Namespace, suite_path: str
+) -> List[Test]:
+    if not args.shard:
+        return tests.tests
+
+    index, count = args.shard
+    timings = load_timings(suite_key(suite_path))
+    selected = shard_tests(tests.tests, index, count, timings)
+    console.print(
+        "[white on blue]NOTICE:[/white on blue]",
+        f"Running shard {index + 1}/{count} with {len(selected)} tests",
+        f"(estimated {sum(timings.get(t.title, 0) for t in selected):.1f}s).",
+    )
+    return selected
+
+
+def journal_keys(
+    tests: InputTester, selected: List[Test], program_path: str
+) -> Dict[str, str]:
+    """Journal key of each selected test by title."""
+    program = program_hash(program_path)
+    settings = settings_hash(
+        tests.only_stdout,
+        tests.launch,
+        tests.reference.hash if tests.reference else None,
+    )
+    return {t.title: journal_key(program, settings, case_hash(t)) for t in selected}
+
+
+def record_result(
+    journal: Journal, keys: Dict[str, str], program_path: str, result: TestResult
+):
+    journal.record(keys[result["title"]], program_path, result)
+
+
+def journaled_results(journal: Journal, keys: Dict[str, str]) -> Dict[str, TestResult]:
+    """Results of the previous run by title, for tests whose key still matches."""
+    previous: Dict[str, TestResult] = {}
+    for title, key in keys.items():
+        result = journal.get(key)
+        if result is not None:
+            previous[title] = result
+    if previous:
+        console.print(
+            "[white on blue]NOTICE:[/white on blue]",
+            f"Reusing {len(previous)} results of the previous run.",
+        )
+    return previous
+
+
+def run(
+    tests: InputTester,
+    args: argparse.Namespace,
+    test_dir: Path,
+    suite_path: str,
+    program_path: str,
+    controller: Optional[AdmissionController] = None,
+):
+    if tests.generators:
+        console.print(
+            "[white on blue]NOTICE:[/white on blue]",
+            f"Skipping {len(tests.generators)} generator tests, use --stress to run them.",
+        )
+
+    if controller and tests.profiling:
+        console.print(
+            "[on yellow]WARN:[/on yellow]",
+            "Profiled tests run one at a time.",
+        )
+        controller = None
+
+    selected = select_tests(tests, args, suite_path)
+    submission_key = history_key(program_path, suite_path)
+    if not args.declared_order:
+        selected = order_tests(selected, load_history(submission_key))
+
+    # Profiled runs are slowed down, their results must not be resumed from.
+    # Not even opened, as a fresh journal would drop the last real run.
+    journal = None
+    previous: Dict[str, TestResult] = {}
+    on_result: Optional[Callable[[TestResult], None]] = None
+    if not tests.profiling:
+        journal = Journal(JOURNAL_DIR / f"{submission_key}.jsonl", args.resume)
+        keys = journal_keys(tests, selected, program_path)
+        previous = journaled_results(journal, keys)
+        on_result = partial(record_result, journal, keys, program_path)
+
+    orig_cwd = os.getcwd()
     try:
         os.chdir(test_dir)
-        tests.run_tests()
+        results = tests.run_tests(
+            selected,
+            args.max_failures,
+            previous,
+            on_result,
+            controller,
+        )
+        if not tests.profiling:
+            # Profiled durations would skew time limits and shard balancing
+            record_timings = defer_timings if args.shard else update_timings
+            record_timings(suite_key(suite_path), results)
+            update_calibration(suite_key(suite_path), results)
+        update_history(submission_key, results)
+        if tests.complexity_cases and args.complexity:
+            console.rule("Complexity")
+            run_complexity_tests(tests)
         console.rule("Test End")
     except KeyboardInterrupt:
         pass
@@ -100,9 +356,11 @@ def cli():
             "[white on blue]TIP:[/white on blue]",
             "Use --debug to see what is going on.",
         )
+    finally:
+        if journal:
+            journal.close()
 
     os.chdir(orig_cwd)
-    input("Press enter to exit.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+import atexit
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Tuple
+
+from ddp_validator.constants import CACHE_DIR
+from ddp_validator.types import CompileResult
+from ddp_validator.utils import console, source_files
+
+SERVER_DIR = CACHE_DIR / "compile-server"
+CLASSES_DIR = CACHE_DIR / "classes"
+# Written into a classes directory once it is complete
+COMPLETE_MARKER = ".complete"
+
+# Reads one request per line: id, output directory, source path and the
+# sources to compile, separated by tabs. Answers each with a line of id,
+# "ok" or "error" and the length of the diagnostics that follow it.
+SERVER_SOURCE = """\
+import java.io.*;
+import java.nio.charset.StandardCharsets;
+import java.util.*;
+import javax.tools.*;
+
+public class CompileServer {
+    public static void main(String[] args) throws IOException {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            System.err.println("No Java compiler found, is this a JDK?");
+            System.exit(1);
+        }
+
+        StandardJavaFileManager fileManager =
+            compiler.getStandardFileManager(null, null, StandardCharsets.UTF_8);
+        BufferedReader in = new BufferedReader(
+            new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        OutputStream out = new BufferedOutputStream(System.out);
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            String[] fields = line.split("\\t");
+            StringWriter diagnostics = new StringWriter();
+            boolean ok;
+            try {
+                new File(fields[1]).mkdirs();
+                List<File> sources = new ArrayList<>();
+                for (int i = 3; i < fields.length; i++) {
+                    sources.add(new File(fields[i]));
+                }
+
+                List<String> options = Arrays.asList(
+                    "-d", fields[1], "-sourcepath", fields[2]);
+                ok = compiler.getTask(
+                    diagnostics,
+                    fileManager,
+                    null,
+                    options,
+                    null,
+                    fileManager.getJavaFileObjectsFromFiles(sources)
+                ).call();
+            } catch (RuntimeException e) {
+                diagnostics.write(e.toString());
+                ok = false;
+            }
+
+            byte[] data = diagnostics.toString().getBytes(StandardCharsets.UTF_8);
+            String header = fields[0] + "\\t" + (ok ? "ok" : "error") + "\\t"
+                + data.length + "\\n";
+            out.write(header.getBytes(StandardCharsets.UTF_8));
+            out.write(data);
+            out.flush();
+        }
+    }
+}
+"""
+
+
+def source_hash(program: Path) -> str:
+    """Hash of the Java sources under a program's directory, which javac
+    may compile through -sourcepath."""
+    h = hashlib.sha256()
+    for path in source_files(program):
+        h.update(path.relative_to(program.parent).as_posix().encode() + b"\0")
+        h.update(path.read_bytes() + b"\0")
+    return h.hexdigest()
+
+
+def can_compile(program: Path) -> bool:
+    # Paths are sent tab separated, one request per line
+    return not any(c in str(program.parent.absolute()) for c in "\t\r\n")
+
+
+def build_server() -> Path:
+    """Compile the compile server itself, once per version of it.
+
+    Returns:
+        Path: Directory containing CompileServer.class.
+    """
+    target = SERVER_DIR / hashlib.sha256(SERVER_SOURCE.encode()).hexdigest()[:16]
+    if (target / "CompileServer.class").exists():
+        return target
+
+    console.debug("Building compile server in", str(target))
+    tmp = Path(f"{target}.{os.getpid()}.tmp")
+    tmp.mkdir(parents=True, exist_ok=True)
+    with open(tmp / "CompileServer.java", "w") as f:
+        f.write(SERVER_SOURCE)
+
+    process = subprocess.run(
+        ["javac", "-d", str(tmp), str(tmp / "CompileServer.java")],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    if process.returncode != 0:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise Exception(
+            "Cannot build compile server!\r\n\r\n" + process.stdout.decode()
+        )
+
+    publish(tmp, target)
+    return target
+
+
+def publish(tmp: Path, target: Path):
+    """Move a finished directory in place, unless someone else was faster."""
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def server_command() -> List[str]:
+    return ["java", "-cp", str(build_server()), "CompileServer"]
+
+
+class CompileServer:
+    """Compiles Java programs in a long-lived JVM using javax.tools.
+
+    Every program is compiled into its own directory under CLASSES_DIR,
+    keyed by the hash of its sources, so a program that was compiled before
+    by any tester is not compiled again. Requests are pipelined: any number
+    of them can be waiting while the JVM works through them in order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process: Optional["subprocess.Popen[bytes]"] = None
+        self._reader: Optional[threading.Thread] = None
+        # Request id -> (temporary directory, classes directory, result)
+        self._pending: Dict[int, Tuple[Path, Path, "Future[CompileResult]"]] = {}
+        self._next_id = 0
+
+    def _start(self) -> "subprocess.Popen[bytes]":
+        if self._process and self._process.poll() is None:
+            return self._process
+
+        console.debug("Starting compile server")
+        self._process = subprocess.Popen(
+            server_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._reader = threading.Thread(
+            target=self._read_responses,
+            args=(self._process.stdout,),
+            name="compile-server",
+            daemon=True,
+        )
+        self._reader.start()
+        return self._process
+
+    def submit(self, program: str) -> "Future[CompileResult]":
+        """Queue a program for compilation, along with its sibling sources."""
+        path = Path(program).absolute()
+        target = CLASSES_DIR / source_hash(path)
+        future: "Future[CompileResult]" = Future()
+        if (target / COMPLETE_MARKER).exists():
+            console.debug("Using cached classes of", program)
+            future.set_result({"classes": str(target), "ok": True, "diagnostics": ""})
+            return future
+
+        with self._lock:
+            process = self._start()
+            assert process.stdin
+
+            request_id = self._next_id
+            self._next_id += 1
+            tmp = Path(f"{target}.{os.getpid()}-{request_id}.tmp")
+            self._pending[request_id] = (tmp, target, future)
+
+            fields = [str(request_id), str(tmp), str(path.parent), str(path)]
+            process.stdin.write(("\t".join(fields) + "\n").encode())
+            process.stdin.flush()
+
+        return future
+
+    def compile(self, program: str) -> CompileResult:
+        return self.submit(program).result()
+
+    def compile_many(self, programs: List[str]) -> List[CompileResult]:
+        """Compile programs in one batch, in the order given."""
+        futures = [self.submit(program) for program in programs]
+        return [future.result() for future in futures]
+
+    def _read_responses(self, stdout: IO[bytes]):
+        while True:
+            header = stdout.readline()
+            if not header:
+                break
+
+            request_id, status, length = header.decode().split("\t")
+            diagnostics = stdout.read(int(length)).decode(errors="replace")
+            with self._lock:
+                tmp, target, future = self._pending.pop(int(request_id))
+
+            if status == "ok":
+                (tmp / COMPLETE_MARKER).touch()
+                publish(tmp, target)
+            else:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+            future.set_result(
+                {
+                    "classes": str(target),
+                    "ok": status == "ok",
+                    "diagnostics": diagnostics,
+                }
+            )
+
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for _, _, future in pending:
+            future.set_exception(Exception("Compile server exited unexpectedly."))
+
+    def close(self):
+        with self._lock:
+            process = self._process
+            self._process = None
+        if process is None:
+            return
+
+        assert process.stdin
+        process.stdin.close()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if self._reader:
+            self._reader.join()
+
+
+_server: Optional[CompileServer] = None
+_server_lock = threading.Lock()
+_enabled = True
+
+
+def set_enabled(value: bool):
+    """Whether Java programs are compiled by the shared compile server."""
+    global _enabled
+    _enabled = value
+
+
+def shared_server() -> Optional[CompileServer]:
+    """Compile server shared by every tester in the process, if enabled."""
+    global _server
+    if not _enabled:
+        return None
+
+    with _server_lock:
+        if _server is None:
+            _server = CompileServer()
+            atexit.register(_server.close)
+        return _server
@@ -0,0 +1,163 @@
+import os
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+from typing import IO, List, Optional, Sequence, Tuple
+
+from ddp_validator.growth import MODELS, fit_models, pick_model
+from ddp_validator.tester import InputTester, failed, success
+from ddp_validator.types import ComplexityCase, ComplexityResult
+from ddp_validator.utils import console, iter_data_chunks
+
+
+def cpu_time(
+    args: Sequence[str], stdin: IO[bytes], cwd: Optional[str], timeout: float
+) -> float:
+    """Run a program to completion and return the CPU seconds it used.
+
+    Falls back to wall-clock time where os.wait4 is not available.
+
+    Raises:
+        Exception: If the program errored or timed out.
+    """
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            args, stdin=stdin, stdout=subprocess.DEVNULL, stderr=stderr, cwd=cwd
+        )
+        killed = threading.Event()
+
+        def kill():
+            killed.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            if hasattr(os, "wait4"):
+                _, status, usage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                seconds = usage.ru_utime + usage.ru_stime
+            else:
+                process.wait()
+                seconds = time.perf_counter() - start
+        finally:
+            timer.cancel()
+
+        if killed.is_set():
+            raise Exception(f"Program timed out after {timeout:g}s")
+
+        stderr.seek(0)
+        error = stderr.read()
+        if process.returncode != 0 or error:
+            raise Exception("Program errored!\r\n\r\n" + error.decode())
+
+    return seconds
+
+
+def write_input(tester: InputTester, case: ComplexityCase, index: int, f: IO[bytes]):
+    """Write the input of the index-th size into a file."""
+    if case["generator"]:
+        size = case["sizes"][index]
+        cmd = case["generator"].format_map({"seed": case["seed"], "size": size})
+        process = subprocess.run(
+            shlex.split(cmd),
+            stdout=f,
+            stderr=subprocess.PIPE,
+            cwd=tester.suite_dir,
+        )
+        if process.returncode != 0:
+            raise Exception("Generator errored!\r\n\r\n" + process.stderr.decode())
+    else:
+        for chunk in iter_data_chunks(case["inputs"][index]):
+            f.write(chunk)
+
+    f.seek(0)
+
+
+def measure(tester: InputTester, case: ComplexityCase) -> List[float]:
+    """Fastest CPU time of the program at each size of a case."""
+    command = tester.get_command()
+    timeout = tester.timeouts.default
+    times: List[float] = []
+    for i, size in enumerate(case["sizes"]):
+        status = console.status(f"Measuring {case['title']} at n={size}...")
+        with status, tempfile.TemporaryFile() as stdin:
+            write_input(tester, case, i, stdin)
+            runs: List[float] = []
+            try:
+                for _ in range(case["repeat"]):
+                    stdin.seek(0)
+                    runs.append(cpu_time(command, stdin, tester.workdir, timeout))
+            except Exception as e:
+                raise Exception(f"At n={size}: {e}")
+
+        console.debug("CPU time at", size, "is", min(runs))
+        times.append(min(runs))
+
+    return times
+
+
+def run_complexity(tester: InputTester, case: ComplexityCase) -> ComplexityResult:
+    """Measure how the CPU time of a program grows and check it against a bound.
+
+    The program runs repeat times at each size and the fastest run counts, so
+    hiccups of the machine do not inflate the measurement. Times are then
+    fitted against every growth model, and the simplest model that fits
+    about as well as the best one is the verdict.
+    """
+    result: ComplexityResult = {
+        "title": case["title"],
+        "passed": False,
+        "times": [],
+        "model": None,
+        "message": "",
+    }
+    try:
+        result["times"] = measure(tester, case)
+    except Exception as e:
+        result["message"] = str(e)
+        return result
+
+    errors = fit_models(case["sizes"], result["times"])
+    console.debug("Fit errors of", case["title"], errors)
+    model = pick_model(errors, case["tolerance"])
+    result["model"] = model
+
+    order = list(MODELS)
+    result["passed"] = order.index(model) <= order.index(case["bound"])
+    if not result["passed"]:
+        result["message"] = f"Grows like O({model}), expected O({case['bound']})"
+    return result
+
+
+def format_complexity(result: ComplexityResult, bound: str) -> str:
+    line = f"{result['title']:<20} : "
+    if result["passed"]:
+        return line + f"{success} (O({result['model']}), bound O({bound}))"
+    return line + f"{failed} {result['message']}"
+
+
+def print_times(case: ComplexityCase, result: ComplexityResult):
+    for size, seconds in zip(case["sizes"], result["times"]):
+        console.print(f"  n={size:<12} {seconds:.3f}s")
+
+
+def run_complexity_tests(
+    tester: InputTester,
+) -> List[Tuple[ComplexityCase, ComplexityResult]]:
+    tester.run_compile()
+    results: List[Tuple[ComplexityCase, ComplexityResult]] = []
+    try:
+        for case in tester.complexity_cases:
+            result = run_complexity(tester, case)
+            console.print(format_complexity(result, case["bound"]))
+            if not result["passed"]:
+                print_times(case, result)
+            results.append((case, result))
+    finally:
+        tester.cleanup()
+
+    return results
@@ -1,5 +1,21 @@
+import os
 import sys
+from pathlib import Path
 
 BASE_RESOURCES_URL = "https://raw.githubusercontent.com/rorre/DDPValidator/main/data"
 GITHUB_URL = "https://api.github.com/repos/rorre/DDPValidator/releases/latest"
 IS_FROZEN = getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS")
+CACHE_DIR = Path(
+    os.environ.get("DDP_VALIDATOR_CACHE", Path.home() / ".cache" / "ddp_validator")
+)
+TP04_INSTALL_HINT = (
+    "TP04 checks need extra packages, install them with:"
+    " pip install 'DDP-Validator[tp04]'"
+)
+COMPLEXITY_INSTALL_HINT = (
+    "Complexity checks need NumPy, install it with:"
+    " pip install 'DDP-Validator[complexity]'"
+)
+STORE_INSTALL_HINT = (
+    "Result stores need NumPy, install it with:" " pip install 'DDP-Validator[store]'"
+)
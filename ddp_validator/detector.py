@@ -0,0 +1,135 @@
+import time
+from typing import Callable, List, Optional, Tuple
+
+from ddp_validator.constants import TP04_INSTALL_HINT
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    raise ImportError(TP04_INSTALL_HINT)
+
+Rect = Tuple[int, int, int, int]
+
+# Needle is never downscaled below this many pixels on either side
+MIN_NEEDLE_SIZE = 12
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    """Convert RGB(A) or grayscale image to 8-bit grayscale."""
+    image = np.asarray(image)
+    if image.ndim == 3 and image.shape[2] == 4:
+        image = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+    elif image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return image.astype(np.uint8)
+
+
+def pyramid_levels(needle: np.ndarray, max_levels: int) -> int:
+    levels = 0
+    h, w = needle.shape[:2]
+    while levels < max_levels and min(h, w) // 2 >= MIN_NEEDLE_SIZE:
+        h, w = h // 2, w // 2
+        levels += 1
+    return levels
+
+
+def match_template(
+    haystack: np.ndarray,
+    needle: np.ndarray,
+    threshold: float = 0.9,
+    max_levels: int = 2,
+) -> Optional[Rect]:
+    """Locate needle in haystack with normalized cross-correlation.
+
+    The search is first done on downscaled copies of both images, then
+    refined at full resolution around the best coarse match only.
+
+    Args:
+        haystack (np.ndarray): Image to search in.
+        needle (np.ndarray): Image to search for.
+        threshold (float): Minimum correlation to accept a match.
+        max_levels (int): Maximum number of pyramid levels to downscale.
+
+    Returns:
+        Optional[Rect]: (left, top, width, height) of the match, if any.
+    """
+    haystack = to_gray(haystack)
+    needle = to_gray(needle)
+    nh, nw = needle.shape
+    if haystack.shape[0] < nh or haystack.shape[1] < nw:
+        return None
+
+    levels = pyramid_levels(needle, max_levels)
+    small_haystack, small_needle = haystack, needle
+    for _ in range(levels):
+        small_haystack = cv2.pyrDown(small_haystack)
+        small_needle = cv2.pyrDown(small_needle)
+
+    scores = cv2.matchTemplate(small_haystack, small_needle, cv2.TM_CCOEFF_NORMED)
+    _, _, _, (x, y) = cv2.minMaxLoc(scores)
+
+    # Refine around the coarse match, allowing for rounding of each level
+    scale = 2**levels
+    margin = 2 * scale
+    left = max(0, x * scale - margin)
+    top = max(0, y * scale - margin)
+    right = min(haystack.shape[1], x * scale + nw + margin)
+    bottom = min(haystack.shape[0], y * scale + nh + margin)
+
+    window = haystack[top:bottom, left:right]
+    scores = cv2.matchTemplate(window, needle, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (x, y) = cv2.minMaxLoc(scores)
+    if score < threshold:
+        return None
+
+    return (left + x, top + y, nw, nh)
+
+
+def wait_for_template(
+    grab: Callable[[], np.ndarray],
+    needle: np.ndarray,
+    timeout: float,
+    interval: float = 0.02,
+    threshold: float = 0.9,
+) -> Optional[Rect]:
+    """Poll grabbed images until needle shows up or the deadline passes.
+
+    Args:
+        grab (Callable[[], np.ndarray]): Returns the current image of the region.
+        needle (np.ndarray): Image to search for.
+        timeout (float): Seconds to wait at most.
+        interval (float): Seconds to wait between grabs.
+        threshold (float): Minimum correlation to accept a match.
+
+    Returns:
+        Optional[Rect]: Location of the match in grabbed image, if any.
+    """
+    needle = to_gray(needle)
+    deadline = time.monotonic() + timeout
+    while True:
+        rect = match_template(grab(), needle, threshold)
+        if rect is not None:
+            return rect
+
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(interval)
+
+
+def find_boxes(image: np.ndarray) -> List[Rect]:
+    """Find rectangular outlines in an image, sorted from top to bottom."""
+    _, thresh = cv2.threshold(to_gray(image), 240, 255, cv2.THRESH_BINARY_INV)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
+
+    rects: List[Rect] = []
+    for contour in contours:
+        # Approximate number of sides in contours
+        sides = cv2.approxPolyDP(contour, 0.01 * cv2.arcLength(contour, True), True)
+        # Not a rectangle, so whatever
+        if len(sides) != 4:
+            continue
+        rects.append(tuple(cv2.boundingRect(sides)))  # type: ignore
+
+    rects.sort(key=lambda x: x[1])
+    return rects
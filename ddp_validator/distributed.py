@@ -0,0 +1,826 @@
+import argparse
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import requests
+
+from ddp_validator.compileserver import set_enabled
+from ddp_validator.fingerprint import fingerprint, group_duplicates
+from ddp_validator.journal import (
+    JOURNAL_DIR,
+    Journal,
+    case_hash,
+    journal_key,
+    settings_hash,
+)
+from ddp_validator.online import load_classifiers, load_suite
+from ddp_validator.tester import InputTester, format_result, parse_suite
+from ddp_validator.types import Submission, TestResult, WorkUnit
+from ddp_validator.utils import (
+    console,
+    get_classifier,
+    get_program,
+    logger,
+    source_files,
+)
+
+if TYPE_CHECKING:
+    from ddp_validator.results import ResultStore
+
+DEFAULT_PORT = 8765
+# Shared secret of the coordinator and its workers, unless given by --token
+TOKEN_ENV = "DDP_VALIDATOR_TOKEN"
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def sibling_sources(program_path: Path) -> Dict[str, str]:
+    """Other sources a program may use by path relative to it, see source_files."""
+    return {
+        path.relative_to(program_path.parent).as_posix(): path.read_text()
+        for path in source_files(program_path)
+        if path != program_path
+    }
+
+
+def write_submission(submission: Submission, directory: Path) -> Path:
+    """Write a submission with its sibling sources, as workers receive it.
+
+    The coordinator compiles from the same files, so both find the classes
+    of a submission under the same hash in the compile cache.
+
+    Returns:
+        Path: Path of the program.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, source in submission["siblings"].items():
+        (directory / name).parent.mkdir(parents=True, exist_ok=True)
+        (directory / name).write_text(source)
+    program_path = directory / submission["filename"]
+    program_path.write_text(submission["source"])
+    return program_path
+
+
+class Coordinator:
+    """Hands out (submission, test case) work units to workers and
+    aggregates their results.
+
+    Units leased by a worker that stops sending heartbeats are put back
+    into the queue once their lease expires. Units with a result from an
+    earlier run are never handed out.
+    """
+
+    def __init__(
+        self,
+        submissions: List[Submission],
+        lease_timeout: float = 30.0,
+        max_attempts: int = 3,
+        completed: Optional[Dict[int, TestResult]] = None,
+        on_result: Optional[Callable[[WorkUnit, TestResult], None]] = None,
+    ):
+        self._submissions = submissions
+        self._lease_timeout = lease_timeout
+        self._max_attempts = max_attempts
+        self._on_result = on_result
+        self._results: Dict[int, TestResult] = dict(completed or {})
+
+        self._units: List[WorkUnit] = []
+        self._pending: Dict[int, Deque[int]] = {}
+        for i, s in enumerate(submissions):
+            self._pending[i] = deque()
+            for title in s["titles"]:
+                unit: WorkUnit = {
+                    "id": len(self._units),
+                    "submission": i,
+                    "title": title,
+                }
+                self._units.append(unit)
+                if unit["id"] not in self._results:
+                    self._pending[i].append(unit["id"])
+
+        self._leases: Dict[int, Tuple[str, float]] = {}
+        self._attempts: Dict[int, int] = {}
+        self._affinity: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if len(self._results) == len(self._units):
+            self._done.set()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def submission(self, idx: int) -> Submission:
+        return self._submissions[idx]
+
+    def lease(self, worker: str) -> Optional[WorkUnit]:
+        """Lease next unit to a worker, preferring the submission it has
+        already compiled.
+
+        Args:
+            worker (str): Worker identifier.
+
+        Returns:
+            Optional[WorkUnit]: Leased unit, or None if nothing is pending.
+        """
+        with self._lock:
+            idx = self._affinity.get(worker)
+            if idx is None or not self._pending[idx]:
+                candidates = [i for i, q in self._pending.items() if q]
+                if not candidates:
+                    return None
+
+                # Spread workers across submissions with the most work left
+                idx = max(candidates, key=lambda i: len(self._pending[i]))
+
+            unit_id = self._pending[idx].popleft()
+            self._affinity[worker] = idx
+            self._leases[unit_id] = (worker, time.monotonic() + self._lease_timeout)
+            self._attempts[unit_id] = self._attempts.get(unit_id, 0) + 1
+            console.debug("Leased unit", unit_id, "to", worker)
+            return self._units[unit_id]
+
+    def heartbeat(self, worker: str, unit_ids: List[int]):
+        with self._lock:
+            deadline = time.monotonic() + self._lease_timeout
+            for unit_id in unit_ids:
+                lease = self._leases.get(unit_id)
+                if lease and lease[0] == worker:
+                    self._leases[unit_id] = (worker, deadline)
+
+    def complete(self, worker: str, unit_id: int, result: TestResult):
+        with self._lock:
+            if unit_id in self._results:
+                console.debug("Ignoring duplicate result for unit", unit_id)
+                return
+
+            self._leases.pop(unit_id, None)
+            self._results[unit_id] = result
+            console.debug("Unit", unit_id, "completed by", worker)
+            if self._on_result:
+                self._on_result(self._units[unit_id], result)
+            if len(self._results) == len(self._units):
+                self._done.set()
+
+    def reap(self):
+        """Put units whose lease has expired back into the queue."""
+        now = time.monotonic()
+        with self._lock:
+            for unit_id, (worker, deadline) in list(self._leases.items()):
+                if deadline > now:
+                    continue
+
+                del self._leases[unit_id]
+                unit = self._units[unit_id]
+                if self._attempts[unit_id] >= self._max_attempts:
+                    console.debug("Giving up on unit", unit_id)
+                    self._results[unit_id] = {
+                        "title": unit["title"],
+                        "verdict": "error",
+                        "duration": 0.0,
+                        "message": f"Lost {self._attempts[unit_id]} times, giving up.",
+                    }
+                    if len(self._results) == len(self._units):
+                        self._done.set()
+                    continue
+
+                console.debug("Lease of unit", unit_id, "by", worker, "expired")
+                self._pending[unit["submission"]].appendleft(unit_id)
+
+    def results(self) -> List[List[TestResult]]:
+        """Collected results for each submission, in declared order."""
+        grouped: List[List[TestResult]] = [[] for _ in self._submissions]
+        for unit in self._units:
+            if unit["id"] in self._results:
+                grouped[unit["submission"]].append(self._results[unit["id"]])
+        return grouped
+
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    server: "CoordinatorServer"
+
+    def log_message(self, format: str, *args: Any):
+        console.debug(format % args)
+
+    def _send(self, status: int, data: Any = None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _authorized(self) -> bool:
+        """Check the token of the request, answering 401 if it is wrong."""
+        token = self.server.token
+        if token is None:
+            return True
+
+        given = self.headers.get("Authorization", "")
+        if hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+            return True
+
+        self.close_connection = True
+        self._send(401)
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+
+        coordinator = self.server.coordinator
+        if self.path.startswith("/submission/"):
+            try:
+                idx = int(self.path.rsplit("/", 1)[1])
+                self._send(200, coordinator.submission(idx))
+            except (ValueError, IndexError):
+                self._send(404)
+            return
+
+        self._send(404)
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+
+        coordinator = self.server.coordinator
+        data = self._read()
+
+        if self.path == "/lease":
+            if coordinator.finished:
+                self._send(410)
+                return
+
+            unit = coordinator.lease(data["worker"])
+            if unit is None:
+                self._send(204)
+            else:
+                self._send(200, unit)
+        elif self.path == "/heartbeat":
+            coordinator.heartbeat(data["worker"], data["units"])
+            self._send(200, {})
+        elif self.path == "/result":
+            coordinator.complete(data["worker"], data["unit"], data["result"])
+            self._send(200, {})
+        else:
+            self._send(404)
+
+
+class CoordinatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        coordinator: Coordinator,
+        token: Optional[str] = None,
+    ):
+        """Serve a coordinator, requiring token on every request if given.
+
+        Raises:
+            Exception: If the address is reachable from other machines, but
+                there is no token to keep others from reading submissions or
+                forging results.
+        """
+        if token is None and not is_loopback(address[0]):
+            raise Exception(
+                f"Coordinator on {address[0]} would accept anyone, set a shared"
+                f" token with --token or {TOKEN_ENV} for it and its workers."
+            )
+
+        super().__init__(address, CoordinatorHandler)
+        self.coordinator = coordinator
+        self.token = token
+
+
+class Worker:
+    """Pulls work units from a coordinator and runs them with InputTester."""
+
+    def __init__(
+        self,
+        url: str,
+        worker_id: Optional[str] = None,
+        heartbeat_interval: float = 5.0,
+        poll_interval: float = 0.5,
+        token: Optional[str] = None,
+    ):
+        self._url = url.rstrip("/")
+        self._id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._heartbeat_interval = heartbeat_interval
+        self._poll_interval = poll_interval
+        self._session = requests.Session()
+        if token:
+            self._session.headers["Authorization"] = f"Bearer {token}"
+        self._workdir = Path(tempfile.mkdtemp(prefix="ddp-worker-"))
+        self._testers: Dict[int, Union[InputTester, str]] = {}
+
+    def _tester(self, idx: int) -> Union[InputTester, str]:
+        """Get compiled tester for a submission, or the compile error."""
+        if idx in self._testers:
+            return self._testers[idx]
+
+        r = self._session.get(f"{self._url}/submission/{idx}")
+        r.raise_for_status()
+        submission: Submission = r.json()
+
+        program_path = write_submission(submission, self._workdir / str(idx))
+
+        try:
+            tester = InputTester.from_str(str(program_path), submission["suite"])
+        except Exception as e:
+            self._testers[idx] = f"Invalid suite: {e}"
+            return self._testers[idx]
+
+        try:
+            tester.run_compile()
+            self._testers[idx] = tester
+        except Exception as e:
+            self._testers[idx] = str(e)
+
+        return self._testers[idx]
+
+    def _heartbeat(self, unit_id: int, stop: threading.Event):
+        while not stop.wait(self._heartbeat_interval):
+            try:
+                self._session.post(
+                    f"{self._url}/heartbeat",
+                    json={"worker": self._id, "units": [unit_id]},
+                )
+            except requests.RequestException:
+                console.debug("Heartbeat failed for unit", unit_id)
+
+    def execute(self, unit: WorkUnit) -> TestResult:
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(unit["id"], stop), daemon=True
+        )
+        heartbeat.start()
+
+        try:
+            tester = self._tester(unit["submission"])
+            if isinstance(tester, str):
+                return {
+                    "title": unit["title"],
+                    "verdict": "error",
+                    "duration": 0.0,
+                    "message": tester,
+                }
+
+            return tester.run_test(
+                tester.get_test(unit["title"]), write_difference=False
+            )
+        except requests.ConnectionError:
+            raise
+        except Exception as e:
+            # Report it instead of dying, or the unit is leased out again
+            return {
+                "title": unit["title"],
+                "verdict": "error",
+                "duration": 0.0,
+                "message": str(e),
+            }
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    def run(self):
+        console.print("Worker", self._id, "connected to", self._url)
+        try:
+            while True:
+                r = self._session.post(f"{self._url}/lease", json={"worker": self._id})
+                if r.status_code == 410:
+                    break
+                if r.status_code == 204:
+                    time.sleep(self._poll_interval)
+                    continue
+                if r.status_code == 401:
+                    raise Exception(
+                        f"Coordinator rejected the token, set the one it uses"
+                        f" with --token or {TOKEN_ENV}."
+                    )
+
+                r.raise_for_status()
+                unit: WorkUnit = r.json()
+                result = self.execute(unit)
+                self._session.post(
+                    f"{self._url}/result",
+                    json={"worker": self._id, "unit": unit["id"], "result": result},
+                )
+        except requests.ConnectionError:
+            console.debug("Coordinator went away, exiting")
+        finally:
+            for tester in self._testers.values():
+                if isinstance(tester, InputTester):
+                    tester.close()
+            shutil.rmtree(self._workdir, ignore_errors=True)
+
+
+def check_distributable(suite: str, key: str):
+    """Make sure a suite needs nothing but its text on a worker.
+
+    Raises:
+        Exception: If the suite uses a reference program or data files.
+    """
+    try:
+        parse_suite(suite)
+    except Exception as e:
+        raise Exception(
+            f"Suite {key} cannot be distributed: {e} Workers only receive the"
+            " suite text, so suites with a reference program or data files"
+            " must be run locally."
+        )
+
+
+def collect_submissions(
+    paths: List[str], suite_path: Optional[str] = None
+) -> List[Submission]:
+    """Read submissions and their test suites.
+
+    Args:
+        paths (List[str]): Submission directories.
+        suite_path (Optional[str]): Suite to use for all submissions,
+            decided by classifier if not given.
+
+    Returns:
+        List[Submission]: Submissions that can be distributed.
+    """
+    classifiers = [] if suite_path else load_classifiers()
+    suites: Dict[str, Optional[str]] = {}
+    submissions: List[Submission] = []
+
+    for path in paths:
+        program_path = get_program(Path(path))
+        if program_path.is_dir():
+            console.print(
+                "[on yellow]WARN:[/on yellow]",
+                f"Skipping {path}, gradle projects cannot be distributed.",
+            )
+            continue
+
+        if suite_path:
+            key = suite_path
+            if key not in suites:
+                with open(suite_path, "r") as f:
+                    suites[key] = f.read()
+                check_distributable(suites[key], key)
+        else:
+            classification = get_classifier(program_path, classifiers)
+            if not classification:
+                console.print(
+                    "[on yellow]WARN:[/on yellow]",
+                    f"Skipping {path}, cannot decide which task.",
+                )
+                continue
+
+            key = classification["path"]
+            if key not in suites:
+                loaded = load_suite(key)
+                if loaded is not None:
+                    check_distributable(loaded, key)
+                suites[key] = loaded
+
+        suite = suites[key]
+        if suite is None:
+            continue
+
+        with open(program_path, "r") as f:
+            source = f.read()
+        siblings = sibling_sources(program_path)
+
+        tester = InputTester.from_str(str(program_path), suite)
+        submissions.append(
+            {
+                "name": path,
+                "filename": program_path.name,
+                "source": source,
+                "siblings": siblings,
+                "suite": suite,
+                "suite_path": key,
+                "titles": [t.title for t in tester.tests],
+                "fingerprint": fingerprint(
+                    "\n".join([source, *siblings.values()]), program_path.suffix
+                ),
+            }
+        )
+        tester.close()
+
+    return submissions
+
+
+def print_report(submissions: List[Submission], results: List[List[TestResult]]):
+    for submission, submission_results in zip(submissions, results):
+        console.rule(submission["name"])
+        for result in submission_results:
+            console.print(format_result(result))
+
+        if all(r["verdict"] == "passed" for r in submission_results):
+            console.print("All checks passed!")
+        else:
+            console.print("Some checks have failed :(")
+
+
+def fan_out(
+    groups: List[List[int]], group_results: List[List[TestResult]]
+) -> List[List[TestResult]]:
+    """Give every submission of a duplicate group the results of the group."""
+    results: List[List[TestResult]] = [[] for _ in range(sum(map(len, groups)))]
+    for group, group_result in zip(groups, group_results):
+        for i in group:
+            results[i] = group_result
+    return results
+
+
+def print_duplicates(submissions: List[Submission], groups: List[List[int]]):
+    duplicates = [g for g in groups if len(g) > 1]
+    if not duplicates:
+        return
+
+    console.rule("Duplicates")
+    for group in duplicates:
+        console.print(", ".join(submissions[i]["name"] for i in group))
+    console.print(
+        f"{sum(len(g) - 1 for g in duplicates)} submissions were duplicates",
+        f"of {len(duplicates)} others and only ran once.",
+    )
+
+
+def print_summary(store: "ResultStore"):
+    console.rule("Summary")
+    counts = store.verdict_counts()
+    console.print(", ".join(f"{count} {verdict}" for verdict, count in counts.items()))
+    suite = None
+    for case in store.case_summaries():
+        if case["suite"] != suite:
+            suite = case["suite"]
+            console.print(f"[bold]{suite}[/bold]")
+        console.print(
+            f"  {case['title']:<20} : {case['passed']}/{case['runs']} passed,",
+            f"mean {case['mean_duration']:.2f}s, p95 {case['p95_duration']:.2f}s,",
+            f"max {case['max_rss'] // 1024} MiB",
+        )
+
+
+def store_results(
+    path: str, submissions: List[Submission], results: List[List[TestResult]]
+):
+    """Append results to a result store and summarize the store."""
+    # Imported here, only result stores need NumPy
+    from ddp_validator.results import load_store
+
+    store = load_store(path)
+    for submission, submission_results in zip(submissions, results):
+        store.extend(submission["name"], submission["suite_path"], submission_results)
+    store.save(path)
+    print_summary(store)
+
+
+def precompile(submissions: List[Submission]):
+    """Compile submissions in one batch, so local workers find them compiled.
+
+    Only programs the compile server can cache are worth compiling here.
+    Submissions are written out the way workers write them, so the sources
+    hash the same on both sides.
+    """
+    with tempfile.TemporaryDirectory(prefix="ddp-precompile-") as tempdir:
+        testers = [
+            InputTester.from_str(
+                str(write_submission(s, Path(tempdir) / str(i))), s["suite"]
+            )
+            for i, s in enumerate(submissions)
+        ]
+        java = [t for t in testers if t.compile_server()]
+        if java:
+            console.print(f"Compiling {len(java)} Java submissions...")
+            errors = InputTester.compile_all(java)
+            console.print(
+                f"Compiled, {sum(e is not None for e in errors)} failed to compile."
+            )
+
+        for t in testers:
+            t.close()
+
+
+def unit_keys(submissions: List[Submission]) -> List[str]:
+    """Journal key of every work unit, in the order the coordinator makes them."""
+    keys: List[str] = []
+    for s in submissions:
+        program = hashlib.sha256(f"{s['filename']}\0{s['source']}".encode())
+        for name, source in sorted(s["siblings"].items()):
+            program.update(f"\0{name}\0{source}".encode())
+
+        # Suites with a reference program are never distributed
+        suite = parse_suite(s["suite"])
+        settings = settings_hash(suite.only_stdout, suite.launch, None)
+        cases = {t.title: case_hash(t) for t in suite.tests}
+        keys += [
+            journal_key(program.hexdigest(), settings, cases[title])
+            for title in s["titles"]
+        ]
+    return keys
+
+
+def journaled_coordinator(
+    unique: List[Submission], journal: Journal, args: argparse.Namespace
+) -> Coordinator:
+    """Coordinator that records every result and skips already journaled units."""
+    keys = unit_keys(unique)
+    completed: Dict[int, TestResult] = {}
+    for i, key in enumerate(keys):
+        result = journal.get(key)
+        if result is not None:
+            completed[i] = result
+    if completed:
+        console.print(
+            "[white on blue]NOTICE:[/white on blue]",
+            f"Reusing {len(completed)} results of the previous run.",
+        )
+
+    def on_result(unit: WorkUnit, result: TestResult):
+        name = unique[unit["submission"]]["name"]
+        journal.record(keys[unit["id"]], name, result)
+
+    return Coordinator(
+        unique, args.lease_timeout, args.max_attempts, completed, on_result
+    )
+
+
+def run_coordinator(args: argparse.Namespace):
+    submissions = collect_submissions(args.submissions, args.suite)
+    if args.dedupe:
+        # Identical programs with the same suite only need to run once
+        keys = [(s["fingerprint"], s["suite"]) for s in submissions]
+        groups = group_duplicates(keys)
+    else:
+        groups = [[i] for i in range(len(submissions))]
+
+    unique = [submissions[g[0]] for g in groups]
+    if args.local_workers:
+        precompile(unique)
+
+    journal = Journal(Path(args.journal), args.resume)
+    coordinator = journaled_coordinator(unique, journal, args)
+
+    server = CoordinatorServer((args.host, args.port), coordinator, args.token)
+    host, port = server.server_address[:2]
+    url = f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    console.print(
+        "[white on blue]NOTICE:[/white on blue]",
+        f"Coordinator listening on {url} with {sum(len(s['titles']) for s in unique)}"
+        " work units.",
+    )
+
+    # Passed in the environment, command lines can be read by other users
+    env = dict(os.environ)
+    if args.token:
+        env[TOKEN_ENV] = args.token
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "ddp_validator.distributed"]
+            + (["--debug"] if args.debug else [])
+            + ([] if args.compile_server else ["--no-compile-server"])
+            + ["worker", url],
+            env=env,
+        )
+        for _ in range(args.local_workers)
+    ]
+
+    try:
+        while not coordinator.wait(1.0):
+            coordinator.reap()
+    except KeyboardInterrupt:
+        console.print("[on yellow]WARN:[/on yellow]", "Interrupted, partial results.")
+    finally:
+        # Give workers a chance to see that everything is done
+        for w in workers:
+            try:
+                w.wait(5)
+            except subprocess.TimeoutExpired:
+                w.kill()
+        server.shutdown()
+        server.server_close()
+        journal.close()
+
+    results = fan_out(groups, coordinator.results())
+    print_report(submissions, results)
+    print_duplicates(submissions, groups)
+
+    if args.store:
+        store_results(args.store, submissions, results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {s["name"]: r for s, r in zip(submissions, results)},
+                f,
+                indent=2,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed Lab Tester.")
+    parser.add_argument("--debug", action=argparse.BooleanOptionalAction)
+    parser.add_argument("--log-file", help="Append debug events as JSON lines")
+    parser.add_argument(
+        "--compile-server",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Compile Java programs in a shared long-lived JVM instead of javac",
+    )
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator")
+    coordinator_parser.add_argument("submissions", nargs="+", help="Submission dirs")
+    coordinator_parser.add_argument("--suite", help="Suite to use for all submissions")
+    coordinator_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on, other than loopback it needs a token",
+    )
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument("--local-workers", type=int, default=0)
+    coordinator_parser.add_argument("--lease-timeout", type=float, default=30.0)
+    coordinator_parser.add_argument("--max-attempts", type=int, default=3)
+    coordinator_parser.add_argument("--output", "-o", help="Write results as JSON")
+    coordinator_parser.add_argument(
+        "--dedupe",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run submissions that only differ in formatting and comments once",
+    )
+    coordinator_parser.add_argument(
+        "--store", help="Append results to a columnar result store, needs NumPy"
+    )
+    coordinator_parser.add_argument(
+        "--journal",
+        default=str(JOURNAL_DIR / "coordinator.jsonl"),
+        help="Journal of completed work units",
+    )
+    coordinator_parser.add_argument(
+        "--resume",
+        action=argparse.BooleanOptionalAction,
+        help="Skip work units journaled by the previous run for unchanged inputs",
+    )
+
+    worker_parser = subparsers.add_parser("worker")
+    worker_parser.add_argument("url", help="Coordinator URL")
+    worker_parser.add_argument("--id", help="Worker identifier")
+    for subparser in (coordinator_parser, worker_parser):
+        subparser.add_argument(
+            "--token",
+            default=os.environ.get(TOKEN_ENV),
+            help=f"Shared secret of coordinator and workers, defaults to ${TOKEN_ENV}",
+        )
+
+    args = parser.parse_args()
+    console.set_debug(args.debug)
+    if args.log_file:
+        logger.open(args.log_file)
+    set_enabled(args.compile_server)
+
+    if args.mode == "coordinator":
+        run_coordinator(args)
+    else:
+        Worker(args.url, args.id, token=args.token).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import atexit
+import json
+import queue
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+from rich.console import Console
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+# Higher than any level, nothing is logged
+DISABLED = 100
+
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+# Records are written at most this many at a time
+BATCH_SIZE = 512
+# Seconds to wait for more records before writing a batch
+FLUSH_INTERVAL = 0.1
+
+# time, level, message arguments, structured fields
+Record = Tuple[float, int, Tuple[Any, ...], Dict[str, Any]]
+
+
+class EventLogger:
+    """Structured event log written by a background thread.
+
+    Logging only checks the level and queues the arguments; formatting,
+    writing JSON lines to the log file and echoing to the console all happen
+    on the writer thread, in batches. Console echo is rate limited so a
+    chatty program cannot slow the run down by flooding the terminal.
+    """
+
+    def __init__(self, console: Console, echo_rate: float = 50):
+        self._console = console
+        self._echo_rate = echo_rate
+        self._echo_level = DISABLED
+        self._file_level = DISABLED
+        self._level = DISABLED
+        self._file: Optional[IO[str]] = None
+        self._queue: "queue.SimpleQueue[Union[Record, threading.Event]]" = (
+            queue.SimpleQueue()
+        )
+        self._thread: Optional[threading.Thread] = None
+        self._tokens = echo_rate
+        self._refilled = time.monotonic()
+        self._suppressed = 0
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def set_echo(self, enabled: bool, level: int = DEBUG):
+        """Echo records of at least level to the console."""
+        self._echo_level = level if enabled else DISABLED
+        self._update_level()
+
+    def open(self, path: str, level: int = DEBUG):
+        """Append records of at least level to a JSON lines file."""
+        self.flush()
+        if self._file:
+            self._file.close()
+
+        self._file = open(path, "a", encoding="utf-8")
+        self._file_level = level
+        self._update_level()
+
+    def _update_level(self):
+        self._level = min(self._echo_level, self._file_level)
+        if self._level < DISABLED and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="eventlog", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def log(self, level: int, /, *args: Any, **fields: Any):
+        """Queue a record, message is only formatted if it gets written.
+
+        Args:
+            level (int): Level of the record.
+            *args (Any): Message parts, joined by spaces.
+            **fields (Any): Structured data stored under "fields" of the record.
+        """
+        if level < self._level:
+            return
+        self._queue.put((time.time(), level, args, fields))
+
+    def debug(self, *args: Any, **fields: Any):
+        self.log(DEBUG, *args, **fields)
+
+    def info(self, *args: Any, **fields: Any):
+        self.log(INFO, *args, **fields)
+
+    def warning(self, *args: Any, **fields: Any):
+        self.log(WARNING, *args, **fields)
+
+    def error(self, *args: Any, **fields: Any):
+        self.log(ERROR, *args, **fields)
+
+    def flush(self, timeout: float = 5):
+        """Wait until every queued record has been written."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._file_level = DISABLED
+        self._update_level()
+
+    def _run(self):
+        while True:
+            batch: List[Record] = []
+            flushed: List[threading.Event] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while True:
+                if isinstance(item, threading.Event):
+                    # Flush requested, write what we have right away
+                    flushed.append(item)
+                    break
+
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= BATCH_SIZE or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                # Logging must never take the run down with it
+                self._console.print("[on yellow]WARN:[/on yellow]", "Log failed:", e)
+
+            for done in flushed:
+                done.set()
+
+    def _write(self, batch: List[Record]):
+        if self._file:
+            lines = [
+                self._serialize(record)
+                for record in batch
+                if record[1] >= self._file_level
+            ]
+            if lines:
+                self._file.write("".join(lines))
+                self._file.flush()
+
+        for record in batch:
+            if record[1] >= self._echo_level:
+                self._echo(record)
+
+    def _serialize(self, record: Record) -> str:
+        timestamp, level, args, fields = record
+        data = {
+            "time": round(timestamp, 6),
+            "level": LEVEL_NAMES.get(level, str(level)),
+            "message": " ".join(str(a) for a in args),
+        }
+        # Nested so a field named like a key above cannot overwrite it
+        if fields:
+            data["fields"] = fields
+        return json.dumps(data, default=str) + "\n"
+
+    def _echo(self, record: Record):
+        now = time.monotonic()
+        self._tokens = min(
+            self._echo_rate, self._tokens + (now - self._refilled) * self._echo_rate
+        )
+        self._refilled = now
+        if self._tokens < 1:
+            self._suppressed += 1
+            return
+
+        self._tokens -= 1
+        if self._suppressed:
+            self._console.print(
+                f"[dim]({self._suppressed} log messages not shown)[/dim]"
+            )
+            self._suppressed = 0
+
+        timestamp, _, args, fields = record
+        clock = time.strftime("%H:%M:%S", time.localtime(timestamp))
+        parts = [f"{k}={v}" for k, v in fields.items()]
+        self._console.print(f"[dim]{clock}[/dim]", *args, *parts)
@@ -0,0 +1,104 @@
+import hashlib
+import io
+import re
+import tokenize
+from pathlib import Path
+from typing import Dict, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Text blocks, strings and chars are matched first so comment markers inside
+# them are left alone; comments themselves are dropped.
+JAVA_TOKEN = re.compile(
+    r'(?P<text>"""[\s\S]*?""")'
+    r'|(?P<string>"(?:\\.|[^"\\\n])*")'
+    r"|(?P<char>'(?:\\.|[^'\\\n])*')"
+    r"|(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)"
+    r"|(?P<word>[A-Za-z_$][\w$]*|\d[\w.]*)"
+    r"|(?P<space>\s+)"
+    r"|(?P<symbol>.)"
+)
+
+PYTHON_SKIPPED = {
+    tokenize.COMMENT,
+    tokenize.NL,
+    tokenize.ENCODING,
+    tokenize.ENDMARKER,
+}
+
+
+def python_tokens(source: str) -> List[str]:
+    """Tokens of Python source without comments and blank lines.
+
+    Indentation is kept as INDENT and DEDENT tokens, since it is part of the
+    program, but its width is not.
+    """
+    tokens: List[str] = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type in PYTHON_SKIPPED:
+                continue
+            if token.type == tokenize.INDENT:
+                tokens.append("<INDENT>")
+            elif token.type == tokenize.DEDENT:
+                tokens.append("<DEDENT>")
+            elif token.type == tokenize.NEWLINE:
+                tokens.append("<NEWLINE>")
+            else:
+                tokens.append(token.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # Not valid Python, only whitespace can be ignored safely
+        return source.split()
+
+    return tokens
+
+
+def java_tokens(source: str) -> List[str]:
+    """Tokens of Java source without comments and whitespace."""
+    return [
+        m.group()
+        for m in JAVA_TOKEN.finditer(source)
+        if m.lastgroup not in ("comment", "space")
+    ]
+
+
+def fingerprint(source: str, suffix: str) -> str:
+    """Hash of a program that ignores formatting and comments.
+
+    Args:
+        source (str): Program source code.
+        suffix (str): File extension, deciding how the source is tokenized.
+
+    Returns:
+        str: Fingerprint, equal for programs differing only in whitespace
+            and comments.
+    """
+    if suffix == ".py":
+        tokens = python_tokens(source)
+    elif suffix == ".java":
+        tokens = java_tokens(source)
+    else:
+        tokens = [source]
+
+    h = hashlib.sha256(suffix.encode())
+    for token in tokens:
+        h.update(b"\0" + token.encode())
+    return h.hexdigest()
+
+
+def fingerprint_file(path: Path) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return fingerprint(f.read(), path.suffix)
+
+
+def group_duplicates(keys: Sequence[T]) -> List[List[int]]:
+    """Group indices of equal keys, in order of first appearance.
+
+    Returns:
+        List[List[int]]: Indices of each distinct key, the first one being
+            the representative that gets executed.
+    """
+    groups: Dict[T, List[int]] = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
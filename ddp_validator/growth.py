@@ -0,0 +1,71 @@
+import math
+from typing import Callable, Dict, Sequence
+
+from ddp_validator.constants import COMPLEXITY_INSTALL_HINT
+
+# Growth models from slowest to fastest growing
+MODELS: Dict[str, Callable[[float], float]] = {
+    "1": lambda n: 1.0,
+    "log n": lambda n: math.log2(max(n, 1)),
+    "n": lambda n: n,
+    "n log n": lambda n: n * math.log2(max(n, 1)),
+    "n^2": lambda n: n**2,
+    "n^3": lambda n: n**3,
+}
+# Fit errors below this many seconds are measurement noise
+NOISE_FLOOR = 0.005
+
+
+def parse_bound(value: str) -> str:
+    """Normalize a complexity bound like "O(n log n)" or "nlogn" to a model."""
+    key = value.strip().lower()
+    if key.startswith("o(") and key.endswith(")"):
+        key = key[2:-1]
+    key = key.replace(" ", "").replace("²", "^2").replace("³", "^3")
+
+    for model in MODELS:
+        if model.replace(" ", "") == key:
+            return model
+
+    raise ValueError(
+        f"Unknown complexity bound '{value}', expected one of"
+        f" {', '.join(f'O({m})' for m in MODELS)}."
+    )
+
+
+def fit_models(sizes: Sequence[int], times: Sequence[float]) -> Dict[str, float]:
+    """Fit times = a + b * f(n) for every model, with b >= 0.
+
+    Returns:
+        Dict[str, float]: Root mean squared error of each model in seconds.
+    """
+    # Imported here, suites only need NumPy once they measure complexity
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError(COMPLEXITY_INSTALL_HINT)
+
+    t = np.array(times, dtype=float)
+    errors: Dict[str, float] = {}
+    for name, f in MODELS.items():
+        x = np.array([f(n) for n in sizes], dtype=float)
+        prediction = np.full_like(t, t.mean())
+        if np.ptp(x) > 0:
+            b, a = np.polyfit(x, t, 1)
+            if b > 0:
+                prediction = a + b * x
+        errors[name] = float(np.sqrt(np.mean((t - prediction) ** 2)))
+    return errors
+
+
+def pick_model(errors: Dict[str, float], tolerance: float) -> str:
+    """Simplest model that fits almost as well as the best one.
+
+    Preferring simpler models gives the program the benefit of the doubt
+    when measurements are too noisy to tell growth rates apart.
+    """
+    best = min(errors.values())
+    for name, error in errors.items():
+        if error <= best * (1 + tolerance) + NOISE_FLOOR:
+            return name
+    raise AssertionError("Best model always fits")
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from ddp_validator.constants import CACHE_DIR
+from ddp_validator.reference import file_hash
+from ddp_validator.types import Test, TestResult
+from ddp_validator.utils import source_files
+
+JOURNAL_DIR = CACHE_DIR / "journal"
+
+# Records are synced to disk after this many have been written...
+SYNC_EVERY = 32
+# ...or after this many seconds, whichever comes first
+SYNC_INTERVAL = 1.0
+# Directories of gradle projects that do not affect their behavior
+IGNORED_DIRS = {"build", ".gradle"}
+
+
+def program_hash(path: str) -> str:
+    """Hash of a program and its sibling sources, or of a project directory.
+
+    Sources under the directory of a program file in its language may be
+    imported or compiled along with it, see source_files. Files of a project
+    are identified by size and modification time, which is enough to notice
+    edits without reading the whole project.
+    """
+    h = hashlib.sha256()
+    if not os.path.isdir(path):
+        program = Path(path)
+        h.update(f"{program.name}\0".encode())
+        for source in source_files(program):
+            relative = source.relative_to(program.parent).as_posix()
+            h.update(f"{relative}\0{file_hash(str(source))}\0".encode())
+        return h.hexdigest()
+
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+        for name in sorted(files):
+            stat = os.stat(os.path.join(root, name))
+            relative = os.path.relpath(os.path.join(root, name), path)
+            h.update(f"{relative}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return h.hexdigest()
+
+
+def case_hash(t: Test) -> str:
+    """Hash of everything that decides the verdict of a test."""
+    h = hashlib.sha256(repr(t).encode())
+    for path in (t.stdin_file, t.stdout_file):
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            h.update(f"\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def settings_hash(only_stdout: bool, launch: str, reference: Optional[str]) -> str:
+    """Hash of suite-level settings that decide the verdict of every test.
+
+    Args:
+        only_stdout (bool): Whether only stdout is compared.
+        launch (str): Launch profile of the program.
+        reference (Optional[str]): Hash of the reference program, if any.
+    """
+    return hashlib.sha256(f"{only_stdout}\0{launch}\0{reference}".encode()).hexdigest()
+
+
+def journal_key(program: str, settings: str, case: str) -> str:
+    return hashlib.sha256(f"{program}\0{settings}\0{case}".encode()).hexdigest()
+
+
+def load_journal(path: Path) -> Dict[str, TestResult]:
+    """Results recorded in a journal by key, the latest one winning.
+
+    A record cut short by a crash is ignored.
+    """
+    results: Dict[str, TestResult] = {}
+    if not path.exists():
+        return results
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            results[record["key"]] = record["result"]
+    return results
+
+
+def ends_with_newline(path: Path) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class Journal:
+    """Append-only record of completed test results.
+
+    Every result is written as a JSON line as soon as it is known. Syncing
+    to disk is batched, so journaling costs little even for fast tests, and
+    at most SYNC_INTERVAL seconds of work is lost if the machine goes down.
+    Closing the journal, also on Ctrl-C, syncs whatever is left.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self._path = path
+        self._completed = load_journal(path) if resume else {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced = time.monotonic()
+
+        os.makedirs(path.parent, exist_ok=True)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if self._file.tell() and not ends_with_newline(path):
+            # Keep the next record off the line a crash cut short
+            self._file.write("\n")
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def get(self, key: str) -> Optional[TestResult]:
+        """Result recorded before resuming, if any."""
+        return self._completed.get(key)
+
+    def record(self, key: str, submission: str, result: TestResult):
+        line = json.dumps({"key": key, "submission": submission, "result": result})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._unsynced += 1
+            if (
+                self._unsynced >= SYNC_EVERY
+                or time.monotonic() - self._synced >= SYNC_INTERVAL
+            ):
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
@@ -0,0 +1,87 @@
+import compileall
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+from ddp_validator.utils import console
+
+LAUNCH_PROFILES = ("default", "fast")
+
+# Skip user site-packages. Not -E, PYTHONIOENCODING and PYTHONUTF8 decide
+# how programs read and print non-ASCII text
+PYTHON_FAST_FLAGS = ("-s",)
+# Only use the quick JIT, share class data, and keep JVM logging out of stdout
+JAVA_FAST_FLAGS = ("-XX:TieredStopAtLevel=1", "-Xshare:auto", "-Xlog:disable")
+
+ARCHIVE_NAME = "app.jsa"
+# Seconds the training run that creates a class data archive may take
+ARCHIVE_TIMEOUT = 10
+
+
+def parse_profile(value: str) -> str:
+    if value not in LAUNCH_PROFILES:
+        raise ValueError(
+            f"Unknown launch profile '{value}', expected one of"
+            f" {', '.join(LAUNCH_PROFILES)}."
+        )
+    return value
+
+
+def python_flags(profile: str) -> Tuple[str, ...]:
+    return PYTHON_FAST_FLAGS if profile == "fast" else ()
+
+
+def java_flags(profile: str, classes: Optional[str]) -> Tuple[str, ...]:
+    """Flags of a Java launch, using the class data archive if there is one."""
+    if profile != "fast":
+        return ()
+
+    if classes and (Path(classes) / ARCHIVE_NAME).exists():
+        archive = Path(classes) / ARCHIVE_NAME
+        return (*JAVA_FAST_FLAGS, f"-XX:SharedArchiveFile={archive}")
+    return JAVA_FAST_FLAGS
+
+
+def create_archive(classes: str, main_class: str):
+    """Create an AppCDS archive of a compiled program, unless it exists.
+
+    The program is run once without input, from an empty directory, and the
+    classes it loads are dumped when it exits. Later runs map them from the
+    archive instead of loading them again. Programs that cannot be archived,
+    or JDKs older than 13, simply run without one.
+    """
+    archive = Path(classes) / ARCHIVE_NAME
+    if archive.exists():
+        return
+
+    console.debug("Creating class data archive of", main_class)
+    tmp = archive.with_name(f"{ARCHIVE_NAME}.{os.getpid()}.tmp")
+    with tempfile.TemporaryDirectory(prefix="ddp-archive-") as cwd:
+        try:
+            subprocess.run(
+                [
+                    "java",
+                    *JAVA_FAST_FLAGS,
+                    f"-XX:ArchiveClassesAtExit={tmp}",
+                    "-cp",
+                    classes,
+                    main_class,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                cwd=cwd,
+                timeout=ARCHIVE_TIMEOUT,
+            )
+        except subprocess.TimeoutExpired:
+            console.debug("Program did not exit, not archiving it.")
+
+    if tmp.exists():
+        tmp.replace(archive)
+
+
+def precompile_python(workdir: str):
+    """Compile modules next to the program to bytecode ahead of the first run."""
+    compileall.compile_dir(workdir, maxlevels=0, quiet=1)
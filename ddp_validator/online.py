@@ -1,11 +1,21 @@
 import json
-from typing import List, Tuple
+import os
+import posixpath
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
 import requests
 
 from ddp_validator import __version__
-from ddp_validator.constants import BASE_RESOURCES_URL, GITHUB_URL, IS_FROZEN
+from ddp_validator.constants import (
+    BASE_RESOURCES_URL,
+    CACHE_DIR,
+    GITHUB_URL,
+    IS_FROZEN,
+)
 from ddp_validator.utils import console, parse_version
-from ddp_validator.types import Classification
+from ddp_validator.types import Classification, ComplexityCase, Test
+
+DATA_DIR = CACHE_DIR / "data"
 
 
 def load_classifiers() -> List[Classification]:
@@ -38,6 +48,101 @@ def load_classifiers() -> List[Classification]:
     return classifiers
 
 
+def load_suite(path: str) -> Optional[str]:
+    """Load test suite content, from GitHub when frozen or local test data otherwise.
+
+    Args:
+        path (str): Path of the suite relative to data directory.
+
+    Returns:
+        Optional[str]: Suite content, or None if it cannot be fetched.
+    """
+    if not IS_FROZEN:
+        with open(Path("data") / path, "r") as f:
+            return f.read()
+
+    try:
+        r = requests.get(BASE_RESOURCES_URL + "/" + path)
+        if r.status_code != 200:
+            console.print(
+                "[white on red]ERROR:[/white on red]",
+                "GitHub returns non-200 status code.",
+            )
+            return None
+    except Exception:
+        console.print(
+            "[white on red]ERROR:[/white on red]",
+            "Cannot fetch test data from GitHub!",
+        )
+        return None
+
+    return r.text
+
+
+def data_dir(suite_path: str) -> Path:
+    """Directory that data files of a suite are resolved against."""
+    if IS_FROZEN:
+        return DATA_DIR / posixpath.dirname(suite_path)
+    return (Path("data") / suite_path).parent.resolve()
+
+
+def download_data_files(
+    tests: List[Test],
+    suite_path: str,
+    complexity_cases: Sequence[ComplexityCase] = (),
+) -> bool:
+    """Download data files used by tests that are not cached yet.
+
+    Files are streamed to disk, so large data sets are never held in memory.
+
+    Args:
+        tests (List[Test]): Tests whose data files should be available.
+        suite_path (str): Path of the suite relative to data directory.
+        complexity_cases (Sequence[ComplexityCase]): Complexity cases whose
+            inputs should be available.
+
+    Returns:
+        bool: Whether all data files are available.
+    """
+    if not IS_FROZEN:
+        return True
+
+    base = data_dir(suite_path)
+    url_base = BASE_RESOURCES_URL + "/" + posixpath.dirname(suite_path)
+    paths = [p for t in tests for p in (t.stdin_file, t.stdout_file) if p]
+    paths += [p for case in complexity_cases for p in case["inputs"]]
+    for path in paths:
+        if os.path.exists(path):
+            continue
+
+        name = Path(path).relative_to(base).as_posix()
+        tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with console.status(f"Downloading {name}..."):
+                with requests.get(url_base + "/" + name, stream=True) as r:
+                    if r.status_code != 200:
+                        console.print(
+                            "[white on red]ERROR:[/white on red]",
+                            "GitHub returns non-200 status code.",
+                        )
+                        return False
+
+                    with open(tmp_path, "wb") as f:
+                        for chunk in r.iter_content(65536):
+                            f.write(chunk)
+        except Exception:
+            console.print(
+                "[white on red]ERROR:[/white on red]",
+                f"Cannot fetch {name} from GitHub!",
+            )
+            return False
+
+        os.replace(tmp_path, path)
+
+    return True
+
+
 def fetch_update():
     if not IS_FROZEN:
         console.print(
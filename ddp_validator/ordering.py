@@ -0,0 +1,51 @@
+import hashlib
+from typing import Dict, List
+
+from ddp_validator.constants import CACHE_DIR
+from ddp_validator.types import CaseHistory, Test, TestResult
+from ddp_validator.utils import load_json, save_json
+
+HISTORY_DIR = CACHE_DIR / "history"
+
+
+def history_key(program_path: str, suite: str) -> str:
+    return hashlib.sha1(f"{program_path}\0{suite}".encode()).hexdigest()
+
+
+def load_history(key: str) -> Dict[str, CaseHistory]:
+    return load_json(HISTORY_DIR / f"{key}.json", {})
+
+
+def update_history(key: str, results: List[TestResult]):
+    """Record failures and durations of a run for a submission."""
+    history = load_history(key)
+    for r in results:
+        history[r["title"]] = {
+            "failed": r["verdict"] != "passed",
+            "duration": r["duration"],
+        }
+
+    save_json(HISTORY_DIR / f"{key}.json", history)
+
+
+def order_tests(tests: List[Test], history: Dict[str, CaseHistory]) -> List[Test]:
+    """Schedule tests so failures are found as early as possible.
+
+    Tests that failed last time come first, then tests without history,
+    then tests that passed. Each group runs fastest first.
+
+    Args:
+        tests (List[Test]): Tests in declared order.
+        history (Dict[str, CaseHistory]): Previous verdicts of the submission.
+
+    Returns:
+        List[Test]: Tests in execution order.
+    """
+
+    def key(i: int):
+        h = history.get(tests[i].title)
+        if h is None:
+            return (1, 0.0, i)
+        return (0 if h["failed"] else 2, h["duration"], i)
+
+    return [tests[i] for i in sorted(range(len(tests)), key=key)]
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ddp_validator.constants import TP04_INSTALL_HINT
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    raise ImportError(TP04_INSTALL_HINT)
+
+from ddp_validator.barcode import decode_ean13
+from ddp_validator.types import PostscriptResult
+
+MANIFEST_NAME = "manifest.json"
+# Ghostscript executables Pillow may use to rasterize PostScript
+GHOSTSCRIPT_BINARIES = ("gswin32c", "gswin64c", "gs")
+
+
+def has_ghostscript() -> bool:
+    return any(shutil.which(binary) for binary in GHOSTSCRIPT_BINARIES)
+
+
+def verify_postscript(path: str, expected: str, scale: int = 2) -> PostscriptResult:
+    """Rasterize a PostScript file and check the barcode it contains.
+
+    Args:
+        path (str): Path to .eps/.ps file, other image formats work too.
+        expected (str): Expected 13-digit code.
+        scale (int): Rasterization scale for PostScript files.
+
+    Returns:
+        PostscriptResult: Verdict and timing of the file.
+    """
+    start = time.perf_counter()
+    decoded: Optional[str] = None
+    message = ""
+    try:
+        with Image.open(path) as im:
+            if im.format == "EPS":
+                im.load(scale=scale)
+            decoded = decode_ean13(np.array(im.convert("L")))
+    except Exception as e:
+        message = str(e)
+
+    return {
+        "path": path,
+        "expected": expected,
+        "decoded": decoded,
+        "passed": decoded == expected,
+        "duration": time.perf_counter() - start,
+        "message": message,
+    }
+
+
+def verify_postscript_batch(
+    items: List[Tuple[str, str]], jobs: Optional[int] = None
+) -> List[PostscriptResult]:
+    """Verify many (path, expected code) pairs concurrently.
+
+    Returns:
+        List[PostscriptResult]: Results in the same order as items.
+    """
+    if not items:
+        return []
+
+    with ProcessPoolExecutor(jobs or os.cpu_count()) as executor:
+        return list(
+            executor.map(
+                verify_postscript,
+                [path for path, _ in items],
+                [expected for _, expected in items],
+            )
+        )
+
+
+def write_manifest(directory: Path, items: List[Tuple[str, str]]):
+    with open(directory / MANIFEST_NAME, "w") as f:
+        json.dump({Path(path).name: expected for path, expected in items}, f)
+
+
+def load_manifest(directory: Path) -> List[Tuple[str, str]]:
+    """Find files to verify and their expected codes.
+
+    Uses manifest.json (file name to code) if present, otherwise every
+    .eps/.ps file named after its 13-digit code.
+    """
+    manifest_path = directory / MANIFEST_NAME
+    if manifest_path.exists():
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        return [(str(directory / name), code) for name, code in manifest.items()]
+
+    return [
+        (str(p), p.stem)
+        for p in sorted(directory.iterdir())
+        if p.suffix.lower() in (".eps", ".ps")
+        and len(p.stem) == 13
+        and p.stem.isdigit()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch PostScript barcode checker.")
+    parser.add_argument("directory", help="Directory of PostScript files")
+    parser.add_argument("--jobs", "-j", type=int, help="Parallel processes to use")
+    args = parser.parse_args()
+
+    items = load_manifest(Path(args.directory))
+    if not items:
+        print("No PostScript files found.")
+        return
+
+    start = time.perf_counter()
+    results = verify_postscript_batch(items, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    for r in results:
+        verdict = "OK    " if r["passed"] else "FAILED"
+        print(
+            f"{verdict} {Path(r['path']).name:<24} expected={r['expected']}",
+            f"decoded={r['decoded']} ({r['duration']:.2f}s)",
+            r["message"],
+        )
+
+    passed = sum(r["passed"] for r in results)
+    print(f"{passed}/{len(results)} passed in {elapsed:.2f}s.")
+    sys.exit(0 if passed == len(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import json
+import pstats
+import shutil
+import subprocess
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ddp_validator.types import HotFunction
+from ddp_validator.utils import console
+
+# Hot functions shown next to a verdict when no count is given
+DEFAULT_TOP = 5
+# Profiled programs run slower, so their time limits are stretched by this
+PROFILE_SLOWDOWN = 2.0
+# Seconds jfr may take to decode a recording
+JFR_PRINT_TIMEOUT = 30
+
+PROFILE_SUFFIXES = {"python": ".prof", "java": ".jfr"}
+# Samples of running Java code, and of Java code blocked in native calls
+# such as reading stdin, which is where stalled interactive programs wait
+JFR_EVENTS = "jdk.ExecutionSample,jdk.NativeMethodSample"
+
+
+def can_profile(language: str) -> bool:
+    return language in PROFILE_SUFFIXES
+
+
+def profile_command(
+    language: str, command: Tuple[str, ...], path: str
+) -> Tuple[str, ...]:
+    """Wrap the launch command of a program to record a profile at path."""
+    if language == "python":
+        # python [flags] program -> python [flags] -m cProfile -o path program
+        return (*command[:-1], "-m", "cProfile", "-o", path, command[-1])
+    if language == "java":
+        return (
+            command[0],
+            f"-XX:StartFlightRecording=filename={path},settings=profile,"
+            "dumponexit=true",
+            # JFR announces the recording on stdout otherwise
+            "-Xlog:jfr+startup=warning",
+            *command[1:],
+        )
+    raise Exception(f"Cannot profile {language} programs")
+
+
+def python_hot_functions(path: str, top: int) -> List[HotFunction]:
+    """Functions of a cProfile dump with the most time spent in their own code."""
+    stats = pstats.Stats(path)
+    total = stats.total_tt  # type: ignore[attr-defined]
+    if not total:
+        return []
+
+    entries = stats.stats  # type: ignore[attr-defined]
+    hottest = sorted(entries.items(), key=lambda item: item[1][2], reverse=True)
+    hot: List[HotFunction] = []
+    for (filename, line, name), (_, _, tottime, _, _) in hottest[:top]:
+        if filename == "~":
+            # Built-in functions have no source location
+            label = name
+        else:
+            label = f"{Path(filename).name}:{line}({name})"
+        hot.append({"name": label, "share": tottime / total})
+    return hot
+
+
+def find_jfr() -> Optional[str]:
+    """jfr tool of the JDK, preferring the one next to java."""
+    java = shutil.which("java")
+    if java:
+        jfr = Path(java).resolve().parent / "jfr"
+        if jfr.exists():
+            return str(jfr)
+    return shutil.which("jfr")
+
+
+def frame_name(frame: Dict[str, Any]) -> str:
+    method = frame.get("method", {})
+    owner = method.get("type", {}).get("name", "?")
+    return f"{owner}.{method.get('name', '?')}:{frame.get('lineNumber', '?')}"
+
+
+def java_hot_functions(path: str, top: int) -> List[HotFunction]:
+    """Methods of a flight recording found on top of the stack most often."""
+    jfr = find_jfr()
+    if jfr is None:
+        raise Exception("jfr tool not found, is this a JDK?")
+
+    process = subprocess.run(
+        [jfr, "print", "--json", "--events", JFR_EVENTS, path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=JFR_PRINT_TIMEOUT,
+    )
+    if process.returncode != 0:
+        raise Exception(process.stderr.decode(errors="replace"))
+
+    samples: Counter = Counter()
+    for event in json.loads(process.stdout)["recording"]["events"]:
+        frames = (event["values"].get("stackTrace") or {}).get("frames") or []
+        if frames:
+            samples[frame_name(frames[0])] += 1
+
+    total = sum(samples.values())
+    return [
+        {"name": name, "share": count / total}
+        for name, count in samples.most_common(top)
+    ]
+
+
+def hot_functions(language: str, path: str, top: int) -> List[HotFunction]:
+    """Top functions of a recorded profile, empty if it cannot be read."""
+    try:
+        if language == "python":
+            return python_hot_functions(path, top)
+        return java_hot_functions(path, top)
+    except Exception as e:
+        console.debug("Cannot summarize profile", path, e)
+        return []
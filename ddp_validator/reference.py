@@ -0,0 +1,82 @@
+import hashlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from ddp_validator.constants import CACHE_DIR
+from ddp_validator.utils import console, load_json, save_json
+
+if TYPE_CHECKING:
+    from ddp_validator.tester import InputTester
+
+REFERENCE_DIR = CACHE_DIR / "reference"
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def input_hash(stdin: str, only_stdout: bool) -> str:
+    mode = "stdout" if only_stdout else "combined"
+    return hashlib.sha256(f"{mode}\0{stdin}".encode()).hexdigest()
+
+
+def cache_path(reference_hash: str, stdin: str, only_stdout: bool) -> Path:
+    return REFERENCE_DIR / reference_hash / f"{input_hash(stdin, only_stdout)}.json"
+
+
+def load_cached(
+    reference_hash: str, stdin: str, only_stdout: bool
+) -> Optional[List[str]]:
+    return load_json(cache_path(reference_hash, stdin, only_stdout), None)
+
+
+def store_cached(reference_hash: str, stdin: str, only_stdout: bool, lines: List[str]):
+    save_json(cache_path(reference_hash, stdin, only_stdout), lines)
+
+
+class ReferenceRunner:
+    """Produces expected output by running a reference solution.
+
+    Transcripts are cached on disk keyed by the reference's content hash and
+    the input, so a reference runs once per distinct input no matter how many
+    submissions are tested against it.
+    """
+
+    def __init__(self, tester: "InputTester"):
+        self._tester = tester
+        self._hash = file_hash(tester.program)
+        self._compiled = False
+        self._memo: Dict[str, List[str]] = {}
+
+    @property
+    def hash(self) -> str:
+        return self._hash
+
+    @property
+    def tester(self) -> "InputTester":
+        return self._tester
+
+    def ensure_compiled(self):
+        if not self._compiled:
+            self._tester.run_compile()
+            self._compiled = True
+
+    def expected_lines(self, stdin: str) -> List[str]:
+        only_stdout = self._tester.only_stdout
+        key = input_hash(stdin, only_stdout)
+        if key in self._memo:
+            return self._memo[key]
+
+        lines = load_cached(self._hash, stdin, only_stdout)
+        if lines is None:
+            console.debug("Running reference for input", key)
+            self.ensure_compiled()
+            lines = self._tester.run_program(stdin)
+            store_cached(self._hash, stdin, only_stdout, lines)
+
+        self._memo[key] = lines
+        return lines
@@ -0,0 +1,213 @@
+import array
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple, TypeVar
+
+from ddp_validator.constants import STORE_INSTALL_HINT
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(STORE_INSTALL_HINT)
+
+from ddp_validator.types import CaseSummary, TestResult, Verdict
+
+# Suite and title of a case
+Case = Tuple[str, str]
+T = TypeVar("T", str, Case)
+
+VERDICTS: List[Verdict] = ["passed", "failed", "error", "output_file"]
+VERDICT_CODES: Dict[Verdict, int] = {v: i for i, v in enumerate(VERDICTS)}
+
+MAGIC = b"DDPRESULTS2\n"
+# Stores from before cases were told apart by suite
+MAGIC_V1 = b"DDPRESULTS1\n"
+
+# Column name and typecode, in the order they are stored
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("submission", "I"),
+    ("case", "I"),
+    ("verdict", "B"),
+    ("duration", "f"),
+    ("rss", "I"),
+    ("message", "I"),
+)
+
+
+class ResultStore:
+    """Columnar store of test results for many submissions.
+
+    Every result is one row across typed arrays: submission and case index,
+    verdict code, duration in seconds, peak memory in KiB and the offset of
+    its message in a table of distinct messages. That is 21 bytes per result,
+    names and messages are only stored once no matter how often they occur.
+
+    A case is a (suite, title) pair, as different suites reuse titles like
+    "Input 1" for unrelated cases.
+    """
+
+    def __init__(self):
+        self._submissions: List[str] = []
+        self._cases: List[Case] = []
+        self._messages: List[str] = [""]
+        self._submission_index: Dict[str, int] = {}
+        self._case_index: Dict[Case, int] = {}
+        self._message_index: Dict[str, int] = {"": 0}
+        self._columns = {name: array.array(code) for name, code in COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._columns["verdict"])
+
+    @property
+    def submissions(self) -> List[str]:
+        return self._submissions
+
+    @property
+    def cases(self) -> List[Case]:
+        return self._cases
+
+    @staticmethod
+    def _offset(table: List[T], index: Dict[T, int], value: T) -> int:
+        if value not in index:
+            index[value] = len(table)
+            table.append(value)
+        return index[value]
+
+    def add(self, submission: str, suite: str, result: TestResult):
+        columns = self._columns
+        columns["submission"].append(
+            self._offset(self._submissions, self._submission_index, submission)
+        )
+        columns["case"].append(
+            self._offset(self._cases, self._case_index, (suite, result["title"]))
+        )
+        columns["verdict"].append(VERDICT_CODES[result["verdict"]])
+        columns["duration"].append(result["duration"])
+        columns["rss"].append(result.get("rss", 0))
+        columns["message"].append(
+            self._offset(self._messages, self._message_index, result["message"])
+        )
+
+    def extend(self, submission: str, suite: str, results: List[TestResult]):
+        for result in results:
+            self.add(submission, suite, result)
+
+    def column(self, name: str) -> np.ndarray:
+        """Copy of a column as a NumPy array."""
+        return np.frombuffer(
+            self._columns[name], dtype=self._columns[name].typecode
+        ).copy()
+
+    def get(self, row: int) -> Tuple[str, TestResult]:
+        """Submission and result stored in a row."""
+        columns = self._columns
+        result: TestResult = {
+            "title": self._cases[columns["case"][row]][1],
+            "verdict": VERDICTS[columns["verdict"][row]],
+            "duration": columns["duration"][row],
+            "message": self._messages[columns["message"][row]],
+        }
+        if columns["rss"][row]:
+            result["rss"] = columns["rss"][row]
+        return self._submissions[columns["submission"][row]], result
+
+    def results(self, submission: str) -> List[TestResult]:
+        index = self._submission_index.get(submission)
+        if index is None:
+            return []
+
+        rows = np.flatnonzero(self.column("submission") == index)
+        return [self.get(int(row))[1] for row in rows]
+
+    def verdict_counts(self) -> Dict[Verdict, int]:
+        counts = np.bincount(self.column("verdict"), minlength=len(VERDICTS))
+        return {v: int(counts[i]) for i, v in enumerate(VERDICTS)}
+
+    def pass_counts(self) -> Dict[str, Tuple[int, int]]:
+        """Passed and total results of each submission."""
+        submission = self.column("submission")
+        passed = self.column("verdict") == VERDICT_CODES["passed"]
+        totals = np.bincount(submission, minlength=len(self._submissions))
+        passes = np.bincount(submission[passed], minlength=len(self._submissions))
+        return {
+            name: (int(passes[i]), int(totals[i]))
+            for i, name in enumerate(self._submissions)
+        }
+
+    def case_summaries(self) -> List[CaseSummary]:
+        """Statistics of each case across all submissions, in insertion order."""
+        case = self.column("case")
+        passed = self.column("verdict") == VERDICT_CODES["passed"]
+        duration = self.column("duration")
+        rss = self.column("rss")
+
+        summaries: List[CaseSummary] = []
+        for i, (suite, title) in enumerate(self._cases):
+            rows = case == i
+            durations = duration[rows]
+            summaries.append(
+                {
+                    "suite": suite,
+                    "title": title,
+                    "runs": int(rows.sum()),
+                    "passed": int(passed[rows].sum()),
+                    "mean_duration": float(durations.mean()),
+                    "p95_duration": float(np.percentile(durations, 95)),
+                    "max_rss": int(rss[rows].max()),
+                }
+            )
+        return summaries
+
+    def save(self, path: str):
+        header = {
+            "byteorder": sys.byteorder,
+            "rows": len(self),
+            "submissions": self._submissions,
+            "cases": self._cases,
+            "messages": self._messages,
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode() + b"\n")
+            for name, _ in COLUMNS:
+                self._columns[name].tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ResultStore":
+        store = cls()
+        with open(path, "rb") as f:
+            magic = f.readline()
+            if magic not in (MAGIC, MAGIC_V1):
+                raise Exception(f"{path} is not a result store.")
+
+            header = json.loads(f.readline())
+            store._submissions = header["submissions"]
+            if magic == MAGIC_V1:
+                store._cases = [("", title) for title in header["cases"]]
+            else:
+                store._cases = [(suite, title) for suite, title in header["cases"]]
+            store._messages = header["messages"]
+            store._submission_index = {v: i for i, v in enumerate(store._submissions)}
+            store._case_index = {v: i for i, v in enumerate(store._cases)}
+            store._message_index = {v: i for i, v in enumerate(store._messages)}
+
+            for name, _ in COLUMNS:
+                column = store._columns[name]
+                column.fromfile(f, header["rows"])
+                if header["byteorder"] != sys.byteorder:
+                    column.byteswap()
+
+        return store
+
+
+def load_store(path: str) -> ResultStore:
+    """Load a result store, or an empty one if it does not exist yet."""
+    if not Path(path).exists():
+        return ResultStore()
+    return ResultStore.load(path)
@@ -0,0 +1,365 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from ddp_validator.constants import IS_FROZEN
+from ddp_validator.online import (
+    data_dir,
+    download_data_files,
+    load_classifiers,
+    load_suite,
+)
+from ddp_validator.tester import InputTester, parse_suite
+from ddp_validator.types import Classification, GradeReport, Suite, TestResult
+from ddp_validator.utils import console, get_classifier, logger
+
+DEFAULT_PORT = 8766
+PROGRAM_SUFFIXES = (".py", ".java")
+
+
+def find_program(dir: Path, name: Optional[str] = None) -> Path:
+    """Get program from directory like get_program, but without prompting."""
+    if name:
+        path = dir / name
+        if not path.exists():
+            raise Exception(f"Cannot find {name} in submission.")
+        return path
+
+    if any(p.suffix == ".gradle" for p in dir.iterdir()):
+        return dir
+
+    programs = [p for p in dir.iterdir() if p.suffix in PROGRAM_SUFFIXES]
+    if len(programs) != 1:
+        raise Exception(
+            f"Found {len(programs)} programs in submission, pass program to pick one."
+        )
+    return programs[0]
+
+
+def extract_tarball(data: bytes, target: Path) -> Path:
+    """Extract a possibly compressed tarball of a submission.
+
+    Returns:
+        Path: Submission directory, which is the only top-level directory of
+            the tarball if there is one.
+    """
+    root = target.resolve()
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tar:
+        for member in tar.getmembers():
+            if not (member.isfile() or member.isdir()):
+                raise Exception("Tarball may only contain files and directories.")
+            if not (root / member.name).resolve().is_relative_to(root):
+                raise Exception(f"Tarball member {member.name} is outside of it.")
+        tar.extractall(root)
+
+    entries = list(root.iterdir())
+    if len(entries) == 1 and entries[0].is_dir():
+        return entries[0]
+    return root
+
+
+class GradingService:
+    """Grades submissions with classifiers, parsed suites and workers kept warm.
+
+    Suites are parsed once and shared between submissions, local ones are
+    parsed again when their file changes.
+    """
+
+    def __init__(self, jobs: int):
+        self._jobs = jobs
+        self._executor = ThreadPoolExecutor(jobs, thread_name_prefix="grader")
+        self._lock = threading.Lock()
+        self._classifiers: Optional[List[Classification]] = None
+        # Suite key -> (modification time, parsed suite)
+        self._suites: Dict[str, Tuple[Optional[int], Suite]] = {}
+        self._active = 0
+
+    def classifiers(self) -> List[Classification]:
+        with self._lock:
+            if self._classifiers is None:
+                self._classifiers = load_classifiers()
+            return self._classifiers
+
+    def _cached_suite(
+        self, key: str, mtime: Optional[int], parse: Callable[[], Suite]
+    ) -> Suite:
+        with self._lock:
+            cached = self._suites.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+        console.debug("Parsing suite", key)
+        suite = parse()
+        with self._lock:
+            self._suites[key] = (mtime, suite)
+        return suite
+
+    def suite_file(self, path: str) -> Tuple[Suite, str]:
+        """Parsed suite from a TOML file, and its directory."""
+        path = os.path.abspath(path)
+        suite_dir = os.path.dirname(path)
+
+        def parse() -> Suite:
+            with open(path, "r") as f:
+                return parse_suite(f.read(), suite_dir)
+
+        return self._cached_suite(path, os.stat(path).st_mtime_ns, parse), suite_dir
+
+    def classified_suite(self, program_path: Path) -> Tuple[Suite, Optional[str]]:
+        """Parsed suite of the task the program belongs to, and its directory."""
+        classification = get_classifier(program_path, self.classifiers())
+        if not classification:
+            raise Exception("Cannot decide which task.")
+
+        path = classification["path"]
+        if not IS_FROZEN:
+            return self.suite_file(str(Path("data") / path))
+
+        def parse() -> Suite:
+            content = load_suite(path)
+            if content is None:
+                raise Exception(f"Cannot fetch test data of {path}.")
+
+            suite = parse_suite(content, None, str(data_dir(path)))
+            if not download_data_files(list(suite.tests), path):
+                raise Exception(f"Cannot fetch data files of {path}.")
+            return suite
+
+        # Remote suites only change with a reload
+        return self._cached_suite(path, None, parse), None
+
+    def reload(self):
+        with self._lock:
+            self._classifiers = None
+            self._suites.clear()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "classifiers": len(self._classifiers or []),
+                "suites": sorted(self._suites),
+                "active": self._active,
+                "jobs": self._jobs,
+            }
+
+    def resolve(
+        self,
+        submission_dir: Path,
+        program: Optional[str] = None,
+        suite_path: Optional[str] = None,
+    ) -> Tuple[Path, Suite, Optional[str]]:
+        """Find the program to grade and the suite to grade it with.
+
+        Args:
+            submission_dir (Path): Directory containing the program.
+            program (Optional[str]): Program to test in the directory, needed
+                if there are several.
+            suite_path (Optional[str]): Suite to test with, decided by
+                classifier if not given.
+
+        Returns:
+            Tuple[Path, Suite, Optional[str]]: Program, its suite and the
+                directory of the suite.
+        """
+        program_path = find_program(submission_dir, program).absolute()
+        if suite_path:
+            suite, suite_dir = self.suite_file(suite_path)
+        else:
+            suite, suite_dir = self.classified_suite(program_path)
+        return program_path, suite, suite_dir
+
+    def submit(
+        self,
+        tester: InputTester,
+        on_result: Optional[Callable[[TestResult], None]] = None,
+    ) -> "Future[GradeReport]":
+        """Queue a submission for grading, the tester is closed afterwards.
+
+        Args:
+            tester (InputTester): Tester of the submission.
+            on_result (Optional[Callable[[TestResult], None]]): Called with
+                each verdict as soon as it is known.
+        """
+        return self._executor.submit(self._grade, tester, on_result)
+
+    def _grade(
+        self,
+        tester: InputTester,
+        on_result: Optional[Callable[[TestResult], None]],
+    ) -> GradeReport:
+        with self._lock:
+            self._active += 1
+
+        report: GradeReport = {
+            "program": tester.program,
+            "results": [],
+            "passed": 0,
+            "total": len(tester.tests),
+            "error": None,
+        }
+        try:
+            tester.run_compile()
+            for t in tester.tests:
+                result = tester.run_test(t, write_difference=False)
+                logger.info("Test finished", program=tester.program, **result)
+                report["results"].append(result)
+                report["passed"] += result["verdict"] == "passed"
+                if on_result:
+                    on_result(result)
+        except Exception as e:
+            report["error"] = str(e)
+        finally:
+            tester.cleanup()
+            tester.close()
+            with self._lock:
+                self._active -= 1
+
+        return report
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+class GradingHandler(BaseHTTPRequestHandler):
+    server: "GradingServer"
+
+    def log_message(self, format: str, *args: Any):
+        console.debug(format % args)
+
+    def _send(self, status: int, data: Any):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_line(self, data: Any):
+        self.wfile.write(json.dumps(data).encode() + b"\n")
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/status":
+            self._send(200, self.server.service.status())
+        else:
+            self._send(404, {"error": "Not found."})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/reload":
+            self.server.service.reload()
+            self._send(200, {})
+        elif url.path == "/grade":
+            self._grade({k: v[-1] for k, v in parse_qs(url.query).items()})
+        else:
+            self._send(404, {"error": "Not found."})
+
+    def _tester(self, params: Dict[str, Any], tempdir: Path) -> Optional[InputTester]:
+        """Tester of the submission in the request, None if an error was sent."""
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                params.update(json.loads(body or b"{}"))
+                submission_dir = Path(params["path"])
+            else:
+                submission_dir = extract_tarball(body, tempdir)
+
+            program_path, suite, suite_dir = self.server.service.resolve(
+                submission_dir, params.get("program"), params.get("suite")
+            )
+        except Exception as e:
+            self._send(400, {"error": str(e)})
+            return None
+
+        try:
+            return InputTester.from_suite(str(program_path), suite, suite_dir=suite_dir)
+        except Exception as e:
+            self._send(500, {"error": f"Cannot prepare tests: {e}"})
+            return None
+
+    def _grade(self, params: Dict[str, Any]):
+        """Grade a submission path given as JSON, or an uploaded tarball.
+
+        Options come from the JSON body or the query string: program, suite
+        and stream, which sends each verdict as its own JSON line.
+        """
+        tempdir = Path(tempfile.mkdtemp(prefix="ddp-serve-"))
+        try:
+            tester = self._tester(params, tempdir)
+            if tester is None:
+                return
+
+            stream = str(params.get("stream", "")).lower() in ("1", "true")
+            if stream:
+                # Verdicts are written from the grader thread as soon as the
+                # submission is queued, the headers have to go first
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+
+            future = self.server.service.submit(
+                tester, self._write_line if stream else None
+            )
+            report = future.result()
+        finally:
+            shutil.rmtree(tempdir, ignore_errors=True)
+
+        if stream:
+            self._write_line({"done": True, **report})
+        else:
+            self._send(200, report)
+
+
+class GradingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: GradingService):
+        super().__init__(address, GradingHandler)
+        self.service = service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Lab Tester daemon.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Parallel grades"
+    )
+    parser.add_argument("--debug", action=argparse.BooleanOptionalAction)
+    parser.add_argument("--log-file", help="Append debug events as JSON lines")
+    args = parser.parse_args()
+
+    console.set_debug(args.debug)
+    if args.log_file:
+        logger.open(args.log_file)
+
+    service = GradingService(args.jobs)
+    # Load classifiers up front so the first submission does not pay for it
+    service.classifiers()
+
+    server = GradingServer((args.host, args.port), service)
+    host, port = server.server_address[:2]
+    console.print(
+        "[white on blue]NOTICE:[/white on blue]",
+        f"Grading daemon listening on http://{host}:{port} with {args.jobs} workers.",
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from typing import Dict, List, Tuple
+
+from ddp_validator.constants import CACHE_DIR
+from ddp_validator.types import Test, TestResult
+from ddp_validator.utils import load_json, save_json
+
+TIMINGS_DIR = CACHE_DIR / "timings"
+
+# Weight of the newest measurement when updating recorded durations
+TIMING_SMOOTHING = 0.5
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse shard specification in the form of "i/N", where i is 1-based.
+
+    Args:
+        value (str): Shard specification.
+
+    Returns:
+        Tuple[int, int]: Zero-based shard index and shard count.
+    """
+    try:
+        index, count = map(int, value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/N.")
+
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{value}', i must be between 1 and N.")
+
+    return index - 1, count
+
+
+def suite_key(suite_path: str) -> str:
+    return suite_path.replace("/", "_").replace("\\", "_")
+
+
+def load_timings(key: str) -> Dict[str, float]:
+    return load_json(TIMINGS_DIR / f"{key}.json", {})
+
+
+def smooth(timings: Dict[str, float], durations: Dict[str, float]):
+    for title, duration in durations.items():
+        previous = timings.get(title)
+        if previous is None:
+            timings[title] = duration
+        else:
+            timings[title] = (
+                TIMING_SMOOTHING * duration + (1 - TIMING_SMOOTHING) * previous
+            )
+
+
+def update_timings(key: str, results: List[TestResult]):
+    """Merge durations of a run into recorded timings of a suite.
+
+    Durations put aside by sharded runs are merged first.
+    """
+    timings = load_timings(key)
+    pending_path = TIMINGS_DIR / f"{key}.pending.json"
+    smooth(timings, load_json(pending_path, {}))
+    smooth(timings, {r["title"]: r["duration"] for r in results})
+
+    save_json(TIMINGS_DIR / f"{key}.json", timings)
+    pending_path.unlink(missing_ok=True)
+
+
+def defer_timings(key: str, results: List[TestResult]):
+    """Put durations of a sharded run aside until the next unsharded run.
+
+    Every shard of a batch has to partition with the same timings, or the
+    shards run in turn no longer cover the suite exactly once.
+    """
+    pending_path = TIMINGS_DIR / f"{key}.pending.json"
+    pending: Dict[str, float] = load_json(pending_path, {})
+    pending.update({r["title"]: r["duration"] for r in results})
+    save_json(pending_path, pending)
+
+
+def partition_tests(
+    tests: List[Test], count: int, timings: Dict[str, float]
+) -> List[List[Test]]:
+    """Deterministically partition tests into shards of similar total duration.
+
+    Uses longest-processing-time-first bin packing over recorded durations.
+    Tests without history are assumed to take the average recorded duration.
+    Without any history, tests are distributed round-robin.
+
+    Args:
+        tests (List[Test]): Tests in declared order.
+        count (int): Number of shards.
+        timings (Dict[str, float]): Recorded duration of each test title.
+
+    Returns:
+        List[List[Test]]: Tests of each shard, in declared order.
+    """
+    known = [timings[t.title] for t in tests if t.title in timings]
+    if not known:
+        return [tests[i::count] for i in range(count)]
+
+    default = sum(known) / len(known)
+    order = sorted(
+        range(len(tests)),
+        key=lambda i: (-timings.get(tests[i].title, default), i),
+    )
+
+    loads = [0.0] * count
+    assigned: List[List[int]] = [[] for _ in range(count)]
+    for i in order:
+        target = min(range(count), key=lambda b: (loads[b], b))
+        loads[target] += timings.get(tests[i].title, default)
+        assigned[target].append(i)
+
+    return [[tests[i] for i in sorted(indices)] for indices in assigned]
+
+
+def shard_tests(
+    tests: List[Test], index: int, count: int, timings: Dict[str, float]
+) -> List[Test]:
+    return partition_tests(tests, count, timings)[index]
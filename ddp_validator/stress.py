@@ -0,0 +1,402 @@
+import itertools
+import shlex
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
+
+from ddp_validator.admission import SAMPLE_INTERVAL, AdmissionController, cpu_count
+from ddp_validator.reference import load_cached, store_cached
+from ddp_validator.tester import InputTester, compare_output, failed, success
+from ddp_validator.types import GeneratorCase, StressResult
+from ddp_validator.utils import console
+
+# Seeds tried for every smaller size while shrinking a failing input
+SHRINK_SEEDS = 5
+# Inputs checked at most while shrinking, a smaller input is kept as is
+SHRINK_BUDGET = 500
+
+# Checks an input of a seed and size, None once the budget is spent
+Checker = Callable[[str, int, int], Optional[StressResult]]
+
+
+class StressJob:
+    """Everything a pool process needs to check one generated input."""
+
+    def __init__(
+        self,
+        case: GeneratorCase,
+        command: Sequence[str],
+        workdir: str,
+        suite_dir: Optional[str],
+        reference_command: Sequence[str],
+        reference_workdir: Optional[str],
+        reference_hash: Optional[str] = None,
+        timeout: float = 10.0,
+    ):
+        self.case = case
+        self.command = tuple(command)
+        self.workdir = workdir
+        self.suite_dir = suite_dir
+        self.reference_command = tuple(reference_command)
+        self.reference_workdir = reference_workdir
+        self.reference_hash = reference_hash
+        self.timeout = timeout
+
+    @classmethod
+    def from_tester(cls, tester: InputTester, case: GeneratorCase) -> "StressJob":
+        if case["reference"]:
+            return cls(
+                case,
+                tester.get_command(),
+                tester.workdir,
+                tester.suite_dir,
+                shlex.split(case["reference"]),
+                tester.suite_dir,
+            )
+
+        reference = tester.reference
+        assert reference
+        reference.ensure_compiled()
+        return cls(
+            case,
+            tester.get_command(),
+            tester.workdir,
+            tester.suite_dir,
+            reference.tester.get_command(),
+            reference.tester.workdir,
+            reference.hash,
+        )
+
+    def expected_lines(self, stdin: str) -> List[str]:
+        if self.reference_hash:
+            cached = load_cached(self.reference_hash, stdin, True)
+            if cached is not None:
+                return cached
+
+        lines = run_program(
+            self.reference_command, stdin, self.reference_workdir, self.timeout
+        )
+        if self.reference_hash:
+            store_cached(self.reference_hash, stdin, True, lines)
+
+        return lines
+
+
+def run_program(
+    args: Sequence[str], stdin: str, cwd: Optional[str], timeout: float
+) -> List[str]:
+    """Runs a program to completion and returns its stdout lines.
+
+    Raises:
+        Exception: If the program errored or timed out.
+    """
+    try:
+        process = subprocess.run(
+            args,
+            input=stdin.encode(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise Exception(f"Program timed out after {timeout}s")
+
+    if process.returncode != 0 or process.stderr:
+        raise Exception("Program errored!\r\n\r\n" + process.stderr.decode())
+
+    return [
+        s.encode("unicode_escape").decode("utf-8")
+        for s in process.stdout.decode("utf-8").strip().splitlines()
+    ]
+
+
+def generate_input(job: StressJob, seed: int, size: int) -> str:
+    cmd = job.case["generator"].format_map({"seed": seed, "size": size})
+    process = subprocess.run(
+        shlex.split(cmd),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=job.suite_dir,
+        timeout=job.timeout,
+    )
+    if process.returncode != 0:
+        raise Exception("Generator errored!\r\n\r\n" + process.stderr.decode())
+
+    return process.stdout.decode()
+
+
+def check_input(job: StressJob, stdin: str, seed: int, size: int) -> StressResult:
+    """Compare submission against reference on a single input."""
+    result: StressResult = {
+        "seed": seed,
+        "size": size,
+        "passed": False,
+        "input": stdin,
+        "expected": [],
+        "actual": [],
+        "message": "",
+    }
+
+    try:
+        result["expected"] = job.expected_lines(stdin)
+    except Exception as e:
+        result["message"] = f"Reference failed: {e}"
+        return result
+
+    try:
+        result["actual"] = run_program(job.command, stdin, job.workdir, job.timeout)
+    except Exception as e:
+        result["message"] = str(e)
+        return result
+
+    result["passed"] = compare_output(result["actual"], result["expected"])
+    return result
+
+
+def check_seed(job: StressJob, seed: int) -> StressResult:
+    size = job.case["size"]
+    try:
+        stdin = generate_input(job, seed, size)
+    except Exception as e:
+        return {
+            "seed": seed,
+            "size": size,
+            "passed": False,
+            "input": "",
+            "expected": [],
+            "actual": [],
+            "message": f"Generator failed: {e}",
+        }
+
+    return check_input(job, stdin, seed, size)
+
+
+def is_reproducible(result: StressResult) -> bool:
+    """Whether a result is a genuine mismatch of the submission."""
+    return not result["passed"] and not result["message"].startswith(
+        ("Reference failed", "Generator failed")
+    )
+
+
+def shrink(
+    job: StressJob, failure: StressResult, budget: int = SHRINK_BUDGET
+) -> StressResult:
+    """Find a smaller input that still makes the submission fail.
+
+    First tries smaller generator sizes with a few seeds each, then removes
+    chunks of lines from the input as long as the reference still accepts it
+    and the submission still disagrees. Stops after checking budget inputs
+    with the smallest failing input found so far.
+    """
+    checks = 0
+
+    def check(stdin: str, seed: int, size: int) -> Optional[StressResult]:
+        nonlocal checks
+        if checks >= budget:
+            return None
+        checks += 1
+        return check_input(job, stdin, seed, size)
+
+    best = shrink_size(job, failure, check)
+    lines = best["input"].splitlines()
+    lines, best = reduce_units(check, best, lines, lambda ls: "\n".join(ls) + "\n")
+
+    for i in range(len(lines)):
+
+        def rebuild(tokens: List[str]) -> str:
+            candidate = list(lines)
+            candidate[i] = " ".join(tokens)
+            return "\n".join(candidate) + "\n"
+
+        tokens, best = reduce_units(check, best, lines[i].split(), rebuild)
+        lines[i] = " ".join(tokens)
+
+    return best
+
+
+def shrink_size(job: StressJob, best: StressResult, check: Checker) -> StressResult:
+    """Smallest generator size, halving each time, at which the input fails."""
+    size = best["size"] // 2
+    while size >= 1:
+        for seed in range(best["seed"], best["seed"] + SHRINK_SEEDS):
+            try:
+                result = check(generate_input(job, seed, size), seed, size)
+            except Exception:
+                continue
+
+            if result is None:
+                return best
+            if is_reproducible(result):
+                best = result
+                break
+        else:
+            break
+
+        size = best["size"] // 2
+
+    return best
+
+
+def reduce_units(
+    check: Checker,
+    best: StressResult,
+    units: List[str],
+    rebuild: Callable[[List[str]], str],
+) -> Tuple[List[str], StressResult]:
+    """Remove chunks of units from failing input while it still fails."""
+    chunk = len(units) // 2
+    while chunk >= 1:
+        i = 0
+        while i < len(units):
+            end = i + chunk
+            candidate = units[:i] + units[end:]
+            if not candidate:
+                i += chunk
+                continue
+
+            result = check(rebuild(candidate), best["seed"], best["size"])
+            if result is None:
+                return units, best
+            if is_reproducible(result):
+                best = result
+                units = candidate
+            else:
+                i += chunk
+
+        chunk //= 2
+
+    return units, best
+
+
+def find_failure(
+    job: StressJob,
+    seeds: range,
+    controller: AdmissionController,
+    on_checked: Callable[[], None],
+) -> Optional[StressResult]:
+    """Check seeds in a process pool, stopping at the first failures.
+
+    A fixed number of jobs keeps twice as many inputs queued so workers
+    never wait. An adaptive controller gets exactly as many as it admits.
+
+    Returns:
+        Optional[StressResult]: Failing result with the lowest seed, if any.
+    """
+    pending = iter(seeds)
+    failure: Optional[StressResult] = None
+
+    with ProcessPoolExecutor(controller.max_jobs) as executor:
+
+        def submit_more(running: Set[Future]):
+            # Keep a bounded number of inputs in flight so we can stop early
+            limit = controller.update(len(running))
+            in_flight = limit if controller.adaptive else limit * 2
+            for seed in itertools.islice(pending, max(0, in_flight - len(running))):
+                running.add(executor.submit(check_seed, job, seed))
+
+        running: Set[Future] = set()
+        submit_more(running)
+        while running:
+            done, running = wait(running, SAMPLE_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+
+                result: StressResult = future.result()
+                on_checked()
+                if not result["passed"] and (
+                    failure is None or result["seed"] < failure["seed"]
+                ):
+                    failure = result
+
+            if failure is None:
+                submit_more(running)
+            else:
+                for future in running:
+                    future.cancel()
+
+    return failure
+
+
+def run_stress(
+    tester: InputTester,
+    case: GeneratorCase,
+    count: Optional[int] = None,
+    controller: Optional[AdmissionController] = None,
+) -> Optional[StressResult]:
+    """Runs submission against reference on many generated inputs in parallel.
+
+    Args:
+        tester (InputTester): Tester of the submission, must be compiled.
+        case (GeneratorCase): Generator case to stress.
+        count (Optional[int]): Number of inputs, defaults to the case's count.
+        controller (Optional[AdmissionController]): Decides how many inputs
+            are checked at once, defaults to one per CPU.
+
+    Returns:
+        Optional[StressResult]: Smallest failing input found, if any.
+    """
+    count = count or case["count"]
+    job = StressJob.from_tester(tester, case)
+
+    progress = Progress(
+        SpinnerColumn(),
+        *Progress.get_default_columns(),
+        TimeElapsedColumn(),
+        console=console,
+        expand=True,
+        transient=True,
+    )
+    task = progress.add_task(f"[green]Stressing {case['title']}...", total=count)
+
+    with progress:
+        failure = find_failure(
+            job,
+            range(case["seed"], case["seed"] + count),
+            controller or AdmissionController.for_jobs(cpu_count()),
+            lambda: progress.advance(task),
+        )
+
+    if failure is None:
+        console.print(f"{case['title']:<20} : {success} ({count} inputs)")
+        return None
+
+    if is_reproducible(failure):
+        with console.status("Shrinking failing input..."):
+            failure = shrink(job, failure)
+
+    print_failure(case, failure)
+    return failure
+
+
+def print_failure(case: GeneratorCase, failure: StressResult):
+    console.print(f"{case['title']:<20} : {failed} (seed {failure['seed']})")
+    if failure["message"]:
+        console.print(failure["message"])
+
+    console.rule("Smallest failing input")
+    console.print(failure["input"], markup=False, highlight=False)
+    console.rule("Expected")
+    console.print("\n".join(failure["expected"]), markup=False, highlight=False)
+    console.rule("Program Output")
+    console.print("\n".join(failure["actual"]), markup=False, highlight=False)
+
+
+def run_stress_tests(
+    tester: InputTester,
+    count: Optional[int] = None,
+    controller: Optional[AdmissionController] = None,
+) -> List[Tuple[GeneratorCase, Optional[StressResult]]]:
+    tester.run_compile()
+    try:
+        return [
+            (case, run_stress(tester, case, count, controller))
+            for case in tester.generators
+        ]
+    finally:
+        tester.cleanup()
+        if controller:
+            controller.report()
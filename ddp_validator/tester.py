@@ -1,15 +1,70 @@
 import asyncio
 import difflib
+import itertools
 import re
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, cast
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
 
 import toml
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from rich.markup import escape
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
 from asyncio.subprocess import PIPE
-from ddp_validator.types import Test, TestDict
-from ddp_validator.utils import console, find_gradlew, run_command
+from ddp_validator.admission import SAMPLE_INTERVAL, AdmissionController
+from ddp_validator.compileserver import CompileServer, can_compile, shared_server
+from ddp_validator.growth import parse_bound
+from ddp_validator.launch import (
+    create_archive,
+    java_flags,
+    parse_profile,
+    precompile_python,
+    python_flags,
+)
+from ddp_validator.profiling import (
+    PROFILE_SLOWDOWN,
+    PROFILE_SUFFIXES,
+    can_profile,
+    hot_functions,
+    profile_command,
+)
+from ddp_validator.reference import ReferenceRunner
+from ddp_validator.types import (
+    Calibration,
+    CompileResult,
+    ComplexityCase,
+    GeneratorCase,
+    ProcessStats,
+    Suite,
+    Test,
+    TestDict,
+    TestResult,
+    TimeoutPolicy,
+    Verdict,
+)
+from ddp_validator.utils import (
+    console,
+    find_gradlew,
+    iter_data_chunks,
+    iter_data_lines,
+    logger,
+    run_command,
+    run_command_streaming,
+    set_interrupt_first,
+)
 import shlex
 
 DISALLOWED_CHARS = [
@@ -53,21 +108,115 @@ def compare_output(
     if len(program_lines) != len(expected_lines):
         return False
 
-    for i in range(len(program_lines)):
-        current_expected = expected_lines[i]
+    for program_line, expected_line in zip(program_lines, expected_lines):
+        if not compare_line(program_line, expected_line):
+            return False
+
+    return True
+
+
+def compare_line(program_line: str, expected_line: str) -> bool:
+    # Regex
+    if expected_line.startswith("regex|"):
+        return bool(re.match(expected_line[6:], program_line))
+
+    return program_line == expected_line
+
 
-        # Regex
-        if current_expected.startswith("regex|"):
-            current_expected = current_expected[6:]
-            result = re.match(current_expected, program_lines[i])
-            if not result:
-                return False
+def escape_line(line: str) -> str:
+    return line.encode("unicode_escape").decode("utf-8")
+
+
+def strip_lines(lines: Iterable[str]) -> Generator[str, None, None]:
+    """Lazily strip lines like strip().splitlines() on their joined text.
+
+    Blank lines at both ends are dropped, as is leading whitespace of the
+    first line and trailing whitespace of the last, so expected output read
+    from a file compares like the program output it is checked against.
+    """
+    last: Optional[str] = None
+    blanks: List[str] = []
+    for line in lines:
+        if not line.strip():
+            if last is not None:
+                blanks.append(line)
             continue
 
-        if program_lines[i] != expected_lines[i]:
+        if last is None:
+            line = line.lstrip()
+        else:
+            yield last
+            yield from blanks
+        last = line
+        blanks = []
+
+    if last is not None:
+        yield last.rstrip()
+
+
+class LineMatcher:
+    """Compares program output against expected lines as they are produced.
+
+    Only the current line of each side is kept in memory, so the expected
+    output can be streamed from a file of any size.
+    """
+
+    def __init__(self, expected_lines: Iterable[str]):
+        self._expected = strip_lines(expected_lines)
+        self._line = 0
+        # Last non-blank program line and blank lines after it, held back
+        # until it is known whether they end the output
+        self._last: Optional[str] = None
+        self._blanks: List[str] = []
+        self.mismatch: Optional[str] = None
+
+    def _match(self, line: Optional[str]) -> bool:
+        expected = next(self._expected, None)
+        if expected is None and line is None:
+            return True
+
+        self._line += 1
+        if expected is not None and line is not None:
+            if compare_line(escape_line(line), escape_line(expected)):
+                return True
+
+        def describe(s: Optional[str]) -> str:
+            return "end of output" if s is None else repr(escape_line(s))
+
+        self.mismatch = (
+            f"Line {self._line}: expected {describe(expected)}, got {describe(line)}"
+        )
+        return False
+
+    def feed(self, line: str) -> bool:
+        """Checks the next program line, False once output has diverged.
+
+        Program lines are stripped like expected lines, see strip_lines.
+        """
+        if not line.strip():
+            if self._last is not None:
+                self._blanks.append(line)
+            return True
+
+        if self._last is None:
+            line = line.lstrip()
+        elif not all(self._match(s) for s in [self._last, *self._blanks]):
             return False
 
-    return True
+        self._last = line
+        self._blanks = []
+        return True
+
+    def finish(self) -> bool:
+        """Checks that no expected lines are left after the program exits."""
+        if self.mismatch is not None:
+            return False
+        if self._last is not None and not self._match(self._last.rstrip()):
+            return False
+        return self._match(None)
+
+    def close(self):
+        self._expected.close()
 
 
 def check_output_file(expected_path: Path, output_path: Path):
@@ -85,6 +234,193 @@ def check_output_file(expected_path: Path, output_path: Path):
         return expected == output
 
 
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    if sys.platform == "win32":
+        console.debug("Windows, using ProactorEventLoop.")
+
+        # Windows subprocess pipes fix
+        loop: asyncio.AbstractEventLoop = asyncio.ProactorEventLoop()
+    else:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+def format_result(result: TestResult) -> str:
+    """Verdict line of a result, followed by its hot functions if profiled."""
+    lines = [format_verdict(result)]
+    for h in result.get("hot", []):
+        lines.append(f"  {h['share']:>6.1%}  {escape(h['name'])}")
+    if "profile" in result:
+        lines.append(f"  Profile: {escape(result['profile'])}")
+    return "\n".join(lines)
+
+
+def format_verdict(result: TestResult) -> str:
+    line = f"{result['title']:<20} : "
+    if result["verdict"] == "passed":
+        return line + success
+    elif result["verdict"] == "output_file":
+        return line + f"{failed} (Output file)"
+    elif result["verdict"] == "error":
+        return line + f"{failed} (Error) {result['message']}"
+    elif result["message"]:
+        return line + f"{failed} {result['message']}"
+
+    return line + failed
+
+
+def parse_suite(
+    inputs: str, suite_dir: Optional[str] = None, data_dir: Optional[str] = None
+) -> Suite:
+    """Parse a TOML test suite.
+
+    Cases may reference stdin_file and stdout_file instead of inline
+    input and output. Those are resolved against data_dir, which
+    defaults to suite_dir, and streamed when the tests run.
+
+    The launch key picks a launch profile, "fast" trades JVM peak
+    performance and user site-packages for quicker start-up.
+
+    Time limits come from timeout of a case, otherwise from its calibrated
+    duration times timeout_multiplier but at least timeout_floor, otherwise
+    from timeout of the suite.
+
+    Cases of type complexity measure the program on inputs of growing sizes
+    instead of checking its output, see parse_complexity.
+    """
+    tests: List[Test] = []
+    data_dir = data_dir or suite_dir
+    generators: List[GeneratorCase] = []
+    complexity: List[ComplexityCase] = []
+    tests_dict: Dict[str, TestDict] = toml.loads(inputs)  # type: ignore
+
+    language = cast(str, tests_dict.pop("language"))
+    compile_command = cast(str, tests_dict.pop("compile", ""))
+    cmd_args = cast(List[str], tests_dict.pop("cmd_args", []))
+    only_stdout = cast(bool, tests_dict.pop("only_stdout", False))
+    reference_path = cast(Optional[str], tests_dict.pop("reference", None))
+    launch = parse_profile(cast(str, tests_dict.pop("launch", "default")))
+    defaults = TimeoutPolicy()
+    timeouts = TimeoutPolicy(
+        cast(float, tests_dict.pop("timeout", defaults.default)),
+        cast(float, tests_dict.pop("timeout_multiplier", defaults.multiplier)),
+        cast(float, tests_dict.pop("timeout_floor", defaults.floor)),
+    )
+
+    reference = None
+    if reference_path:
+        if suite_dir is None:
+            raise Exception("Reference programs require local test data.")
+        reference = str(Path(suite_dir) / reference_path)
+
+    console.debug("Loading test config")
+    console.debug(tests_dict)
+
+    for k in tests_dict:
+        console.debug("Got new test", k)
+
+        t = tests_dict[k]
+        if t.get("type") == "generator":
+            generators.append(parse_generator(k, t, reference))
+            continue
+
+        if t.get("type") == "complexity":
+            complexity.append(parse_complexity(k, t, data_dir))
+            continue
+
+        has_output = "output" in t or "stdout_file" in t
+        if not has_output and reference is None:
+            raise Exception(f"Test {k} has no output and suite has no reference.")
+
+        data_files: Dict[str, Optional[str]] = {}
+        for key in ("stdin_file", "stdout_file"):
+            data_files[key] = None
+            if key not in t:
+                continue
+            if data_dir is None:
+                raise Exception(f"Test {k} uses data files, which need a data dir.")
+            data_files[key] = str(Path(data_dir) / t[key])  # type: ignore
+
+        output = t.get("output")
+        test_data = Test(
+            title=k,
+            stdin=sys.intern(t.get("input", "").strip()),
+            stdout=sys.intern(output.strip()) if output is not None else None,
+            subset=t.get("subset", False),
+            expected_file=t.get("expected_file"),
+            output_file=t.get("output_file"),
+            has_regex="regex|" in (output or ""),
+            stdin_file=data_files["stdin_file"],
+            stdout_file=data_files["stdout_file"],
+            timeout=t.get("timeout"),
+        )
+
+        console.debug(test_data)
+        tests.append(test_data)
+
+    return Suite(
+        language,
+        compile_command,
+        tuple(cmd_args),
+        only_stdout,
+        reference,
+        tuple(tests),
+        tuple(generators),
+        timeouts,
+        launch,
+        tuple(complexity),
+    )
+
+
+def parse_generator(title: str, t: TestDict, reference: Optional[str]) -> GeneratorCase:
+    if "reference" not in t and reference is None:
+        raise Exception(f"Test {title} has no reference to compare against.")
+
+    return {
+        "title": title,
+        "generator": t["generator"],
+        "reference": t.get("reference"),
+        "count": t.get("count", 1000),
+        "size": t.get("size", 100),
+        "seed": t.get("seed", 0),
+    }
+
+
+def parse_complexity(
+    title: str, t: TestDict, data_dir: Optional[str]
+) -> ComplexityCase:
+    """Parse a complexity case.
+
+    Inputs of each of its sizes come from a generator command, formatted
+    with size and seed, or from data files listed in inputs. Each size runs
+    repeat times and the CPU time is fitted against growth models, which
+    must not grow faster than bound.
+    """
+    sizes = t.get("sizes", [])
+    if len(sizes) < 3:
+        raise Exception(f"Test {title} needs at least 3 sizes to fit growth.")
+
+    inputs: List[str] = []
+    if "generator" not in t:
+        if len(t.get("inputs", [])) != len(sizes):
+            raise Exception(f"Test {title} needs a generator or an input per size.")
+        if data_dir is None:
+            raise Exception(f"Test {title} uses data files, which need a data dir.")
+        inputs = [str(Path(data_dir) / name) for name in t["inputs"]]
+
+    return {
+        "title": title,
+        "sizes": sizes,
+        "generator": t.get("generator"),
+        "inputs": inputs,
+        "bound": parse_bound(t.get("bound", "")),
+        "repeat": t.get("repeat", 3),
+        "seed": t.get("seed", 0),
+        "tolerance": t.get("tolerance", 0.25),
+    }
+
+
 class InputTester:
     def __init__(
         self,
@@ -96,30 +432,167 @@ class InputTester:
         cmd_args: List[str] = None,
         only_stdout: bool = False,
         ignore_error: bool = False,
+        generators: Optional[List[GeneratorCase]] = None,
+        suite_dir: Optional[str] = None,
+        reference: Optional[ReferenceRunner] = None,
+        timeouts: Optional[TimeoutPolicy] = None,
+        launch: str = "default",
+        complexity_cases: Optional[List[ComplexityCase]] = None,
     ):
         self._tests = tests
+        self._complexity_cases = complexity_cases or []
+        self._launch = launch
+        self._timeouts = timeouts or TimeoutPolicy()
+        self._calibrated: Dict[str, float] = {}
+        self._reference = reference
+        self._generators = generators or []
+        self._suite_dir = suite_dir
         self._program = program_path
+        if workdir is None:
+            path = Path(program_path)
+            workdir = str(path if path.is_dir() else path.parent)
+
         self._workdir = workdir
         self._language = language
         self._compile_command = compile_command
         self._cmd_args = cmd_args
         self._only_stdout = only_stdout
         self._ignore_error = ignore_error
+        # Where the compile server put the classes of a Java program
+        self._classes: Optional[str] = None
+        # Hot functions to report per test when profiling
+        self._profile_top: Optional[int] = None
+        # Where the test currently running records its profile
+        self._profile_path: Optional[str] = None
+
+        # Every thread running tests gets its own event loop
+        self._local = threading.local()
+        self._loops: List[asyncio.AbstractEventLoop] = []
+        self._loops_lock = threading.Lock()
+        # Create the loop of the constructing thread right away
+        self.loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop of the calling thread, created on first use."""
+        loop = getattr(self._local, "loop", None)
+        if loop is None:
+            loop = new_event_loop()
+            self._local.loop = loop
+            with self._loops_lock:
+                self._loops.append(loop)
+        return loop
+
+    @property
+    def tests(self) -> List[Test]:
+        return self._tests
+
+    @property
+    def generators(self) -> List[GeneratorCase]:
+        return self._generators
+
+    @property
+    def complexity_cases(self) -> List[ComplexityCase]:
+        return self._complexity_cases
+
+    @property
+    def timeouts(self) -> TimeoutPolicy:
+        return self._timeouts
+
+    @property
+    def program(self) -> str:
+        return self._program
 
-        if sys.platform == "win32":
-            console.debug("Windows, using ProactorEventLoop.")
+    @property
+    def only_stdout(self) -> bool:
+        return self._only_stdout
 
-            # Windows subprocess pipes fix
-            self._loop = asyncio.ProactorEventLoop()
-            asyncio.set_event_loop(self._loop)
+    @property
+    def launch(self) -> str:
+        return self._launch
+
+    @property
+    def reference(self) -> Optional[ReferenceRunner]:
+        return self._reference
+
+    @property
+    def workdir(self) -> str:
+        return self._workdir
+
+    @property
+    def suite_dir(self) -> Optional[str]:
+        return self._suite_dir
+
+    @property
+    def profiling(self) -> bool:
+        return self._profile_top is not None
+
+    def enable_profiling(self, top: int):
+        """Profile every test, reporting its top hot functions."""
+        if not can_profile(self._language):
+            console.print(
+                "[on yellow]WARN:[/on yellow]",
+                f"Cannot profile {self._language} programs, running without.",
+            )
+            return
+
+        self._profile_top = top
+        # Lets profilers write out what they have when a test times out
+        set_interrupt_first(True)
+
+    def calibrate(self, calibration: Dict[str, Calibration]):
+        """Derive time limits of cases from their calibrated durations."""
+        policy = self._timeouts
+        self._calibrated = {
+            title: max(policy.floor, c["duration"] * policy.multiplier)
+            for title, c in calibration.items()
+        }
+
+    def timeout_for(self, t: Test) -> float:
+        """Seconds the program may run on a test before it is killed."""
+        if t.timeout is not None:
+            timeout = t.timeout
         else:
-            self._loop = asyncio.get_event_loop()
+            timeout = self._calibrated.get(t.title, self._timeouts.default)
+        return timeout * PROFILE_SLOWDOWN if self._profile_path else timeout
+
+    def compile_server(self) -> Optional[CompileServer]:
+        """Shared compile server, if it can compile the program instead."""
+        uses_javac = shlex.split(self._compile_command) == ["javac", "{program}"]
+        if self._language != "java" or not uses_javac:
+            return None
+        if not can_compile(Path(self._program)):
+            return None
+        return shared_server()
+
+    def use_compiled(self, result: CompileResult):
+        if not result["ok"]:
+            raise Exception("Error occured!\r\n\r\n" + result["diagnostics"])
+        self._classes = result["classes"]
 
     def run_compile(self):
-        if not self._compile_command:
+        if self._compile_command:
+            self.compile_program()
+        self.prepare_launch()
+
+    def prepare_launch(self):
+        """Prepare start-up caches used by the launch profile."""
+        if self._launch != "fast":
             return
 
+        if self._language == "python":
+            precompile_python(self._workdir)
+        elif self._language == "java" and self._classes:
+            create_archive(self._classes, Path(self._program).stem)
+
+    def compile_program(self):
         console.print("Compiling program...")
+        server = self.compile_server()
+        if server:
+            self.use_compiled(server.compile(self._program))
+            console.print("Compiled.")
+            return
+
         cmd = self._compile_command.format_map({"program": f'"{self._program}"'})
         console.debug("Compiling with command", cmd)
 
@@ -145,7 +618,7 @@ class InputTester:
                 await process.stderr.read(),
             )
 
-        code, stdout, stderr = self._loop.run_until_complete(run_cmd())
+        code, stdout, stderr = self.loop.run_until_complete(run_cmd())
         if code != 0:
             raise Exception("Error occured!\r\n\r\n" + stderr.decode())
 
@@ -157,6 +630,13 @@ class InputTester:
         else:
             console.print()
 
+    def close(self):
+        with self._loops_lock:
+            for loop in self._loops:
+                loop.close()
+            self._loops.clear()
+        self._local = threading.local()
+
     def cleanup(self):
         if self._language != "java":
             console.debug("Not a java project, cleanup not needed.")
@@ -173,17 +653,360 @@ class InputTester:
 
         console.print("Done.")
 
-    def run_tests(self):
-        self.run_compile()
+    def get_command(self) -> Tuple[str, ...]:
+        command = self.launch_command()
+        if self._profile_path:
+            return profile_command(self._language, command, self._profile_path)
+        return command
 
+    def launch_command(self) -> Tuple[str, ...]:
         if self._language == "python":
-            cmd = ("python", Path(self._program).name)
+            return ("python", *python_flags(self._launch), Path(self._program).name)
         elif self._language == "java":
-            cmd = ("java", Path(self._program).stem)
+            classpath = ("-cp", self._classes) if self._classes else ()
+            return (
+                "java",
+                *java_flags(self._launch, self._classes),
+                *classpath,
+                Path(self._program).stem,
+            )
         elif self._language == "gradle":
-            cmd = (str(find_gradlew(Path(self._program)).absolute()), *self._cmd_args)
+            return (
+                str(find_gradlew(Path(self._program)).absolute()),
+                *self._cmd_args,
+            )
+
+        raise Exception(f"Unsupported language: {self._language}")
+
+    def get_test(self, title: str) -> Test:
+        for t in self._tests:
+            if t.title == title:
+                return t
 
-        test_passed = True
+        raise KeyError(title)
+
+    def artifact_path(self, name: str) -> Path:
+        """Path of a file written next to the program for the student."""
+        for c in DISALLOWED_CHARS:
+            name = name.replace(c, "")
+        return Path(self._workdir) / name
+
+    def write_difference(
+        self, t: Test, expected_lines: List[str], program_lines: List[str]
+    ):
+        target_path = self.artifact_path(f"difference-{t.title}.html")
+        console.debug("Writing HTML difference to", str(target_path))
+
+        differ = difflib.HtmlDiff(
+            linejunk=difflib.IS_LINE_JUNK,
+            charjunk=difflib.IS_CHARACTER_JUNK,
+        )
+        html = differ.make_file(
+            expected_lines,
+            program_lines,
+            fromdesc="Expected",
+            todesc="Program Output",
+        )
+        with open(target_path, "w") as f:
+            f.write(html)
+
+    def run_program(
+        self,
+        stdin: str,
+        stats: Optional[ProcessStats] = None,
+        timeout: Optional[float] = None,
+    ) -> List[str]:
+        """Runs the program with given input and returns its output lines."""
+        return self.run_lines(stdin.splitlines() + [""], stats, timeout)
+
+    def run_lines(
+        self,
+        lines: Iterable[str],
+        stats: Optional[ProcessStats] = None,
+        timeout: Optional[float] = None,
+    ) -> List[str]:
+        return self.loop.run_until_complete(
+            run_command(
+                lines,
+                *self.get_command(),
+                only_stdout=self._only_stdout,
+                cwd=self._workdir,
+                stats=stats,
+                timeout=timeout or self._timeouts.default,
+            )
+        )
+
+    def run_input(self, t: Test, stats: Optional[ProcessStats] = None) -> List[str]:
+        timeout = self.timeout_for(t)
+        if t.stdin_file:
+            stdin_lines = iter_data_lines(t.stdin_file)
+            return self.run_lines(itertools.chain(stdin_lines, [""]), stats, timeout)
+        return self.run_program(t.stdin, stats, timeout)
+
+    def read_stdin(self, t: Test) -> str:
+        if t.stdin_file:
+            return "\n".join(iter_data_lines(t.stdin_file))
+        return t.stdin
+
+    def expected_lines(self, t: Test) -> List[str]:
+        if t.stdout_file:
+            lines = strip_lines(iter_data_lines(t.stdout_file))
+            return [escape_line(s) for s in lines]
+
+        if t.stdout is None:
+            assert self._reference
+            return self._reference.expected_lines(self.read_stdin(t))
+
+        return [escape_line(s) for s in t.stdout.splitlines()]
+
+    def can_stream(self, t: Test) -> bool:
+        """Whether output of the test can be compared while it is produced."""
+        return bool(t.stdout_file) and self._only_stdout and not t.subset
+
+    def run_streamed(
+        self, t: Test, stats: Optional[ProcessStats] = None
+    ) -> Optional[str]:
+        """Runs a test with file-backed output, streaming input and output.
+
+        Returns:
+            Optional[str]: Description of the first mismatching line, if any.
+        """
+        assert t.stdout_file
+        if t.stdin_file:
+            stdin_chunks: Iterable[bytes] = iter_data_chunks(t.stdin_file)
+        else:
+            stdin_chunks = [(t.stdin + "\n").encode()]
+
+        matcher = LineMatcher(iter_data_lines(t.stdout_file))
+        try:
+            self.loop.run_until_complete(
+                run_command_streaming(
+                    stdin_chunks,
+                    matcher.feed,
+                    *self.get_command(),
+                    cwd=self._workdir,
+                    stats=stats,
+                    timeout=self.timeout_for(t),
+                )
+            )
+            matcher.finish()
+        finally:
+            matcher.close()
+
+        return matcher.mismatch
+
+    def run_test(self, t: Test, write_difference: bool = True) -> TestResult:
+        """Runs a single test case without printing its verdict.
+
+        Args:
+            t (Test): Test case to run.
+            write_difference (bool): Whether to write HTML difference on failure.
+
+        Returns:
+            TestResult: Verdict of the test case.
+        """
+        console.debug("Running test", t.title)
+        start = time.perf_counter()
+        stats: ProcessStats = {}
+
+        def result(verdict: Verdict, message: str = "") -> TestResult:
+            return {
+                "title": t.title,
+                "verdict": verdict,
+                "duration": time.perf_counter() - start,
+                "message": message,
+                **stats,
+            }
+
+        if self.can_stream(t):
+            return self.run_streamed_test(t, result, stats)
+
+        try:
+            program_lines = self.run_input(t, stats)
+        except Exception as e:
+            return result("error", str(e))
+
+        try:
+            expected_lines = self.expected_lines(t)
+        except Exception as e:
+            if t.stdout is None and not t.stdout_file:
+                return result("error", f"Reference failed: {e}")
+            return result("error", str(e))
+
+        console.debug("Program lines:", program_lines)
+        console.debug("Expected lines", expected_lines)
+
+        if not compare_output(program_lines, expected_lines, t.subset):
+            console.debug("Output differs from expected.")
+            inline = not (t.has_regex or t.subset or t.stdout_file)
+            if write_difference and inline:
+                self.write_difference(t, expected_lines, program_lines)
+
+            return result("failed")
+
+        return self.verify_output_file(t, result)
+
+    def run_streamed_test(
+        self, t: Test, result: Callable[..., TestResult], stats: ProcessStats
+    ) -> TestResult:
+        try:
+            mismatch = self.run_streamed(t, stats)
+        except Exception as e:
+            return result("error", str(e))
+
+        if mismatch:
+            console.debug("Output differs from expected.")
+            return result("failed", mismatch)
+
+        return self.verify_output_file(t, result)
+
+    def verify_output_file(
+        self, t: Test, result: Callable[..., TestResult]
+    ) -> TestResult:
+        if t.expected_file and t.output_file:
+            console.debug("Output file is required for check")
+
+            workdir = Path(self._workdir)
+            if not check_output_file(
+                workdir / t.expected_file, workdir / t.output_file
+            ):
+                console.debug("Output file does not match output.")
+                return result("output_file")
+
+        console.debug("Check passed.")
+        return result("passed")
+
+    def profile_test(self, t: Test) -> TestResult:
+        """Runs a test under a profiler and summarizes where its time went.
+
+        Time limits are stretched by PROFILE_SLOWDOWN to make up for the
+        overhead of profiling. The raw profile is kept next to the program.
+        """
+        assert self._profile_top is not None
+        suffix = PROFILE_SUFFIXES[self._language]
+        path = self.artifact_path(f"profile-{t.title}{suffix}").absolute()
+        path.unlink(missing_ok=True)
+
+        self._profile_path = str(path)
+        try:
+            result = self.run_test(t)
+        finally:
+            self._profile_path = None
+
+        if path.exists():
+            result["profile"] = str(path)
+            result["hot"] = hot_functions(self._language, str(path), self._profile_top)
+        else:
+            console.debug("Program exited without writing a profile.")
+        return result
+
+    def record_test(
+        self, t: Test, on_result: Optional[Callable[[TestResult], None]] = None
+    ) -> TestResult:
+        result = self.profile_test(t) if self.profiling else self.run_test(t)
+        logger.info("Test finished", **result)
+        if on_result:
+            on_result(result)
+        return result
+
+    def iter_results(
+        self,
+        tests: List[Test],
+        previous: Dict[str, TestResult],
+        on_result: Optional[Callable[[TestResult], None]],
+        controller: Optional[AdmissionController],
+    ) -> Iterator[TestResult]:
+        """Results of tests as they finish, reusing earlier ones first."""
+        if controller is None:
+            for t in tests:
+                yield previous.get(t.title) or self.record_test(t, on_result)
+            return
+
+        remaining: List[Test] = []
+        for t in tests:
+            if t.title in previous:
+                yield previous[t.title]
+            else:
+                remaining.append(t)
+        yield from self.run_concurrently(remaining, controller, on_result)
+
+    def run_concurrently(
+        self,
+        tests: List[Test],
+        controller: AdmissionController,
+        on_result: Optional[Callable[[TestResult], None]],
+    ) -> Iterator[TestResult]:
+        """Run tests on threads, as many at once as the controller admits.
+
+        Tests start in the given order. Closing the iterator early lets the
+        running tests finish and does not start any more.
+        """
+        if self._reference:
+            # Compile before threads race to do it
+            self._reference.ensure_compiled()
+
+        pending = iter(tests)
+        running: Set["Future[TestResult]"] = set()
+        with ThreadPoolExecutor(controller.max_jobs, "tester") as executor:
+            try:
+                while True:
+                    limit = controller.update(len(running))
+                    for t in itertools.islice(pending, max(0, limit - len(running))):
+                        running.add(executor.submit(self.record_test, t, on_result))
+                    if not running:
+                        return
+
+                    done, running = wait(
+                        running, SAMPLE_INTERVAL, return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield future.result()
+            finally:
+                for future in running:
+                    future.cancel()
+
+    def run_tests(
+        self,
+        tests: Optional[List[Test]] = None,
+        max_failures: Optional[int] = None,
+        previous: Optional[Dict[str, TestResult]] = None,
+        on_result: Optional[Callable[[TestResult], None]] = None,
+        controller: Optional[AdmissionController] = None,
+    ) -> List[TestResult]:
+        """Compiles the program, then runs and reports the given tests.
+
+        Tests are executed in the given order. If that differs from the
+        declared order, or tests run concurrently, failures are printed as
+        soon as they happen and the full report is printed in declared order
+        at the end.
+
+        Args:
+            tests (Optional[List[Test]]): Tests to run in execution order,
+                defaults to all tests.
+            max_failures (Optional[int]): Stop after this many failures.
+            previous (Optional[Dict[str, TestResult]]): Results of an earlier
+                run by title, reused instead of running those tests again.
+            on_result (Optional[Callable[[TestResult], None]]): Called with
+                the result of each test that was actually run.
+            controller (Optional[AdmissionController]): Decides how many tests
+                run at once, tests run one by one if not given.
+
+        Returns:
+            List[TestResult]: Verdict of each test that was run, in declared order.
+        """
+        if tests is None:
+            tests = self._tests
+        previous = previous or {}
+
+        declared = {t.title: i for i, t in enumerate(self._tests)}
+        in_order = controller is None and tests == sorted(
+            tests, key=lambda t: declared[t.title]
+        )
+
+        self.run_compile()
+
+        results: List[TestResult] = []
+        failures = 0
         progress = Progress(
             SpinnerColumn(),
             *Progress.get_default_columns(),
@@ -192,122 +1015,127 @@ class InputTester:
             expand=True,
             transient=True,
         )
-        task = progress.add_task("[green]Running tests...", total=len(self._tests))
+        task = progress.add_task("[green]Running tests...", total=len(tests))
 
         with progress:
-            for t in self._tests:
-                console.debug("Running test", t["title"])
-                try:
-                    program_lines = self._loop.run_until_complete(
-                        run_command(
-                            t["stdin"].splitlines() + [""],
-                            *cmd,
-                            only_stdout=self._only_stdout,
-                        )
-                    )
-                except BaseException as e:
-                    # if not self._ignore_error:
-                    # raise e
-
-                    console.print(f"{t['title']:<20} : {failed} (Error) {e}")
-                    continue
-
-                expected_lines = [
-                    s.encode("unicode_escape").decode("utf-8")
-                    for s in t["stdout"].splitlines()
-                ]
-
-                console.debug("Program lines:", program_lines)
-                console.debug("Expected lines", expected_lines)
-
-                condition = compare_output(program_lines, expected_lines, t["subset"])
-                if not condition:
-                    console.debug("Output differs from expected.")
-                    console.print(f"{t['title']:<20} : {failed}")
-
-                    if not (t["has_regex"] or t["subset"]):
-                        target_html = f"difference-{t['title']}.html"
-                        for c in DISALLOWED_CHARS:
-                            target_html = target_html.replace(c, "")
-
-                        console.debug("Writing HTML difference to", target_html)
-
-                        differ = difflib.HtmlDiff(
-                            linejunk=difflib.IS_LINE_JUNK,
-                            charjunk=difflib.IS_CHARACTER_JUNK,
-                        )
-                        html = differ.make_file(
-                            expected_lines,
-                            program_lines,
-                            fromdesc="Expected",
-                            todesc="Program Output",
-                        )
-                        with open(target_html, "w") as f:
-                            f.write(html)
-
-                    test_passed = False
-                    progress.advance(task)
-                    continue
-
-                if t["expected_file"] and t["output_file"]:
-                    console.debug("Output file is required for check")
-
-                    if not check_output_file(t["expected_file"], t["output_file"]):
-                        console.debug("Output file does not match output.")
-                        console.print(f"{t['title']:<20} : {failed} (Output file)")
-                        test_passed = False
-                        progress.advance(task)
-                        continue
-
-                console.debug("Check passed.")
-                console.print(f"{t['title']:<20} : {success}")
+            for result in self.iter_results(tests, previous, on_result, controller):
+                results.append(result)
                 progress.advance(task)
 
-        if test_passed:
+                passed = result["verdict"] == "passed"
+                if in_order or not passed:
+                    console.print(format_result(result))
+
+                failures += not passed
+                if max_failures is not None and failures >= max_failures:
+                    break
+
+        results.sort(key=lambda r: declared[r["title"]])
+        if not in_order:
+            console.rule("Report")
+            for result in results:
+                console.print(format_result(result))
+
+        if len(results) < len(tests):
+            console.print(
+                f"Stopped after {failures} failures,",
+                f"skipped {len(tests) - len(results)} tests.",
+            )
+
+        if controller:
+            controller.report()
+
+        if all(r["verdict"] == "passed" for r in results):
             console.print("All checks passed!")
         else:
             console.print("Some checks have failed :(")
 
         self.cleanup()
+        return results
 
-    @classmethod
-    def from_str(cls, program_path: str, inputs: str, ignore_error: bool = False):
-        tests: List[Test] = []
-        tests_dict: Dict[str, TestDict] = toml.loads(inputs)  # type: ignore
-
-        language = cast(str, tests_dict.pop("language"))
-        compile_command = cast(str, tests_dict.pop("compile", ""))
-        cmd_args = cast(List[str], tests_dict.pop("cmd_args", []))
-        only_stdout = cast(bool, tests_dict.pop("only_stdout", False))
-
-        console.debug("Loading test config")
-        console.debug(tests_dict)
-
-        for k in tests_dict:
-            console.debug("Got new test", k)
-
-            t = tests_dict[k]
-            test_data: Test = {
-                "title": k,
-                "stdin": t["input"].strip(),
-                "stdout": t["output"].strip(),
-                "subset": t["subset"],
-                "expected_file": t["expected_file"] if "expected_file" in t else None,
-                "output_file": t["output_file"] if "output_file" in t else None,
-                "has_regex": "regex|" in t["output"],
-            }
+    @staticmethod
+    def compile_all(testers: List["InputTester"]) -> List[Optional[str]]:
+        """Compile many programs, batching Java ones into the compile server.
+
+        Returns:
+            List[Optional[str]]: Compile error of each tester, if any.
+        """
+        errors: List[Optional[str]] = [None] * len(testers)
+        batch = [i for i, t in enumerate(testers) if t.compile_server()]
+        server = shared_server()
+        if batch and server:
+            results = server.compile_many([testers[i].program for i in batch])
+            for i, result in zip(batch, results):
+                try:
+                    testers[i].use_compiled(result)
+                    testers[i].prepare_launch()
+                except Exception as e:
+                    errors[i] = str(e)
 
-            console.debug(test_data)
-            tests.append(test_data)
+        batched = set(batch)
+        for i, t in enumerate(testers):
+            if i in batched:
+                continue
+            try:
+                t.run_compile()
+            except Exception as e:
+                errors[i] = str(e)
+
+        return errors
+
+    @classmethod
+    def from_suite(
+        cls,
+        program_path: str,
+        suite: Suite,
+        ignore_error: bool = False,
+        suite_dir: Optional[str] = None,
+    ):
+        reference = None
+        if suite.reference:
+            reference = ReferenceRunner(
+                cls(
+                    suite.reference,
+                    [],
+                    suite.language,
+                    suite.compile_command,
+                    cmd_args=list(suite.cmd_args),
+                    only_stdout=suite.only_stdout,
+                    timeouts=suite.timeouts,
+                    launch=suite.launch,
+                )
+            )
 
         return cls(
             program_path,
-            tests,
-            language,
-            compile_command,
-            cmd_args=cmd_args,
-            only_stdout=only_stdout,
+            list(suite.tests),
+            suite.language,
+            suite.compile_command,
+            cmd_args=list(suite.cmd_args),
+            only_stdout=suite.only_stdout,
+            ignore_error=ignore_error,
+            generators=list(suite.generators),
+            complexity_cases=list(suite.complexity),
+            suite_dir=suite_dir,
+            reference=reference,
+            timeouts=suite.timeouts,
+            launch=suite.launch,
+        )
+
+    @classmethod
+    def from_str(
+        cls,
+        program_path: str,
+        inputs: str,
+        ignore_error: bool = False,
+        suite_dir: Optional[str] = None,
+        data_dir: Optional[str] = None,
+    ):
+        return cls.from_suite(
+            program_path,
+            parse_suite(inputs, suite_dir, data_dir),
             ignore_error=ignore_error,
+            suite_dir=suite_dir,
         )
 
     @classmethod
@@ -316,4 +1144,9 @@ class InputTester:
         with open(fname, "r") as f:
             inputs = f.read()
 
-        return cls.from_str(program_path, inputs, ignore_error=ignore_error)
+        return cls.from_str(
+            program_path,
+            inputs,
+            ignore_error=ignore_error,
+            suite_dir=str(Path(fname).resolve().parent),
+        )
@@ -0,0 +1,68 @@
+import time
+from typing import Dict, List
+
+from ddp_validator.constants import CACHE_DIR
+from ddp_validator.tester import InputTester
+from ddp_validator.types import Calibration, TestResult
+from ddp_validator.utils import load_json, save_json
+
+TIMEOUTS_DIR = CACHE_DIR / "timeouts"
+
+# Runs of the reference per case when calibrating, the fastest one counts
+CALIBRATION_RUNS = 3
+# Weight of the newest passing run when updating durations from history
+CALIBRATION_SMOOTHING = 0.5
+
+
+def load_calibration(key: str) -> Dict[str, Calibration]:
+    return load_json(TIMEOUTS_DIR / f"{key}.json", {})
+
+
+def save_calibration(key: str, calibration: Dict[str, Calibration]):
+    save_json(TIMEOUTS_DIR / f"{key}.json", calibration)
+
+
+def calibrate_reference(tester: InputTester) -> Dict[str, Calibration]:
+    """Time the reference solution of a suite on each of its tests.
+
+    Returns:
+        Dict[str, Calibration]: Fastest duration of the reference on each test.
+    """
+    reference = tester.reference
+    if reference is None:
+        raise Exception("Suite has no reference to calibrate timeouts with.")
+
+    reference.ensure_compiled()
+    calibration: Dict[str, Calibration] = {}
+    for t in tester.tests:
+        durations: List[float] = []
+        for _ in range(CALIBRATION_RUNS):
+            start = time.perf_counter()
+            reference.tester.run_input(t)
+            durations.append(time.perf_counter() - start)
+
+        calibration[t.title] = {"duration": min(durations), "source": "reference"}
+
+    return calibration
+
+
+def update_calibration(key: str, results: List[TestResult]):
+    """Merge durations of passing results into the calibration of a suite.
+
+    Durations measured from the reference are kept as they are.
+    """
+    calibration = load_calibration(key)
+    for r in results:
+        if r["verdict"] != "passed":
+            continue
+
+        previous = calibration.get(r["title"])
+        if previous is None:
+            calibration[r["title"]] = {"duration": r["duration"], "source": "history"}
+        elif previous["source"] == "history":
+            previous["duration"] = (
+                CALIBRATION_SMOOTHING * r["duration"]
+                + (1 - CALIBRATION_SMOOTHING) * previous["duration"]
+            )
+
+    save_calibration(key, calibration)
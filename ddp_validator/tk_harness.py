@@ -0,0 +1,173 @@
+"""Harness injected into Tkinter submissions by ddp_validator.tkdriver.
+
+Runs the submission unchanged, except that once it enters mainloop, the
+harness connects back to the driver and serves JSON-line commands that
+inspect and drive the widget tree from within the Tk event loop. Dialogs
+from tkinter.messagebox are recorded instead of blocking.
+
+This file only depends on the standard library so it can run with any
+interpreter the submission runs with.
+
+Usage: python tk_harness.py <driver port> <program> [args...]
+"""
+
+import json
+import os
+import queue
+import runpy
+import socket
+import sys
+import threading
+import tkinter
+from tkinter import messagebox
+
+POLL_MS = 5
+
+dialogs = []
+commands = queue.Queue()
+connection = None
+
+
+def record_dialog(kind, result):
+    def show(title=None, message=None, **options):
+        dialogs.append({"kind": kind, "title": title, "message": message})
+        return result
+
+    return show
+
+
+def describe(widget):
+    info = {
+        "path": str(widget),
+        "class": widget.winfo_class(),
+        "x": widget.winfo_rootx(),
+        "y": widget.winfo_rooty(),
+        "width": widget.winfo_width(),
+        "height": widget.winfo_height(),
+    }
+    try:
+        info["text"] = widget.cget("text")
+    except tkinter.TclError:
+        pass
+    if isinstance(widget, tkinter.Entry):
+        info["value"] = widget.get()
+    return info
+
+
+def walk(widget):
+    yield widget
+    for child in widget.winfo_children():
+        yield from walk(child)
+
+
+def canvas_items(canvas):
+    items = []
+    for item in canvas.find_all():
+        kind = canvas.type(item)
+        data = {"id": item, "type": kind, "coords": canvas.coords(item)}
+        for option in ("fill", "outline", "text", "width"):
+            try:
+                data[option] = canvas.itemcget(item, option)
+            except tkinter.TclError:
+                pass
+        items.append(data)
+    return items
+
+
+def handle(root, request):
+    cmd = request["cmd"]
+    if cmd == "tree":
+        root.update_idletasks()
+        return [describe(w) for w in walk(root)]
+    if cmd == "dialogs":
+        result = list(dialogs)
+        dialogs.clear()
+        return result
+    if cmd == "quit":
+        root.after(0, root.destroy)
+        return None
+
+    widget = root.nametowidget(request["path"])
+    if cmd == "set":
+        widget.delete(0, tkinter.END)
+        widget.insert(0, request["value"])
+        return None
+    if cmd == "invoke":
+        result = widget.invoke()
+        root.update_idletasks()
+        return None if result is None else str(result)
+    if cmd == "event":
+        widget.focus_set()
+        widget.event_generate(request["sequence"], when="now")
+        root.update_idletasks()
+        return None
+    if cmd == "canvas":
+        root.update_idletasks()
+        return canvas_items(widget)
+
+    raise ValueError(f"Unknown command: {cmd}")
+
+
+def poll(root):
+    while True:
+        try:
+            request = commands.get_nowait()
+        except queue.Empty:
+            break
+
+        try:
+            response = {"result": handle(root, request)}
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+        connection.sendall((json.dumps(response) + "\n").encode())
+
+    root.after(POLL_MS, poll, root)
+
+
+def reader():
+    with connection.makefile("r") as f:
+        for line in f:
+            commands.put(json.loads(line))
+    # Driver went away, nothing left to do
+    commands.put({"cmd": "quit"})
+
+
+def install(port):
+    for name, result in (
+        ("showerror", "ok"),
+        ("showwarning", "ok"),
+        ("showinfo", "ok"),
+        ("askyesno", True),
+        ("askokcancel", True),
+        ("askquestion", "yes"),
+        ("askretrycancel", True),
+        ("askyesnocancel", True),
+    ):
+        setattr(messagebox, name, record_dialog(name, result))
+
+    original_mainloop = tkinter.Misc.mainloop
+
+    def mainloop(self, n=0):
+        global connection
+        if connection is None:
+            connection = socket.create_connection(("127.0.0.1", port))
+            threading.Thread(target=reader, daemon=True).start()
+            root = self._root()
+            root.after(0, poll, root)
+        original_mainloop(self, n)
+
+    tkinter.Misc.mainloop = mainloop
+    tkinter.mainloop = lambda n=0: mainloop(tkinter._default_root, n)
+
+
+def main():
+    port = int(sys.argv[1])
+    program = sys.argv[2]
+    sys.argv = sys.argv[2:]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(program)))
+    install(port)
+    runpy.run_path(program, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import json
+import os
+import select
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional
+
+from ddp_validator.constants import TP04_INSTALL_HINT
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(TP04_INSTALL_HINT)
+
+from ddp_validator.types import CanvasItem, Dialog, WidgetInfo
+from ddp_validator.utils import console
+
+HARNESS_PATH = str(Path(__file__).with_name("tk_harness.py"))
+# Seconds Xvfb may take to accept connections
+XVFB_TIMEOUT = 10
+
+
+class VirtualDisplay:
+    """Runs an Xvfb server so Tkinter programs can run headless."""
+
+    def __init__(self, width: int = 1024, height: int = 768):
+        self._size = f"{width}x{height}x24"
+        self._process: Optional[subprocess.Popen] = None
+        self.display: Optional[str] = None
+
+    def start(self) -> str:
+        if shutil.which("Xvfb") is None:
+            raise Exception("Cannot find Xvfb in PATH, install xvfb first.")
+
+        # Xvfb picks a free display number itself and writes it to the pipe
+        # once it accepts connections. Guessing a free number from lock files
+        # races with other servers starting at the same time.
+        read_fd, write_fd = os.pipe()
+        try:
+            self._process = subprocess.Popen(
+                ["Xvfb", "-displayfd", str(write_fd)]
+                + ["-screen", "0", self._size, "-nolisten", "tcp"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(write_fd,),
+            )
+        finally:
+            os.close(write_fd)
+
+        with os.fdopen(read_fd) as f:
+            ready, _, _ = select.select([f], [], [], XVFB_TIMEOUT)
+            number = f.readline().strip() if ready else ""
+
+        if not number.isdigit():
+            self.stop()
+            raise Exception("Xvfb failed to start.")
+
+        self.display = f":{number}"
+        console.debug("Xvfb running on", self.display)
+        return self.display
+
+    def stop(self):
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+            self._process.wait()
+
+    def __enter__(self) -> "VirtualDisplay":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class TkDriver:
+    """Drives a Tkinter program through its widget tree.
+
+    The program is launched with tk_harness.py, which connects back to this
+    driver once the program enters mainloop and executes commands inside
+    the Tk event loop. No mouse, keyboard or screenshots are involved.
+    """
+
+    def __init__(
+        self,
+        program: str,
+        display: Optional[str] = None,
+        timeout: float = 10.0,
+        python: str = sys.executable,
+        cwd: Optional[str] = None,
+    ):
+        self._program = str(Path(program).absolute())
+        self._cwd = cwd or str(Path(self._program).parent)
+        self._display = display
+        self._timeout = timeout
+        self._python = python
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr: Any = None
+        self._socket: Optional[socket.socket] = None
+        self._file: Any = None
+
+    def start(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        server.settimeout(self._timeout)
+
+        env = dict(os.environ)
+        if self._display:
+            env["DISPLAY"] = self._display
+
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            [
+                self._python,
+                HARNESS_PATH,
+                str(server.getsockname()[1]),
+                self._program,
+            ],
+            cwd=self._cwd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr,
+        )
+
+        try:
+            self._socket, _ = server.accept()
+        except socket.timeout:
+            stderr = self.stderr()
+            self.close()
+            raise Exception(
+                "Program did not start its Tk mainloop in time.\r\n\r\n" + stderr
+            )
+        finally:
+            server.close()
+
+        self._socket.settimeout(self._timeout)
+        self._file = self._socket.makefile("rw")
+
+    def request(self, cmd: str, **kwargs: Any) -> Any:
+        assert self._file, "Driver is not started."
+        self._file.write(json.dumps({"cmd": cmd, **kwargs}) + "\n")
+        self._file.flush()
+
+        line = self._file.readline()
+        if not line:
+            raise Exception("Program exited unexpectedly!\r\n\r\n" + self.stderr())
+
+        response = json.loads(line)
+        if "error" in response:
+            raise Exception(response["error"])
+        return response["result"]
+
+    def stderr(self) -> str:
+        if not self._stderr:
+            return ""
+        self._stderr.seek(0)
+        return self._stderr.read().decode(errors="ignore")
+
+    def widgets(self, cls: Optional[str] = None) -> List[WidgetInfo]:
+        """Widgets of the program, optionally only of a Tk class, top to bottom."""
+        widgets: List[WidgetInfo] = self.request("tree")
+        if cls:
+            widgets = [w for w in widgets if w["class"] == cls]
+        return sorted(widgets, key=lambda w: (w["y"], w["x"]))
+
+    def set_value(self, path: str, value: str):
+        self.request("set", path=path, value=value)
+
+    def invoke(self, path: str) -> Optional[str]:
+        return self.request("invoke", path=path)
+
+    def send_event(self, path: str, sequence: str):
+        self.request("event", path=path, sequence=sequence)
+
+    def canvas_items(self, path: str) -> List[CanvasItem]:
+        return self.request("canvas", path=path)
+
+    def dialogs(self) -> List[Dialog]:
+        """Dialogs shown since the last call."""
+        return self.request("dialogs")
+
+    def close(self):
+        if self._file:
+            try:
+                self.request("quit")
+            except Exception:
+                pass
+            self._file.close()
+            self._file = None
+
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+        if self._process:
+            try:
+                self._process.wait(2)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+
+        if self._stderr:
+            self._stderr.close()
+            self._stderr = None
+
+    def __enter__(self) -> "TkDriver":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def render_canvas(
+    items: List[CanvasItem], width: int, height: int, dark: str = "black"
+) -> np.ndarray:
+    """Rasterize dark canvas items into a grayscale image.
+
+    Rectangles and polygons are drawn as their bounding boxes and lines as
+    boxes as thick as their width, which is enough to read barcodes without
+    a screenshot.
+    """
+    image = np.full((height, width), 255, dtype=np.uint8)
+    for item in items:
+        if item["type"] not in ("rectangle", "polygon", "line"):
+            continue
+        if item.get("fill", "").lower() not in (dark, "#000", "#000000"):
+            continue
+
+        xs, ys = item["coords"][0::2], item["coords"][1::2]
+        pad = float(item.get("width") or 1) / 2 if item["type"] == "line" else 0
+        left = max(0, round(min(xs) - pad))
+        right = min(width, round(max(xs) + pad))
+        top = max(0, round(min(ys) - pad))
+        bottom = min(height, round(max(ys) + pad))
+        image[top:bottom, left:right] = 0
+
+    return image
+
+
+def find_widget(widgets: List[WidgetInfo], cls: str, index: int = 0) -> WidgetInfo:
+    matches = [w for w in widgets if w["class"] == cls]
+    if len(matches) <= index:
+        raise Exception(f"Expected at least {index + 1} {cls} widgets.")
+    return matches[index]
@@ -0,0 +1,245 @@
+import argparse
+import os
+import random
+import string
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ddp_validator.barcode import check_digit, decode_ean13
+from ddp_validator.postscript import has_ghostscript, verify_postscript_batch
+from ddp_validator.tkdriver import TkDriver, VirtualDisplay, find_widget, render_canvas
+from ddp_validator.types import WidgetInfo
+from ddp_validator.utils import console
+
+# fmt: off
+DISALLOWED_CHARS = [
+    "/", "<", ">", ":", '"', "\\", "|", "?", "*"
+]
+DISALLOWED_NAMES = [
+    'CON', 'PRN', 'AUX', 'NUL',
+    'COM1', 'COM2', 'COM3', 'COM4', 'COM5', 'COM6', 'COM7', 'COM8', 'COM9',
+    'LPT1', 'LPT2', 'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'
+]
+# fmt: on
+
+# (save as, code, message) that should raise an error dialog
+ERROR_CASES: List[Tuple[str, str, str]] = [
+    (
+        "sample.eps",
+        "1",
+        "Code consisting of non 12-digit characters should raise error.",
+    ),
+    (
+        "sample.eps",
+        "1234567891231",
+        "Code consisting of non 12-digit characters should raise error.",
+    ),
+    (
+        "sample.eps",
+        "12345678912",
+        "Code consisting of non 12-digit characters should raise error.",
+    ),
+    ("sample.eps", "", "Empty code should raise error."),
+    ("", "123456789123", "Empty save as field should raise error."),
+    ("sample.jpg", "123456789123", "Invalid extension should raise error."),
+    *[
+        (f"samp{char}le.eps", "123456789123", "Banned char should raise error.")
+        for char in DISALLOWED_CHARS
+    ],
+    *[
+        (f"{name}.sample.eps", "123456789123", "Banned name should raise error.")
+        for name in DISALLOWED_NAMES
+    ],
+]
+
+# (save as, code) that should not raise an error dialog
+PASSING_CASES: List[Tuple[str, str]] = [
+    *[(f"sample.{name}.eps", "123456789123") for name in DISALLOWED_NAMES],
+    ("sample.eps", "123456789123"),
+    ("sample.ps", "123456789123"),
+]
+
+
+class TP04Window:
+    """Widgets of the EAN-13 program, located through the widget tree."""
+
+    def __init__(self, driver: TkDriver):
+        self.driver = driver
+        widgets = driver.widgets()
+        self.saveas: WidgetInfo = find_widget(widgets, "Entry", 0)
+        self.code: WidgetInfo = find_widget(widgets, "Entry", 1)
+        self.canvas: WidgetInfo = find_widget(widgets, "Canvas", 0)
+
+    def submit(self, saveas: str, code: str):
+        self.driver.set_value(self.saveas["path"], saveas)
+        self.driver.set_value(self.code["path"], code)
+        self.driver.send_event(self.code["path"], "<Return>")
+        return self.driver.dialogs()
+
+    def read_barcode(self) -> Optional[str]:
+        items = self.driver.canvas_items(self.canvas["path"])
+        image = render_canvas(items, self.canvas["width"], self.canvas["height"])
+        return decode_ean13(image)
+
+
+def check_validation(window: TP04Window) -> List[str]:
+    failures: List[str] = []
+    for saveas, code, message in ERROR_CASES:
+        if not window.submit(saveas, code):
+            failures.append(f"{message} (save as {saveas!r}, code {code!r})")
+
+    for saveas, code in PASSING_CASES:
+        if window.submit(saveas, code):
+            failures.append(
+                f"Unexpected error for save as {saveas!r}, code {code!r}."
+                " Output should be correct."
+            )
+
+    return failures
+
+
+def random_code() -> str:
+    code = str(random.randint(10**11, 10**12 - 1))
+    return code + check_digit(code)
+
+
+def check_codes(
+    window: TP04Window, codes: List[str], workdir: str
+) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Generate barcodes and read them back from the canvas.
+
+    Returns:
+        Tuple[List[str], List[Tuple[str, str]]]: Failures, and generated
+            PostScript files with their expected code.
+    """
+    failures: List[str] = []
+    postscript_items: List[Tuple[str, str]] = []
+    for code in codes:
+        fname = "".join(random.choice(string.ascii_letters) for _ in range(8)) + ".eps"
+        dialogs = window.submit(fname, code[:-1])
+        if dialogs:
+            failures.append(f"Unexpected error for code {code[:-1]}: {dialogs[0]}")
+            continue
+
+        decoded = window.read_barcode()
+        if decoded != code:
+            failures.append(f"GUI barcode: expected {code}, got {decoded}")
+        postscript_items.append((str(Path(workdir) / fname), code))
+
+    return failures, postscript_items
+
+
+def run_instance(
+    program: str,
+    display: Optional[str],
+    codes: List[str],
+    validate: bool,
+    workdir: str,
+) -> Tuple[List[str], List[Tuple[str, str]]]:
+    os.makedirs(workdir)
+    with TkDriver(program, display, cwd=workdir) as driver:
+        window = TP04Window(driver)
+        failures = check_validation(window) if validate else []
+        code_failures, postscript_items = check_codes(window, codes, workdir)
+
+    return failures + code_failures, postscript_items
+
+
+def check_postscript(postscript_items: List[Tuple[str, str]]) -> List[str]:
+    failures: List[str] = []
+    existing = [(p, c) for p, c in postscript_items if os.path.exists(p)]
+    if len(existing) < len(postscript_items):
+        failures.append(
+            f"{len(postscript_items) - len(existing)} PostScript files were not saved."
+        )
+
+    if not has_ghostscript():
+        console.print(
+            "[on yellow]WARN:[/on yellow] Cannot find Ghostscript in PATH,",
+            f"skipping barcode check of {len(existing)} PostScript files.",
+        )
+        return failures
+
+    for r in verify_postscript_batch(existing):
+        if not r["passed"]:
+            failures.append(
+                f"PostScript {Path(r['path']).name}: expected {r['expected']},"
+                f" got {r['decoded']} {r['message']}"
+            )
+    return failures
+
+
+def run(
+    program: str,
+    tests: int,
+    instances: int,
+    validate: bool,
+    display: Optional[str],
+) -> bool:
+    codes = [random_code() for _ in range(tests)]
+    with tempfile.TemporaryDirectory(prefix="tp04-") as tempdir:
+        with ThreadPoolExecutor(instances) as executor:
+            futures = [
+                executor.submit(
+                    run_instance,
+                    program,
+                    display,
+                    codes[i::instances],
+                    # Validation only needs to happen once
+                    validate and i == 0,
+                    os.path.join(tempdir, str(i)),
+                )
+                for i in range(instances)
+            ]
+            results = [f.result() for f in futures]
+
+        failures = [f for r in results for f in r[0]]
+        postscript_items = [p for r in results for p in r[1]]
+        failures.extend(check_postscript(postscript_items))
+
+    for f in failures:
+        console.print("[white on red]FAILED:[/white on red]", f)
+
+    if failures:
+        console.print(f"{len(failures)} checks failed :(")
+    else:
+        console.print(f"All {tests} barcodes and validations passed!")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless TP04 tester.")
+    parser.add_argument("program", help="Path to TP04 program")
+    parser.add_argument("tests", type=int, nargs="?", default=10)
+    parser.add_argument("--instances", "-n", type=int, default=1)
+    parser.add_argument("--skip-validation", action="store_true")
+    parser.add_argument(
+        "--xvfb",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Run on a virtual display, defaults to when DISPLAY is not set",
+    )
+    args = parser.parse_args()
+
+    use_xvfb = args.xvfb if args.xvfb is not None else not os.environ.get("DISPLAY")
+    if not use_xvfb:
+        ok = run(
+            args.program, args.tests, args.instances, not args.skip_validation, None
+        )
+    else:
+        with VirtualDisplay() as display:
+            ok = run(
+                args.program,
+                args.tests,
+                args.instances,
+                not args.skip_validation,
+                display.display,
+            )
+
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,267 @@
-from typing import Optional, TypedDict
+from typing import Dict, List, Literal, NamedTuple, Optional, Tuple, TypedDict
+
+Verdict = Literal["passed", "failed", "error", "output_file"]
 
 
 class _TestDictBase(TypedDict):
-    input: str
-    output: str
     subset: bool
 
 
 class TestDict(_TestDictBase, total=False):
+    input: str
+    output: str
+    stdin_file: str
+    stdout_file: str
     expected_file: str
     output_file: str
+    type: str
+    generator: str
+    reference: str
+    count: int
+    size: int
+    seed: int
+    timeout: float
+    sizes: List[int]
+    inputs: List[str]
+    bound: str
+    repeat: int
+    tolerance: float
 
 
-class Test(TypedDict):
+class Test(NamedTuple):
+    """Parsed test case, immutable so it can be shared between testers."""
+
     title: str
     stdin: str
-    stdout: str
+    stdout: Optional[str]
     subset: bool
     expected_file: Optional[str]
     output_file: Optional[str]
     has_regex: bool
+    stdin_file: Optional[str] = None
+    stdout_file: Optional[str] = None
+    # Seconds the program may run, overriding calibrated and suite timeouts
+    timeout: Optional[float] = None
+
+
+class GeneratorCase(TypedDict):
+    title: str
+    generator: str
+    reference: Optional[str]
+    count: int
+    size: int
+    seed: int
+
+
+class ComplexityCase(TypedDict):
+    title: str
+    # Input sizes to measure, in increasing order
+    sizes: List[int]
+    # Command generating input of {size} with {seed}, if inputs are not given
+    generator: Optional[str]
+    # Data file of each size, if there is no generator
+    inputs: List[str]
+    # Highest accepted growth, such as "n log n"
+    bound: str
+    repeat: int
+    seed: int
+    # How much worse than the best fit a simpler model may fit and still count
+    tolerance: float
+
+
+class ComplexityResult(TypedDict):
+    title: str
+    passed: bool
+    # CPU seconds the program took at each size
+    times: List[float]
+    # Simplest growth model fitting the times
+    model: Optional[str]
+    message: str
+
+
+class TimeoutPolicy(NamedTuple):
+    """How long cases may run, in seconds."""
+
+    # Limit of cases without their own or a calibrated timeout
+    default: float = 60.0
+    # Calibrated durations are multiplied by this to get the limit...
+    multiplier: float = 3.0
+    # ...which is never lower than this, to absorb start-up jitter
+    floor: float = 2.0
+
+
+class Suite(NamedTuple):
+    """Parsed test suite, independent of the program being tested."""
+
+    language: str
+    compile_command: str
+    cmd_args: Tuple[str, ...]
+    only_stdout: bool
+    # Path to the reference program, if any
+    reference: Optional[str]
+    tests: Tuple[Test, ...]
+    generators: Tuple[GeneratorCase, ...]
+    timeouts: TimeoutPolicy = TimeoutPolicy()
+    # Launch profile of the program, "default" or "fast"
+    launch: str = "default"
+    complexity: Tuple[ComplexityCase, ...] = ()
+
+
+class StressResult(TypedDict):
+    seed: int
+    size: int
+    passed: bool
+    input: str
+    expected: List[str]
+    actual: List[str]
+    message: str
 
 
 class Classification(TypedDict):
     name: str
     identifier: str
     path: str
+
+
+class _TestResultBase(TypedDict):
+    title: str
+    verdict: Verdict
+    duration: float
+    message: str
+
+
+class HotFunction(TypedDict):
+    name: str
+    # Fraction of the profiled time spent in the function itself
+    share: float
+
+
+class TestResult(_TestResultBase, total=False):
+    # Peak resident memory of the program in KiB, when it was measured
+    rss: int
+    # Raw profile of the run and its hottest functions, when profiled
+    profile: str
+    hot: List[HotFunction]
+
+
+class CaseSummary(TypedDict):
+    suite: str
+    title: str
+    runs: int
+    passed: int
+    mean_duration: float
+    p95_duration: float
+    max_rss: int
+
+
+class GradeReport(TypedDict):
+    program: str
+    results: List[TestResult]
+    passed: int
+    total: int
+    # Set when the program could not be compiled or graded
+    error: Optional[str]
+
+
+class ProcessStats(TypedDict, total=False):
+    rss: int
+
+
+class Submission(TypedDict):
+    name: str
+    filename: str
+    source: str
+    # Other sources next to the program by file name, which it may use
+    siblings: Dict[str, str]
+    suite: str
+    # Where the suite came from, to tell apart cases of different suites
+    suite_path: str
+    titles: List[str]
+    # Hash of the source ignoring whitespace and comments
+    fingerprint: str
+
+
+class WorkUnit(TypedDict):
+    id: int
+    submission: int
+    title: str
+
+
+class CaseHistory(TypedDict):
+    failed: bool
+    duration: float
+
+
+class Calibration(TypedDict):
+    # Typical duration of the case in seconds
+    duration: float
+    # "reference" if measured from the reference, "history" if from passing runs
+    source: str
+
+
+class CompileResult(TypedDict):
+    # Directory the classes were compiled into
+    classes: str
+    ok: bool
+    diagnostics: str
+
+
+class PostscriptResult(TypedDict):
+    path: str
+    expected: str
+    decoded: Optional[str]
+    passed: bool
+    duration: float
+    message: str
+
+
+WidgetInfo = TypedDict(
+    "WidgetInfo",
+    {
+        "path": str,
+        "class": str,
+        "x": int,
+        "y": int,
+        "width": int,
+        "height": int,
+        "text": str,
+        "value": str,
+    },
+    total=False,
+)
+
+
+class CanvasItem(TypedDict, total=False):
+    id: int
+    type: str
+    coords: List[float]
+    fill: str
+    outline: str
+    text: str
+    width: str
+
+
+class Dialog(TypedDict):
+    kind: str
+    title: Optional[str]
+    message: Optional[str]
+
+
+class LoadSample(NamedTuple):
+    """State of the machine as seen by the admission controller."""
+
+    # Runnable tasks per CPU, smoothed over recent samples
+    load: float
+    # Memory the kernel could hand out without swapping, in KiB, if known
+    available: Optional[int]
+    # Running programs started by us, and their mean resident memory in KiB
+    children: int
+    child_rss: int
+
+
+class AdmissionDecision(TypedDict):
+    # Seconds since the controller started
+    elapsed: float
+    previous: int
+    limit: int
+    reason: str
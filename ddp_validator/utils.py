@@ -1,52 +1,183 @@
 import asyncio
 from asyncio.subprocess import PIPE
+import gzip
+import json
+import os
 from pathlib import Path
+import signal
 import sys
-import time
-from typing import Any, Callable, Generic, List, Optional, Tuple, TypeVar
+from typing import (
+    IO,
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from rich.console import Console
 from rich.prompt import Prompt
 
-from ddp_validator.types import Classification
+from ddp_validator.eventlog import EventLogger
+from ddp_validator.types import Classification, ProcessStats
 
-F = TypeVar("F", bound=Callable[..., Any])
-
-
-class copy_signature(Generic[F]):
-    def __init__(self, target: F) -> None:
-        ...
-
-    def __call__(self, wrapped: Callable[..., Any]) -> F:
-        return wrapped  # type: ignore
+T = TypeVar("T")
 
 
 class DebuggableConsole(Console):
-    @copy_signature(Console.__init__)
-    def __init__(self, *args, **kwargs):
-        self._debug = False
-        super().__init__(*args, **kwargs)
+    """Console whose debug output goes through the event logger."""
 
     def set_debug(self, value: bool):
-        self._debug = value
+        logger.set_echo(bool(value))
 
-    @copy_signature(Console.log)
-    def debug(self, *args, **kwargs):
-        if self._debug:
-            return self.log(*args, **kwargs)
+    def debug(self, *args: Any, **fields: Any):
+        logger.debug(*args, **fields)
 
 
 console = DebuggableConsole()
+logger = EventLogger(console)
+
+# Size of chunks streamed into stdin of programs
+STREAM_CHUNK_SIZE = 64 * 1024
+# At most this much stderr is kept from streamed programs
+MAX_STDERR_SIZE = 64 * 1024
+# Longest single output line accepted from streamed programs
+MAX_LINE_SIZE = 16 * 1024 * 1024
+# Seconds between memory samples of running programs
+RSS_INTERVAL = 0.05
+# Seconds an interactive program may take to print its first output
+BOOT_TIMEOUT = 2.5
+# Seconds without output after which an interactive program is assumed to
+# wait for input
+IDLE_TIMEOUT = 0.25
+# Seconds an interrupted program gets to exit before it is killed
+INTERRUPT_GRACE = 2.0
+# Directories that hold build output or environments rather than sources
+IGNORED_SOURCE_DIRS = {"__pycache__", "build", "out", "venv", "node_modules"}
+
+
+def read_rss(pid: int, field: str = "VmRSS") -> int:
+    """Resident memory of a running process in KiB, 0 if it cannot be read.
+
+    Only works on Linux. Use VmHWM as field to get the peak instead.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+async def sample_peak_rss(process: asyncio.subprocess.Process, stats: ProcessStats):
+    while process.returncode is None:
+        rss = read_rss(process.pid, "VmHWM")
+        if not rss:
+            # Exited, or memory cannot be read on this platform
+            return
+        stats["rss"] = max(stats.get("rss", 0), rss)
+        await asyncio.sleep(RSS_INTERVAL)
+
+
+def track_rss(
+    process: asyncio.subprocess.Process, stats: Optional[ProcessStats]
+) -> Optional["asyncio.Future[None]"]:
+    """Keep the peak memory of process in stats, if given, until stopped."""
+    if stats is None:
+        return None
+    return asyncio.ensure_future(sample_peak_rss(process, stats))
+
+
+async def stop_tracking(sampler: Optional["asyncio.Future[None]"]):
+    if sampler:
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+
+
+def timed_out(timeout: Optional[float]) -> Exception:
+    return Exception(f"Program timed out after {timeout:g}s")
+
+
+def kill(process: asyncio.subprocess.Process):
+    # Workaround for ProcessLookupError
+    # https://stackoverflow.com/questions/64342460/calling-terminate-on-asyncio-subprocess-raises-processlookuperror
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+_interrupt_first = False
+
+
+def set_interrupt_first(value: bool):
+    """Whether programs are interrupted before being killed.
+
+    Interrupted programs get INTERRUPT_GRACE seconds to exit, which lets
+    profilers write out what they recorded so far.
+    """
+    global _interrupt_first
+    _interrupt_first = value
 
 
-async def run_command_stdout(test_stdin: List[str], *args) -> List[str]:
+async def terminate(process: asyncio.subprocess.Process):
+    """Stop a program and wait for it to exit."""
+    if _interrupt_first and sys.platform != "win32" and process.returncode is None:
+        try:
+            process.send_signal(signal.SIGINT)
+            await asyncio.wait_for(process.wait(), INTERRUPT_GRACE)
+        except (ProcessLookupError, asyncio.TimeoutError):
+            pass
+
+    kill(process)
+    await process.wait()
+
+
+async def kill_after(
+    process: asyncio.subprocess.Process,
+    awaitable: Awaitable[T],
+    timeout: Optional[float],
+) -> T:
+    """Await work on a process, killing it once timeout seconds have passed.
+
+    Raises:
+        Exception: If the process timed out.
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        console.debug("Killing program after", timeout, "seconds.")
+        await terminate(process)
+        raise timed_out(timeout)
+
+
+async def run_command_stdout(
+    test_stdin: Iterable[str],
+    *args,
+    cwd: Optional[str] = None,
+    stats: Optional[ProcessStats] = None,
+    timeout: Optional[float] = None,
+) -> List[str]:
     console.debug("Running command:", " ".join(args))
     console.debug("stdin:", test_stdin)
 
     process = await asyncio.create_subprocess_exec(
-        *args, stdout=PIPE, stderr=PIPE, stdin=PIPE
+        *args, stdout=PIPE, stderr=PIPE, stdin=PIPE, cwd=cwd
     )
-    stdout, stderr = await process.communicate("\n".join(test_stdin).encode())
+    sampler = track_rss(process, stats)
+    try:
+        stdout, stderr = await kill_after(
+            process, process.communicate("\n".join(test_stdin).encode()), timeout
+        )
+    finally:
+        await stop_tracking(sampler)
 
     if stderr:
         raise Exception("Program errored!\r\n\r\n" + stderr.decode())
@@ -57,70 +188,198 @@ async def run_command_stdout(test_stdin: List[str], *args) -> List[str]:
     ]
 
 
-async def run_command(
-    test_stdin: List[str], *args, only_stdout: bool = False
-) -> List[str]:
-    """Runs command based on args with given stdin
+def open_data_file(path: str) -> IO[bytes]:
+    """Open test data for reading, decompressing .gz and .zst files on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception(
+                "Install zstandard to read .zst test data:"
+                " pip install 'DDP-Validator[zstd]'"
+            )
+
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), closefd=True
+        )
+
+    return open(path, "rb")
+
+
+def iter_data_chunks(path: str) -> Iterator[bytes]:
+    """Lazily read a test data file in chunks of STREAM_CHUNK_SIZE bytes."""
+    with open_data_file(path) as f:
+        yield from iter(lambda: f.read(STREAM_CHUNK_SIZE), b"")
+
+
+def iter_data_lines(path: str) -> Iterator[str]:
+    """Lazily read lines of a test data file, without line endings."""
+    with open_data_file(path) as f:
+        for line in f:
+            yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+async def write_chunks(writer: asyncio.StreamWriter, chunks: Iterable[bytes]):
+    """Write chunks, waiting for the reader to catch up after each one."""
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+            await writer.drain()
+        writer.close()
+    except (BrokenPipeError, ConnectionResetError):
+        # Program does not need the rest of its input
+        console.debug("Program closed its stdin early.")
+
+
+async def read_limited(reader: asyncio.StreamReader, limit: int) -> bytes:
+    """Read a stream to its end, keeping only about its first limit bytes."""
+    data = b""
+    while True:
+        chunk = await reader.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return data
+        if len(data) < limit:
+            data += chunk
+
+
+async def run_command_streaming(
+    stdin_chunks: Iterable[bytes],
+    on_line: Callable[[str], bool],
+    *args,
+    cwd: Optional[str] = None,
+    stats: Optional[ProcessStats] = None,
+    timeout: Optional[float] = None,
+):
+    """Runs command while streaming both stdin and stdout.
+
+    Input is written in chunks, waiting for the program to consume each one,
+    and output lines are handed to on_line as soon as they arrive, so memory
+    use does not depend on the size of the input or output.
 
     Args:
-        test_stdin (List[str]): List of string to send as stdin.
+        stdin_chunks (Iterable[bytes]): Chunks to send as stdin, read lazily.
+        on_line (Callable[[str], bool]): Called with each decoded stdout line,
+            returning False stops the program early.
         *args (List[str]): Command to execute, splitted by space.
-        only_stdout (boolean): Whether to only look at stdout or combine stdin.
-
-    Returns:
-        List[str]: Combined stdout and stdin of program.
+        cwd (Optional[str]): Directory to run the command in.
+        stats (Optional[ProcessStats]): Filled with peak memory of the program.
+        timeout (Optional[float]): Seconds after which the program is killed.
     """
-    if only_stdout:
-        return await run_command_stdout(test_stdin, *args)
-
     console.debug("Running command:", " ".join(args))
-    console.debug("stdin:", test_stdin)
 
     process = await asyncio.create_subprocess_exec(
-        *args, stdout=PIPE, stderr=PIPE, stdin=PIPE
+        *args, stdout=PIPE, stderr=PIPE, stdin=PIPE, cwd=cwd, limit=MAX_LINE_SIZE
     )
+    sampler = track_rss(process, stats)
     assert process.stdin
     assert process.stdout
     assert process.stderr
 
-    console.debug("Sleeping for 1s to let program boot up")
-    await asyncio.sleep(2.5)
+    writer = asyncio.ensure_future(write_chunks(process.stdin, stdin_chunks))
+    stderr_reader = asyncio.ensure_future(read_limited(process.stderr, MAX_STDERR_SIZE))
+
+    async def pump() -> bool:
+        """Hand output lines to on_line, False if it stopped the program."""
+        assert process.stdout
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                return True
+
+            if not on_line(line.decode("utf-8", errors="replace").rstrip("\r\n")):
+                console.debug("Stopping program early.")
+                return False
+
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+
+    stopped = False
+    try:
+        stopped = not await asyncio.wait_for(pump(), timeout)
+        if not stopped and deadline is not None:
+            # Closing stdout does not mean the program is done
+            await asyncio.wait_for(process.wait(), max(0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        stopped = True
+        raise timed_out(timeout)
+    except BaseException:
+        stopped = True
+        raise
+    finally:
+        if stopped:
+            await terminate(process)
+        await process.wait()
+        await stop_tracking(sampler)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+
+    stderr_data = await stderr_reader
+    if stderr_data:
+        raise Exception("Program errored!\r\n\r\n" + stderr_data.decode())
+
+
+async def read_until_idle(
+    stream: asyncio.StreamReader, wait: float
+) -> Tuple[str, bool]:
+    """Read output of a program until it goes quiet to wait for input.
+
+    Args:
+        stream (asyncio.StreamReader): Output of the program.
+        wait (float): Seconds to wait for the first output.
+
+    Returns:
+        Tuple[str, bool]: Output read, and whether the program closed it.
+    """
+    data = b""
+    while True:
+        try:
+            chunk = await asyncio.wait_for(stream.read(STREAM_CHUNK_SIZE), wait)
+        except asyncio.TimeoutError:
+            return data.decode(errors="ignore"), False
+
+        if not chunk:
+            return data.decode(errors="ignore"), True
+
+        data += chunk
+        wait = IDLE_TIMEOUT
+
+
+async def interact(
+    process: asyncio.subprocess.Process, test_stdin: Iterable[str]
+) -> str:
+    """Feed stdin line by line whenever the program stops writing.
+
+    Returns:
+        str: Combined stdout and stdin of program.
+    """
+    assert process.stdin
+    assert process.stdout
+    assert process.stderr
 
     combined_io = ""
-    i = 0
+    # Give the program time to boot before it prints its first prompt
+    wait = BOOT_TIMEOUT
     for submitting_line in test_stdin:
-        start = time.time()
-        # Essentially, what we are doing here is to get each character
-        # every time, and if a timeout occurs, that means that the program
-        # has reached its end for current line.
-        while True:
-            try:
-                c = await asyncio.wait_for(process.stdout.read(1), 0.25)
-                if c == b"":
-                    curr = time.time()
-                    if curr - start > 5:
-                        console.debug("Giving up due to inactivity.")
-                        raise Exception("Program lagged for a long time, exiting...")
-
-                    current_stderr = await asyncio.wait_for(process.stderr.read(), 0.25)
-                    if current_stderr:
-                        raise Exception(
-                            "Error occured!\r\n\r\n" + current_stderr.decode()
-                        )
-
-                combined_io += c.decode()
-            except asyncio.TimeoutError:
-                break
-            except BaseException as e:
-                raise e
+        output, ended = await read_until_idle(process.stdout, wait)
+        combined_io += output
+        wait = IDLE_TIMEOUT
+        if ended:
+            console.debug("Program closed its output, not sending more input.")
+            break
 
         # All of stdout is done, we can send what we sent to stdin now.
         console.debug("Writing line:", submitting_line)
-        process.stdin.write(submitting_line.encode() + b"\r\n")
-        await process.stdin.drain()
+        try:
+            process.stdin.write(submitting_line.encode() + b"\r\n")
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            console.debug("Program closed its stdin early.")
+            break
 
         combined_io += submitting_line + "\n"
-        i += 1
 
     stderr = (await process.stderr.read()).decode()
     if stderr:
@@ -128,10 +387,52 @@ async def run_command(
 
     console.debug("Program finishes, exiting")
     combined_io += (await process.stdout.read()).decode(errors="ignore")
-    # Workaround for ProcessLookupError
-    # https://stackoverflow.com/questions/64342460/calling-terminate-on-asyncio-subprocess-raises-processlookuperror
-    if process.returncode is None:
-        process.kill()
+    try:
+        # Killing a program that already exited races the child watcher
+        await asyncio.wait_for(process.wait(), IDLE_TIMEOUT)
+    except asyncio.TimeoutError:
+        kill(process)
+        await process.wait()
+    return combined_io
+
+
+async def run_command(
+    test_stdin: Iterable[str],
+    *args,
+    only_stdout: bool = False,
+    cwd: Optional[str] = None,
+    stats: Optional[ProcessStats] = None,
+    timeout: Optional[float] = None,
+) -> List[str]:
+    """Runs command based on args with given stdin
+
+    Args:
+        test_stdin (Iterable[str]): Lines to send as stdin.
+        *args (List[str]): Command to execute, splitted by space.
+        only_stdout (boolean): Whether to only look at stdout or combine stdin.
+        cwd (Optional[str]): Directory to run the command in.
+        stats (Optional[ProcessStats]): Filled with peak memory of the program.
+        timeout (Optional[float]): Seconds after which the program is killed.
+
+    Returns:
+        List[str]: Combined stdout and stdin of program.
+    """
+    if only_stdout:
+        return await run_command_stdout(
+            test_stdin, *args, cwd=cwd, stats=stats, timeout=timeout
+        )
+
+    console.debug("Running command:", " ".join(args))
+    console.debug("stdin:", test_stdin)
+
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=PIPE, stderr=PIPE, stdin=PIPE, cwd=cwd
+    )
+    sampler = track_rss(process, stats)
+    try:
+        combined_io = await kill_after(process, interact(process, test_stdin), timeout)
+    finally:
+        await stop_tracking(sampler)
 
     return [
         s.encode("unicode_escape").decode("utf-8")
@@ -139,6 +440,24 @@ async def run_command(
     ]
 
 
+def source_files(program: Path) -> List[Path]:
+    """Sources a program may use: files in its language under its directory.
+
+    javac finds classes of subpackages through -sourcepath and Python
+    imports them, so subdirectories count too. Hidden directories, like
+    .git or .venv, and directories of build output do not.
+    """
+    found: List[Path] = []
+    for root, dirs, files in os.walk(program.parent):
+        dirs[:] = sorted(
+            d for d in dirs if not d.startswith(".") and d not in IGNORED_SOURCE_DIRS
+        )
+        found += [
+            Path(root) / name for name in sorted(files) if name.endswith(program.suffix)
+        ]
+    return found
+
+
 def get_program(dir: Path) -> Path:
     """Get program from directory, if there are multiple programs,
     then ask user for one and return it.
@@ -220,3 +539,22 @@ def find_gradlew(dir: Path):
             dir = dir.parent
 
     raise Exception("Cannot find gradlew.")
+
+
+def load_json(path: Path, default: Any) -> Any:
+    """Load JSON file, returning default if it does not exist or is corrupted."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        console.debug("Cannot load", str(path), "using default")
+        return default
+
+
+def save_json(path: Path, data: Any):
+    """Atomically write data as JSON, creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,53 @@
+from ddp_validator.admission import (
+    ADJUST_INTERVAL,
+    DECREASE_HOLD,
+    MEMORY_RESERVE,
+    AdmissionController,
+)
+from ddp_validator.types import LoadSample
+
+IDLE = LoadSample(load=0.1, available=8 * 1024 * 1024, children=1, child_rss=50000)
+
+
+def test_grows_while_saturated_and_idle():
+    controller = AdmissionController(4)
+    now = 100.0
+    controller.decide(IDLE, running=controller.limit, now=now)
+    assert controller.limit == 3
+
+    # Not saturated, no reason to admit more
+    now += ADJUST_INTERVAL
+    controller.decide(IDLE, running=1, now=now)
+    assert controller.limit == 3
+
+    for _ in range(3):
+        now += ADJUST_INTERVAL
+        controller.decide(IDLE, running=controller.limit, now=now)
+    assert controller.limit == 4
+
+
+def test_halves_under_pressure_and_holds():
+    controller = AdmissionController(16)
+    for i in range(6):
+        controller.decide(IDLE, controller.limit, 100.0 + i * ADJUST_INTERVAL)
+    assert controller.limit == 8
+
+    busy = IDLE._replace(load=2.0)
+    controller.decide(busy, controller.limit, 110.0)
+    assert controller.limit == 4
+
+    controller.decide(IDLE, controller.limit, 110.0 + ADJUST_INTERVAL)
+    assert controller.limit == 4
+    controller.decide(IDLE, controller.limit, 110.0 + DECREASE_HOLD)
+    assert controller.limit == 5
+
+    low = IDLE._replace(available=MEMORY_RESERVE)
+    controller.decide(low, controller.limit, 120.0)
+    assert controller.limit == 2
+    assert [d["limit"] for d in controller.decisions][-3:] == [4, 5, 2]
+
+
+def test_fixed_jobs_never_change():
+    controller = AdmissionController.for_jobs(3)
+    assert controller.update(running=3) == 3
+    assert not controller.decisions
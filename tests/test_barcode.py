@@ -0,0 +1,25 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ddp_validator.barcode import check_digit, decode_ean13, encode_ean13  # noqa: E402
+
+
+@pytest.mark.parametrize("code", ["123456789012", "000000000000", "978020137962"])
+def test_roundtrip(code):
+    assert decode_ean13(encode_ean13(code)) == code + check_digit(code)
+
+
+def test_decode_rgb_with_uneven_scale_and_noise():
+    image = encode_ean13("590123412345", module_width=3).astype(np.int16)
+    rng = np.random.default_rng(0)
+    image = np.clip(image + rng.integers(-40, 40, image.shape), 0, 255)
+    rgb = np.stack([image] * 3, axis=-1).astype(np.uint8)
+
+    assert decode_ean13(rgb) == "5901234123457"
+
+
+def test_decode_upside_down_and_blank():
+    image = encode_ean13("400638133393")
+    assert decode_ean13(image[:, ::-1]) == "4006381333931"
+    assert decode_ean13(np.full((20, 200), 255, dtype=np.uint8)) is None
@@ -0,0 +1,109 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from ddp_validator import compileserver
+from ddp_validator.compileserver import CompileServer
+
+needs_jdk = pytest.mark.skipif(
+    shutil.which("javac") is None, reason="Compile server needs a JDK"
+)
+
+# Speaks the protocol of the compile server without a JDK: "compiles" by
+# touching Main.class, fails sources containing "error" and exits on "crash"
+FAKE_SERVER = """
+import os, sys
+log = sys.argv[1]
+for line in sys.stdin:
+    request_id, out, sourcepath, program = line.rstrip("\\n").split("\\t")
+    with open(log, "a") as f:
+        f.write(program + "\\n")
+    with open(program) as f:
+        source = f.read()
+    if "crash" in source:
+        sys.exit(1)
+
+    ok = "error" not in source
+    os.makedirs(out)
+    if ok:
+        open(os.path.join(out, "Main.class"), "w").close()
+    data = b"" if ok else "Main.java:1: error: caf\\u00e9 expected\\n".encode()
+    status = "ok" if ok else "error"
+    sys.stdout.buffer.write(f"{request_id}\\t{status}\\t{len(data)}\\n".encode())
+    sys.stdout.buffer.write(data)
+    sys.stdout.flush()
+"""
+
+
+@pytest.fixture
+def fake_server(tmp_path, monkeypatch):
+    script = tmp_path / "fake_server.py"
+    script.write_text(FAKE_SERVER)
+    log = tmp_path / "requests.log"
+    log.touch()
+    monkeypatch.setattr(compileserver, "CLASSES_DIR", tmp_path / "classes")
+    monkeypatch.setattr(
+        compileserver, "server_command", lambda: [sys.executable, str(script), str(log)]
+    )
+
+    server = CompileServer()
+    yield server, lambda: log.read_text().splitlines()
+    server.close()
+
+
+def write_program(directory: Path, source: str) -> str:
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "Main.java").write_text(source)
+    return str(directory / "Main.java")
+
+
+def test_protocol_framing_and_cache(tmp_path, fake_server):
+    server, requests = fake_server
+    good = write_program(tmp_path / "good", "class Main {}")
+    bad = write_program(tmp_path / "bad", "class Main { error }")
+
+    ok, failed = server.compile_many([good, bad])
+    assert ok["ok"] and (Path(ok["classes"]) / "Main.class").exists()
+    # Diagnostics are framed by their length in bytes, not characters
+    assert not failed["ok"]
+    assert failed["diagnostics"] == "Main.java:1: error: caf\u00e9 expected\n"
+    assert not Path(failed["classes"]).exists()
+
+    assert server.compile(good)["classes"] == ok["classes"]
+    assert len(requests()) == 2
+
+    # javac also reads classes of subpackages through -sourcepath
+    write_program(tmp_path / "good" / "util", "class Helper {}")
+    assert server.compile(good)["classes"] != ok["classes"]
+    assert len(requests()) == 3
+
+
+def test_pending_requests_fail_when_server_exits(tmp_path, fake_server):
+    server, _ = fake_server
+    crash = write_program(tmp_path / "crash", "class Main { crash }")
+
+    with pytest.raises(Exception, match="exited unexpectedly"):
+        server.compile(crash)
+
+
+@needs_jdk
+def test_compiles_batch_into_separate_directories(tmp_path, monkeypatch):
+    monkeypatch.setattr(compileserver, "SERVER_DIR", tmp_path / "server")
+    monkeypatch.setattr(compileserver, "CLASSES_DIR", tmp_path / "classes")
+    for name, source in (("good", "class Main {}"), ("bad", "class Main {")):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "Main.java").write_text(source)
+
+    server = CompileServer()
+    try:
+        good, bad = server.compile_many(
+            [str(tmp_path / "good" / "Main.java"), str(tmp_path / "bad" / "Main.java")]
+        )
+    finally:
+        server.close()
+
+    assert good["ok"]
+    assert (Path(good["classes"]) / "Main.class").exists()
+    assert not bad["ok"] and "Main.java" in bad["diagnostics"]
@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from ddp_validator.detector import find_boxes  # noqa: E402
+from ddp_validator.detector import match_template, wait_for_template  # noqa: E402
+
+
+def make_screen():
+    rng = np.random.default_rng(0)
+    screen = rng.integers(0, 255, (300, 400, 3), dtype=np.uint8)
+    needle = rng.integers(0, 255, (40, 60, 3), dtype=np.uint8)
+    screen[123:163, 217:277] = needle
+    return screen, needle
+
+
+def test_match_template_finds_needle():
+    screen, needle = make_screen()
+    assert match_template(screen, needle) == (217, 123, 60, 40)
+
+
+def test_match_template_missing_needle():
+    screen, needle = make_screen()
+    assert match_template(screen[:100], needle) is None
+
+
+def test_wait_for_template_polls_until_found():
+    screen, needle = make_screen()
+    frames = [np.zeros_like(screen), np.zeros_like(screen), screen]
+
+    def grab():
+        return frames.pop(0) if len(frames) > 1 else frames[0]
+
+    assert wait_for_template(grab, needle, timeout=1, interval=0) == (217, 123, 60, 40)
+    assert wait_for_template(lambda: screen[:100], needle, timeout=0) is None
+
+
+def test_find_boxes():
+    image = np.full((200, 200), 255, dtype=np.uint8)
+    image[20:40, 10:150] = 0
+    image[22:38, 12:148] = 255
+    image[100:130, 10:150] = 0
+    image[102:128, 12:148] = 255
+
+    boxes = find_boxes(image)
+    assert [b[1] for b in boxes] == sorted(b[1] for b in boxes)
+    assert any(b[:2] == (10, 100) for b in boxes)
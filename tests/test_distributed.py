@@ -0,0 +1,122 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+from ddp_validator import distributed
+from ddp_validator.compileserver import source_hash
+from ddp_validator.distributed import (
+    Coordinator,
+    CoordinatorServer,
+    collect_submissions,
+    write_submission,
+)
+
+
+def make_submission(name, titles):
+    return {
+        "name": name,
+        "filename": "main.py",
+        "source": "",
+        "siblings": {},
+        "suite": "",
+        "suite_path": "suite.toml",
+        "titles": titles,
+        "fingerprint": name,
+    }
+
+
+def test_expired_lease_is_requeued():
+    coordinator = Coordinator([make_submission("a", ["1", "2"])], lease_timeout=0.01)
+
+    first = coordinator.lease("w1")
+    assert first is not None
+    time.sleep(0.02)
+    coordinator.reap()
+
+    again = coordinator.lease("w2")
+    assert again is not None and again["id"] == first["id"]
+
+
+def test_results_are_aggregated_in_declared_order():
+    coordinator = Coordinator([make_submission("a", ["1", "2"])])
+    units = [coordinator.lease("w1"), coordinator.lease("w1")]
+
+    for unit in reversed(units):
+        assert unit is not None
+        coordinator.complete(
+            "w1",
+            unit["id"],
+            {"title": unit["title"], "verdict": "passed", "duration": 0, "message": ""},
+        )
+
+    assert coordinator.finished
+    assert [r["title"] for r in coordinator.results()[0]] == ["1", "2"]
+
+
+def test_suites_needing_local_files_are_rejected(tmp_path):
+    (tmp_path / "s1").mkdir()
+    (tmp_path / "s1" / "a.py").write_text("print(input())\n")
+    suite = tmp_path / "suite.toml"
+    suite.write_text('language = "python"\nreference = "ref.py"\n[one]\ninput = "1"\n')
+
+    with pytest.raises(Exception, match="cannot be distributed"):
+        collect_submissions([str(tmp_path / "s1")], str(suite))
+
+
+def test_sibling_sources_are_shipped_and_hash_alike(tmp_path, monkeypatch):
+    suite = tmp_path / "suite.toml"
+    suite.write_text('language = "java"\n[one]\ninput = "1"\noutput = "1"\n')
+    for name, helper in (("s1", "class Helper {}"), ("s2", "class Helper { int x; }")):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "Main.java").write_text("class Main {}\r\n")
+        (tmp_path / name / "Helper.java").write_text(helper)
+
+    monkeypatch.setattr(distributed, "get_program", lambda dir: dir / "Main.java")
+    s1, s2 = collect_submissions(
+        [str(tmp_path / "s1"), str(tmp_path / "s2")], str(suite)
+    )
+    assert s1["siblings"] == {"Helper.java": "class Helper {}"}
+    assert s1["fingerprint"] != s2["fingerprint"]
+
+    # Coordinator and worker write the same files, so classes are shared
+    coordinator = write_submission(s1, tmp_path / "coordinator")
+    worker = write_submission(s1, tmp_path / "worker")
+    assert (worker.parent / "Helper.java").exists()
+    assert source_hash(coordinator) == source_hash(worker)
+    assert source_hash(worker) != source_hash(write_submission(s2, tmp_path / "w2"))
+
+
+def test_coordinator_requires_token(tmp_path):
+    coordinator = Coordinator([make_submission("a", ["1"])])
+    with pytest.raises(Exception, match="token"):
+        CoordinatorServer(("0.0.0.0", 0), coordinator)
+
+    server = CoordinatorServer(("127.0.0.1", 0), coordinator, token="secret")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        assert requests.get(f"{url}/submission/0").status_code == 401
+        forged = {"worker": "w", "unit": 0, "result": {}}
+        assert requests.post(f"{url}/result", json=forged).status_code == 401
+
+        headers = {"Authorization": "Bearer secret"}
+        r = requests.get(f"{url}/submission/0", headers=headers)
+        assert r.status_code == 200 and r.json()["name"] == "a"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def without_numpy(code):
+    code = "import sys; sys.modules['numpy'] = None; " + code
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+
+def test_coordinator_and_workers_load_without_numpy():
+    assert without_numpy("import ddp_validator.distributed").returncode == 0
+    stored = without_numpy("import ddp_validator.results")
+    assert "DDP-Validator[store]" in stored.stderr
@@ -0,0 +1,40 @@
+import json
+
+from rich.console import Console
+
+from ddp_validator.eventlog import INFO, EventLogger
+
+
+def test_writes_json_lines_at_level(tmp_path):
+    path = tmp_path / "events.jsonl"
+    logger = EventLogger(Console(file=open(tmp_path / "console.txt", "w")))
+    logger.open(str(path), level=INFO)
+
+    logger.debug("Not written")
+    logger.info("Test finished", title="Input 1", duration=0.5)
+    logger.info("Test finished", message="Line 2: expected '4'", level="x")
+    logger.close()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["level"] == "info"
+    assert records[0]["message"] == "Test finished"
+    assert records[0]["fields"] == {"title": "Input 1", "duration": 0.5}
+
+    # Fields named like record keys do not replace them
+    assert records[1]["message"] == "Test finished"
+    assert records[1]["level"] == "info"
+    assert records[1]["fields"]["message"] == "Line 2: expected '4'"
+
+
+def test_rate_limits_console_echo(tmp_path):
+    out = tmp_path / "console.txt"
+    with open(out, "w") as f:
+        logger = EventLogger(Console(file=f, width=200), echo_rate=5)
+        logger.set_echo(True)
+        for i in range(100):
+            logger.debug("message", i)
+        logger.flush()
+
+    lines = out.read_text().splitlines()
+    assert 5 <= len(lines) < 20
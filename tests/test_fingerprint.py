@@ -0,0 +1,43 @@
+from ddp_validator.fingerprint import fingerprint, group_duplicates
+
+PYTHON = """\
+# Lab 1
+def area(r):
+    return 3.14 * r * r  # circle
+
+print(area(float(input())))
+"""
+
+PYTHON_REFORMATTED = """\
+def area(r):
+
+        return 3.14*r*r
+print( area(float(input())) )
+"""
+
+JAVA = """\
+public class Main {
+    // Entry point
+    public static void main(String[] args) {
+        System.out.println("// not a comment"); /* trailing */
+    }
+}
+"""
+
+
+def test_python_ignores_comments_and_formatting():
+    assert fingerprint(PYTHON, ".py") == fingerprint(PYTHON_REFORMATTED, ".py")
+    assert fingerprint(PYTHON, ".py") != fingerprint(PYTHON.replace("3.14", "3"), ".py")
+
+
+def test_java_keeps_comment_markers_in_strings():
+    compact = "public class Main{public static void main(String[] args)"
+    compact += '{System.out.println("// not a comment");}}'
+    assert fingerprint(JAVA, ".java") == fingerprint(compact, ".java")
+    assert fingerprint(JAVA, ".java") != fingerprint(
+        JAVA.replace("// not a comment", "not a comment"), ".java"
+    )
+
+
+def test_group_duplicates():
+    assert group_duplicates(["a", "b", "a", "c", "b"]) == [[0, 2], [1, 4], [3]]
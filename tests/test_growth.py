@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+import pytest
+
+from ddp_validator.growth import fit_models, parse_bound, pick_model
+
+SIZES = [10000, 20000, 40000, 80000, 160000]
+
+
+def test_picks_simplest_model_that_fits():
+    quadratic = [0.03 + 1e-10 * n * n for n in SIZES]
+    linear = [0.03 + 1e-6 * n * (1.02 if i % 2 else 0.98) for i, n in enumerate(SIZES)]
+    startup = [0.031, 0.030, 0.032, 0.030, 0.031]
+
+    assert pick_model(fit_models(SIZES, quadratic), 0.25) == "n^2"
+    assert pick_model(fit_models(SIZES, linear), 0.25) in ("n", "n log n")
+    assert pick_model(fit_models(SIZES, startup), 0.25) == "1"
+
+
+def test_parse_bound():
+    assert parse_bound("O(n log n)") == "n log n"
+    assert parse_bound("N^2") == "n^2"
+    with pytest.raises(ValueError):
+        parse_bound("O(n!)")
+
+
+def test_suites_load_without_numpy():
+    # Only fitting needs NumPy, parsing bounds must work without it
+    code = (
+        "import sys; sys.modules['numpy'] = None;"
+        "from ddp_validator import cli;"
+        "from ddp_validator.growth import fit_models, parse_bound;"
+        "assert parse_bound('O(n)') == 'n';"
+        "fit_models([1, 2], [0.1, 0.2])"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+    assert "DDP-Validator[complexity]" in process.stderr
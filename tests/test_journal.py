@@ -0,0 +1,53 @@
+from ddp_validator.journal import Journal, program_hash, settings_hash
+
+
+def result(title: str):
+    return {"title": title, "verdict": "passed", "duration": 0.1, "message": ""}
+
+
+def test_resume_skips_truncated_record(tmp_path):
+    path = tmp_path / "run.jsonl"
+    journal = Journal(path)
+    journal.record("a", "alice", result("a"))
+    journal.record("b", "alice", result("b"))
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"key": "c", "submission": "ali')
+
+    resumed = Journal(path, resume=True)
+    resumed.record("d", "bob", result("d"))
+    resumed.close()
+    assert resumed.get("a") == result("a")
+    assert resumed.get("b") == result("b")
+    assert resumed.get("c") is None
+
+    reopened = Journal(path, resume=True)
+    reopened.close()
+    assert reopened.get("d") == result("d")
+
+    fresh = Journal(path)
+    fresh.close()
+    assert fresh.get("a") is None
+
+
+def test_program_hash_covers_sibling_sources(tmp_path):
+    (tmp_path / "Main.java").write_text("class Main {}")
+    (tmp_path / "Helper.java").write_text("class Helper {}")
+    (tmp_path / "notes.txt").write_text("")
+    before = program_hash(str(tmp_path / "Main.java"))
+
+    (tmp_path / "notes.txt").write_text("unrelated")
+    assert program_hash(str(tmp_path / "Main.java")) == before
+    (tmp_path / "Helper.java").write_text("class Helper { int x; }")
+    assert program_hash(str(tmp_path / "Main.java")) != before
+
+
+def test_settings_hash_covers_suite_settings():
+    settings = {
+        settings_hash(False, "default", None),
+        settings_hash(True, "default", None),
+        settings_hash(False, "fast", None),
+        settings_hash(False, "default", "abc"),
+        settings_hash(False, "default", "abd"),
+    }
+    assert len(settings) == 5
@@ -0,0 +1,21 @@
+import pytest
+
+from ddp_validator.tester import InputTester, parse_suite
+
+SUITE = """
+language = "python"
+launch = "fast"
+
+[a]
+input = "1"
+output = "1"
+"""
+
+
+def test_fast_profile_adds_start_up_flags():
+    tester = InputTester.from_suite("/tmp/a.py", parse_suite(SUITE))
+    assert tester.get_command() == ("python", "-s", "a.py")
+    tester.close()
+
+    with pytest.raises(ValueError):
+        parse_suite(SUITE.replace('"fast"', '"turbo"'))
@@ -0,0 +1,33 @@
+from ddp_validator.ordering import order_tests
+from ddp_validator.types import Test as Case
+
+
+def make_tests(n):
+    return [Case(f"Input {i}", "", "", False, None, None, False) for i in range(n)]
+
+
+def titles(tests):
+    return [t.title for t in tests]
+
+
+def test_failed_first_then_unknown_then_passed():
+    history = {
+        "Input 0": {"failed": False, "duration": 0.1},
+        "Input 1": {"failed": True, "duration": 5.0},
+        "Input 3": {"failed": True, "duration": 0.5},
+        "Input 4": {"failed": False, "duration": 2.0},
+    }
+    ordered = order_tests(make_tests(5), history)
+    assert titles(ordered) == ["Input 3", "Input 1", "Input 2", "Input 0", "Input 4"]
+
+
+def test_ties_keep_declared_order():
+    history = {f"Input {i}": {"failed": False, "duration": 1.0} for i in range(4)}
+    assert titles(order_tests(make_tests(6), history)) == [
+        "Input 4",
+        "Input 5",
+        "Input 0",
+        "Input 1",
+        "Input 2",
+        "Input 3",
+    ]
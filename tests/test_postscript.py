@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from ddp_validator.barcode import encode_ean13  # noqa: E402
+from ddp_validator.postscript import (  # noqa: E402
+    MANIFEST_NAME,
+    has_ghostscript,
+    load_manifest,
+    verify_postscript_batch,
+)
+
+needs_ghostscript = pytest.mark.skipif(
+    not has_ghostscript(), reason="Ghostscript is not installed"
+)
+
+
+def write_barcode(path, code, format=None):
+    Image.fromarray(encode_ean13(code)).save(path, format)
+
+
+def test_manifest_lists_files_with_codes(tmp_path):
+    write_barcode(tmp_path / "a.png", "5901234123457")
+    write_barcode(tmp_path / "b.png", "4006381333931")
+    (tmp_path / MANIFEST_NAME).write_text(
+        json.dumps({"a.png": "5901234123457", "b.png": "4006381333931"})
+    )
+
+    assert load_manifest(tmp_path) == [
+        (str(tmp_path / "a.png"), "5901234123457"),
+        (str(tmp_path / "b.png"), "4006381333931"),
+    ]
+
+
+def test_without_manifest_files_are_named_after_codes(tmp_path):
+    for name in ("4006381333931.eps", "5901234123457.ps", "notes.eps", "123.ps"):
+        (tmp_path / name).write_text("%!PS\n")
+    (tmp_path / "9780201379624.png").write_bytes(b"")
+
+    assert load_manifest(tmp_path) == [
+        (str(tmp_path / "4006381333931.eps"), "4006381333931"),
+        (str(tmp_path / "5901234123457.ps"), "5901234123457"),
+    ]
+
+
+def test_batch_keeps_order_and_reports_failures(tmp_path):
+    write_barcode(tmp_path / "good.png", "5901234123457")
+    write_barcode(tmp_path / "wrong.png", "4006381333931")
+    Image.new("L", (200, 50), 255).save(tmp_path / "blank.png")
+    items = [
+        (str(tmp_path / "good.png"), "5901234123457"),
+        (str(tmp_path / "wrong.png"), "5901234123457"),
+        (str(tmp_path / "blank.png"), "5901234123457"),
+        (str(tmp_path / "missing.png"), "5901234123457"),
+    ]
+
+    results = verify_postscript_batch(items, jobs=2)
+    assert [r["path"] for r in results] == [path for path, _ in items]
+    assert [r["passed"] for r in results] == [True, False, False, False]
+    assert results[1]["decoded"] == "4006381333931"
+    assert results[2]["decoded"] is None and not results[2]["message"]
+    assert results[3]["message"]
+    assert verify_postscript_batch([]) == []
+
+
+@needs_ghostscript
+def test_batch_rasterizes_eps(tmp_path):
+    write_barcode(tmp_path / "5901234123457.eps", "5901234123457", "EPS")
+
+    results = verify_postscript_batch(load_manifest(tmp_path), jobs=1)
+    assert [r["passed"] for r in results] == [True], results[0]["message"]
+
+
+def test_tp04_skips_barcode_check_without_ghostscript(tmp_path, monkeypatch):
+    from ddp_validator import tp04
+
+    monkeypatch.setattr(tp04, "has_ghostscript", lambda: False)
+    (tmp_path / "saved.eps").write_text("not PostScript at all")
+    items = [
+        (str(tmp_path / "saved.eps"), "5901234123457"),
+        (str(tmp_path / "unsaved.eps"), "5901234123457"),
+    ]
+
+    assert tp04.check_postscript(items) == ["1 PostScript files were not saved."]
@@ -0,0 +1,65 @@
+import argparse
+import cProfile
+
+from ddp_validator import cli, utils
+from ddp_validator.profiling import DEFAULT_TOP, profile_command, python_hot_functions
+from ddp_validator.tester import InputTester, parse_suite
+
+
+def busy():
+    return sum(i * i for i in range(200000))
+
+
+def test_python_profile_is_summarized(tmp_path):
+    path = str(tmp_path / "run.prof")
+    cProfile.runctx("busy()", globals(), None, path)
+
+    hot = python_hot_functions(path, 2)
+    assert len(hot) == 2
+    assert hot[0]["share"] >= hot[1]["share"]
+    assert any("genexpr" in h["name"] or "sum" in h["name"] for h in hot)
+
+
+def test_profile_command_wraps_launch():
+    assert profile_command("python", ("python", "-s", "a.py"), "p.prof") == (
+        "python",
+        "-s",
+        "-m",
+        "cProfile",
+        "-o",
+        "p.prof",
+        "a.py",
+    )
+    java = profile_command("java", ("java", "-cp", "out", "Main"), "p.jfr")
+    assert java[0] == "java" and java[-3:] == ("-cp", "out", "Main")
+    assert java[1].startswith("-XX:StartFlightRecording=filename=p.jfr")
+
+
+def test_profiled_runs_are_not_journaled(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "JOURNAL_DIR", tmp_path / "journal")
+    monkeypatch.setattr(cli, "update_history", lambda *args: None)
+    monkeypatch.setattr(utils, "_interrupt_first", False)
+    (tmp_path / "a.py").write_text("print(input())\n")
+    suite = parse_suite(
+        'language = "python"\nonly_stdout = true\n[echo]\ninput = "1"\noutput = "1"\n'
+    )
+    args = argparse.Namespace(
+        shard=None, declared_order=True, resume=False, max_failures=None
+    )
+
+    def run(profile: bool):
+        tester = InputTester.from_suite(str(tmp_path / "a.py"), suite)
+        if profile:
+            tester.enable_profiling(DEFAULT_TOP)
+        cli.run(tester, args, tmp_path, "suite.toml", str(tmp_path / "a.py"))
+        tester.close()
+        return list((tmp_path / "journal").glob("*.jsonl"))
+
+    assert run(profile=True) == []
+    journals = run(profile=False)
+    assert len(journals) == 1
+    recorded = journals[0].read_text()
+
+    # Opening a journal for the profiled run would have emptied it
+    run(profile=True)
+    assert journals[0].read_text() == recorded
@@ -0,0 +1,72 @@
+from ddp_validator import reference
+from ddp_validator.reference import ReferenceRunner
+from ddp_validator.tester import InputTester, parse_suite
+
+SUITE = """
+language = "python"
+only_stdout = true
+reference = "ref.py"
+
+[double]
+input = "21"
+"""
+
+# Leaves a mark for every run, so tests can count them
+REFERENCE = """
+with open("runs.txt", "a") as f:
+    f.write("x")
+print(int(input()) * 2)
+"""
+
+
+def make_tester(tmp_path, monkeypatch, source=REFERENCE) -> InputTester:
+    monkeypatch.setattr(reference, "REFERENCE_DIR", tmp_path / "cache")
+    (tmp_path / "ref.py").write_text(source)
+    (tmp_path / "a.py").write_text("print(int(input()) * 2)\n")
+    return InputTester.from_suite(
+        str(tmp_path / "a.py"),
+        parse_suite(SUITE, str(tmp_path)),
+        suite_dir=str(tmp_path),
+    )
+
+
+def runs(tmp_path) -> int:
+    path = tmp_path / "runs.txt"
+    return len(path.read_text()) if path.exists() else 0
+
+
+def expected(tester: InputTester, stdin: str):
+    assert tester.reference
+    # A fresh runner has nothing memoized, only the disk cache can help
+    return ReferenceRunner(tester.reference.tester).expected_lines(stdin)
+
+
+def test_cache_hit_skips_rerun(tmp_path, monkeypatch):
+    tester = make_tester(tmp_path, monkeypatch)
+    assert expected(tester, "21") == ["42"]
+    assert expected(tester, "21") == ["42"]
+    assert runs(tmp_path) == 1
+    tester.close()
+
+
+def test_changed_input_or_source_reruns(tmp_path, monkeypatch):
+    tester = make_tester(tmp_path, monkeypatch)
+    expected(tester, "21")
+    assert expected(tester, "5") == ["10"]
+    assert runs(tmp_path) == 2
+    tester.close()
+
+    tester = make_tester(tmp_path, monkeypatch, REFERENCE.replace("* 2", "* 3"))
+    assert expected(tester, "21") == ["63"]
+    assert runs(tmp_path) == 3
+    tester.close()
+
+
+def test_failing_reference_is_an_error(tmp_path, monkeypatch):
+    tester = make_tester(tmp_path, monkeypatch, "raise SystemExit('broken')\n")
+    result = tester.run_test(tester.tests[0], write_difference=False)
+    tester.close()
+
+    assert result["verdict"] == "error"
+    assert result["message"].startswith("Reference failed")
+    assert "broken" in result["message"]
@@ -0,0 +1,72 @@
+from ddp_validator.results import ResultStore
+
+
+def make_store():
+    store = ResultStore()
+    for i in range(10):
+        store.extend(
+            f"submission-{i}",
+            "tp1.toml",
+            [
+                {
+                    "title": "Input 1",
+                    "verdict": "passed",
+                    "duration": 0.5,
+                    "message": "",
+                },
+                {
+                    "title": "Input 2",
+                    "verdict": "failed" if i % 2 else "error",
+                    "duration": 1.5,
+                    "message": "Program errored!",
+                    "rss": 2048,
+                },
+            ],
+        )
+    return store
+
+
+def test_summaries():
+    store = make_store()
+    assert store.verdict_counts() == {
+        "passed": 10,
+        "failed": 5,
+        "error": 5,
+        "output_file": 0,
+    }
+    assert store.pass_counts()["submission-3"] == (1, 2)
+
+    first, second = store.case_summaries()
+    assert (first["title"], first["runs"], first["passed"]) == ("Input 1", 10, 10)
+    assert second["mean_duration"] == 1.5
+    assert second["max_rss"] == 2048
+
+
+def test_save_and_load(tmp_path):
+    store = make_store()
+    path = str(tmp_path / "results.bin")
+    store.save(path)
+
+    loaded = ResultStore.load(path)
+    assert len(loaded) == 20
+    assert loaded.results("submission-3") == store.results("submission-3")
+    assert loaded.results("submission-3")[1]["message"] == "Program errored!"
+
+
+def test_cases_of_different_suites_share_titles(tmp_path):
+    store = ResultStore()
+    passed = {"title": "Input 1", "verdict": "passed", "duration": 0.5, "message": ""}
+    store.add("a", "tp1.toml", passed)
+    store.add("a", "tp2.toml", {**passed, "verdict": "failed", "duration": 2.0})
+    store.add("b", "tp2.toml", {**passed, "duration": 1.0})
+
+    path = str(tmp_path / "results.bin")
+    store.save(path)
+    summaries = [
+        (c["suite"], c["title"], c["runs"], c["passed"], c["mean_duration"])
+        for c in ResultStore.load(path).case_summaries()
+    ]
+    assert summaries == [
+        ("tp1.toml", "Input 1", 1, 1, 0.5),
+        ("tp2.toml", "Input 1", 2, 1, 1.5),
+    ]
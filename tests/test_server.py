@@ -0,0 +1,116 @@
+import io
+import json
+import tarfile
+import threading
+
+import pytest
+import requests
+
+from ddp_validator import server
+from ddp_validator.server import (
+    GradingServer,
+    GradingService,
+    extract_tarball,
+    find_program,
+)
+from ddp_validator.tester import InputTester, parse_suite
+
+
+def make_tarball(files):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w:gz") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+def test_extracts_single_top_level_directory(tmp_path):
+    data = make_tarball({"lab/main.py": b"print(1)\n"})
+    submission_dir = extract_tarball(data, tmp_path)
+
+    assert submission_dir.name == "lab"
+    assert find_program(submission_dir).name == "main.py"
+
+
+def test_rejects_members_outside_of_tarball(tmp_path):
+    data = make_tarball({"../evil.py": b""})
+    with pytest.raises(Exception):
+        extract_tarball(data, tmp_path / "submission")
+    assert not (tmp_path / "evil.py").exists()
+
+
+SUITE = """
+language = "python"
+only_stdout = true
+
+[double]
+input = "21"
+output = "42"
+
+[triple]
+input = "2"
+output = "6"
+"""
+
+
+@pytest.fixture
+def grading(tmp_path):
+    service = GradingService(2)
+    server = GradingServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    (tmp_path / "suite.toml").write_text(SUITE)
+    submission = tmp_path / "lab"
+    submission.mkdir()
+    (submission / "main.py").write_text("print(int(input()) * 2)\n")
+
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}", {
+        "path": str(submission),
+        "suite": str(tmp_path / "suite.toml"),
+    }
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def test_grades_and_reuses_parsed_suite(grading, monkeypatch):
+    url, params = grading
+    parsed = []
+    monkeypatch.setattr(
+        server, "parse_suite", lambda *args: parsed.append(args) or parse_suite(*args)
+    )
+
+    for _ in range(2):
+        report = requests.post(f"{url}/grade", json=params).json()
+        assert (report["passed"], report["total"], report["error"]) == (1, 2, None)
+        assert [r["verdict"] for r in report["results"]] == ["passed", "failed"]
+
+    assert len(parsed) == 1
+    assert requests.get(f"{url}/status").json()["suites"] == [params["suite"]]
+
+
+def test_streams_each_verdict(grading):
+    url, params = grading
+    with requests.post(f"{url}/grade?stream=1", json=params, stream=True) as r:
+        assert r.headers["Content-Type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in r.iter_lines()]
+
+    assert [line.get("title") for line in lines[:2]] == ["double", "triple"]
+    assert lines[2]["done"] and lines[2]["passed"] == 1
+
+
+def test_setup_errors_are_reported(grading, monkeypatch):
+    url, params = grading
+    r = requests.post(f"{url}/grade", json={**params, "program": "missing.py"})
+    assert r.status_code == 400
+
+    def broken(*args, **kwargs):
+        raise Exception("no data files")
+
+    monkeypatch.setattr(InputTester, "from_suite", broken)
+    r = requests.post(f"{url}/grade?stream=1", json=params)
+    assert r.status_code == 500
+    assert "no data files" in r.json()["error"]
@@ -0,0 +1,68 @@
+import random
+
+from ddp_validator import sharding
+from ddp_validator.sharding import (
+    defer_timings,
+    load_timings,
+    parse_shard,
+    partition_tests,
+    shard_tests,
+    update_timings,
+)
+from ddp_validator.types import Test as Case
+
+
+def make_tests(n):
+    return [Case(f"Input {i}", "", "", False, None, None, False) for i in range(n)]
+
+
+def test_parse_shard():
+    assert parse_shard("1/3") == (0, 3)
+
+
+def test_round_robin_without_history():
+    shards = partition_tests(make_tests(5), 2, {})
+    assert [[t.title for t in s] for s in shards] == [
+        ["Input 0", "Input 2", "Input 4"],
+        ["Input 1", "Input 3"],
+    ]
+
+
+def test_longest_processing_time_first():
+    tests = make_tests(4)
+    timings = {"Input 0": 1.0, "Input 1": 1.0, "Input 2": 1.0, "Input 3": 3.0}
+    shards = partition_tests(tests, 2, timings)
+
+    loads = [sum(timings[t.title] for t in s) for s in shards]
+    assert loads == [3.0, 3.0]
+
+
+def run_shards(tests, count, rng):
+    """Run every shard of a batch in turn, recording timings after each."""
+    titles = []
+    for index in range(count):
+        shard = shard_tests(tests, index, count, load_timings("suite"))
+        titles += [t.title for t in shard]
+        defer_timings(
+            "suite",
+            [
+                {"title": t.title, "verdict": "passed", "duration": rng.random()}
+                for t in shard
+            ],
+        )
+    return titles
+
+
+def test_shards_of_a_batch_cover_suite_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, "TIMINGS_DIR", tmp_path)
+    tests = make_tests(9)
+    rng = random.Random(0)
+    for _ in range(20):
+        titles = run_shards(tests, 3, rng)
+        assert sorted(titles) == sorted(t.title for t in tests)
+
+        # Timings only move once an unsharded run merges them
+        before = load_timings("suite")
+        update_timings("suite", [])
+        assert load_timings("suite").keys() == {t.title for t in tests}
+        assert before != load_timings("suite")
@@ -0,0 +1,79 @@
+import asyncio
+import gzip
+import sys
+import time
+
+import pytest
+
+from ddp_validator.tester import InputTester, LineMatcher, parse_suite, strip_lines
+from ddp_validator.utils import iter_data_lines, run_command_streaming
+
+
+def match(program, expected):
+    matcher = LineMatcher(expected)
+    all(matcher.feed(line) for line in program)
+    matcher.finish()
+    return matcher.mismatch
+
+
+def test_line_matcher_ignores_surrounding_blank_lines():
+    assert match(["", "1", "", "x", ""], ["1", "", "x", "", ""]) is None
+    assert match(["12"], ["regex|[0-9]+"]) is None
+
+
+def test_line_matcher_reports_first_mismatch():
+    assert match(["1", "5", "3"], ["1", "4", "3"]) == "Line 2: expected '4', got '5'"
+    assert match(["1"], ["1", "2"]) == "Line 2: expected '2', got end of output"
+    assert match(["1", "2"], ["1"]) == "Line 2: expected end of output, got '2'"
+
+
+def test_iter_data_lines_decompresses_gzip(tmp_path):
+    path = tmp_path / "input.txt.gz"
+    with gzip.open(path, "wt") as f:
+        f.write("1 2\r\n3 4\n")
+
+    assert list(iter_data_lines(str(path))) == ["1 2", "3 4"]
+
+
+def test_streaming_times_out_after_stdout_closes():
+    program = "import os, time; print(1, flush=True); os.close(1); time.sleep(30)"
+    lines = []
+    start = time.monotonic()
+    with pytest.raises(Exception, match="timed out"):
+        asyncio.run(
+            run_command_streaming(
+                [],
+                lambda line: lines.append(line) or True,
+                sys.executable,
+                "-c",
+                program,
+                timeout=1,
+            )
+        )
+
+    assert lines == ["1"]
+    assert time.monotonic() - start < 10
+
+
+@pytest.mark.parametrize("only_stdout", [True, False])
+def test_indented_first_line_from_file_matches(tmp_path, only_stdout):
+    # A table whose header starts with padding, printed exactly as expected
+    table = "   x  y\n1  2\n3  4   \n"
+    (tmp_path / "expected.txt").write_text("\n" + table + "\n")
+    (tmp_path / "a.py").write_text(f"print({table!r})\n")
+    suite = parse_suite(
+        f'language = "python"\nonly_stdout = {str(only_stdout).lower()}\n'
+        '[table]\ninput = ""\nstdout_file = "expected.txt"\n',
+        str(tmp_path),
+    )
+
+    tester = InputTester.from_suite(str(tmp_path / "a.py"), suite)
+    assert tester.can_stream(tester.tests[0]) == only_stdout
+    result = tester.run_test(tester.tests[0], write_difference=False)
+    tester.close()
+    assert result["verdict"] == "passed", result["message"]
+
+
+def test_strip_lines_is_like_strip():
+    text = "\n \n  a  \n \n\tb \n\n"
+    assert list(strip_lines(text.split("\n"))) == text.strip().splitlines()
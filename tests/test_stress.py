@@ -0,0 +1,76 @@
+import sys
+
+from ddp_validator import stress
+from ddp_validator.admission import AdmissionController
+from ddp_validator.stress import StressJob, find_failure, shrink
+
+GENERATOR = """
+import random, sys
+seed, size = map(int, sys.argv[1:])
+random.seed(seed)
+for _ in range(size):
+    print(*(random.randint(0, 9) for _ in range(3)))
+"""
+
+REFERENCE = """
+import sys
+print(sum(int(x) for x in sys.stdin.read().split()))
+"""
+
+# Off by one whenever a 7 shows up
+BUGGY = """
+import sys
+numbers = [int(x) for x in sys.stdin.read().split()]
+print(sum(numbers) + (7 in numbers))
+"""
+
+
+def make_job(tmp_path) -> StressJob:
+    for name, source in (("gen.py", GENERATOR), ("ref.py", REFERENCE)):
+        (tmp_path / name).write_text(source)
+    (tmp_path / "a.py").write_text(BUGGY)
+
+    case = {
+        "title": "sum",
+        "generator": f"{sys.executable} gen.py {{seed}} {{size}}",
+        "reference": f"{sys.executable} ref.py",
+        "count": 20,
+        "size": 16,
+        "seed": 0,
+    }
+    return StressJob(
+        case,
+        [sys.executable, "a.py"],
+        str(tmp_path),
+        str(tmp_path),
+        [sys.executable, "ref.py"],
+        str(tmp_path),
+    )
+
+
+def test_failure_shrinks_to_minimal_input(tmp_path):
+    job = make_job(tmp_path)
+    failure = find_failure(job, range(20), AdmissionController(2), lambda: None)
+    assert failure is not None and not failure["passed"]
+
+    smallest = shrink(job, failure)
+    assert smallest["input"].split() == ["7"]
+    assert smallest["expected"] == ["7"] and smallest["actual"] == ["8"]
+
+
+def test_shrinking_stops_within_budget(tmp_path, monkeypatch):
+    job = make_job(tmp_path)
+    failure = find_failure(job, range(20), AdmissionController(2), lambda: None)
+    assert failure is not None
+
+    checks = []
+    check_input = stress.check_input
+
+    def counting(*args):
+        checks.append(args)
+        return check_input(*args)
+
+    monkeypatch.setattr(stress, "check_input", counting)
+    smallest = shrink(job, failure, budget=3)
+    assert len(checks) == 3
+    assert not smallest["passed"]
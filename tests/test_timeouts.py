@@ -0,0 +1,58 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from ddp_validator.tester import InputTester, parse_suite
+from ddp_validator.utils import run_command
+
+SUITE = """
+language = "python"
+timeout = 10
+timeout_floor = 1
+
+[declared]
+input = "1"
+output = "1"
+timeout = 5
+
+[calibrated]
+input = "1"
+output = "1"
+
+[uncalibrated]
+input = "1"
+output = "1"
+"""
+
+
+def test_timeout_precedence():
+    tester = InputTester.from_suite("a.py", parse_suite(SUITE))
+    tester.calibrate(
+        {
+            "declared": {"duration": 0.1, "source": "reference"},
+            "calibrated": {"duration": 0.1, "source": "reference"},
+        }
+    )
+    limits = {t.title: tester.timeout_for(t) for t in tester.tests}
+    tester.close()
+
+    assert limits == {"declared": 5, "calibrated": 1, "uncalibrated": 10}
+
+
+@pytest.mark.parametrize("only_stdout", [True, False])
+def test_hung_program_is_killed(only_stdout):
+    start = time.perf_counter()
+    with pytest.raises(Exception, match="timed out after 0.5s"):
+        asyncio.run(
+            run_command(
+                ["1"],
+                sys.executable,
+                "-c",
+                "while True: pass",
+                only_stdout=only_stdout,
+                timeout=0.5,
+            )
+        )
+    assert time.perf_counter() - start < 3
@@ -0,0 +1,96 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ddp_validator.barcode import decode_ean13, encode_ean13  # noqa: E402
+from ddp_validator.tkdriver import TkDriver, render_canvas  # noqa: E402
+
+# Stands in for a Tk root so the harness runs without a display: after()
+# callbacks run in a plain loop until the root is destroyed
+PROGRAM = """
+import time
+import tkinter
+from tkinter import messagebox
+
+
+class Interpreter:
+    def __init__(self, root):
+        self.root = root
+
+    def mainloop(self, n=0):
+        while self.root.alive:
+            due, self.root.pending = self.root.pending, []
+            for callback, args in due:
+                callback(*args)
+            time.sleep(0.005)
+
+
+class Root:
+    def __init__(self):
+        self.alive = True
+        self.pending = []
+        self.tk = Interpreter(self)
+
+    def _root(self):
+        return self
+
+    def after(self, ms, callback, *args):
+        self.pending.append((callback, args))
+
+    def destroy(self):
+        self.alive = False
+
+    def nametowidget(self, path):
+        raise KeyError(path)
+
+
+root = Root()
+root.after(0, messagebox.showerror, "Error", "Invalid code")
+tkinter.Misc.mainloop(root)
+"""
+
+
+def test_harness_records_dialogs_and_reports_errors(tmp_path):
+    program = tmp_path / "program.py"
+    program.write_text(PROGRAM)
+
+    with TkDriver(str(program), timeout=5) as driver:
+        assert driver.dialogs() == [
+            {"kind": "showerror", "title": "Error", "message": "Invalid code"}
+        ]
+        assert driver.dialogs() == []
+        with pytest.raises(Exception, match="KeyError"):
+            driver.invoke(".submit")
+        process = driver._process
+
+    assert process.returncode == 0
+
+
+def test_program_without_mainloop_fails_to_start(tmp_path):
+    program = tmp_path / "program.py"
+    program.write_text("raise SystemExit('no window today')\n")
+
+    with pytest.raises(Exception, match="no window today"):
+        TkDriver(str(program), timeout=1).start()
+
+
+def test_render_canvas_reads_barcode():
+    image = encode_ean13("590123412345")
+    bars = np.flatnonzero(image[0] == 0)
+    items = [
+        {"type": "rectangle", "coords": [x, 5, x + 1, 45], "fill": "black"}
+        for x in bars
+    ]
+    # Text and light items are not part of the barcode
+    items.append({"type": "text", "coords": [10, 48], "fill": "black"})
+    items.append({"type": "rectangle", "coords": [0, 0, 30, 50], "fill": "white"})
+
+    rendered = render_canvas(items, image.shape[1], 50)
+    assert decode_ean13(rendered) == "5901234123457"
+
+
+def test_render_canvas_pads_lines_by_width():
+    items = [{"type": "line", "coords": [10, 10, 10, 20], "fill": "#000", "width": 4}]
+    rendered = render_canvas(items, 30, 30)
+    assert (rendered[8:22, 8:12] == 0).all()
+    assert rendered[15, 7] == 255 and rendered[15, 12] == 255